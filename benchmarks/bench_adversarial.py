@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""bench_adversarial: Benchmark tldr page parsers with adversarial pages.
+
+The synthetic pages are malformed so that regular expressions with
+overlapping repetitions would backtrack quadratically. The parse time
+should grow linearly with the page size.
+
+Run from the project root with:
+
+    python -m benchmarks.bench_adversarial --size 65536
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from snippy_tldr.parser import TldrParser
+from snippy_tldr.plugin import SnippyTldr
+
+PAGES = {
+    "blanks": lambda n: "# a\n \n> x\n" * (n // 10),
+    "headers": lambda n: "#" * n,
+    "quotes": lambda n: "# page\n\n" + "> x\n" * (n // 4),
+    "dashes": lambda n: "# page\n\n> d\n\n" + "- - " * (n // 4),
+    "commands": lambda n: "# page\n\n> d\n\n- c\n" + "\n `x" * (n // 4),
+    "spaces": lambda n: "# page\n\n> " + " " * n + "\n",
+}
+
+
+def plugin(parser):
+    """Create plugin without page size and parse time limits.
+
+    Args:
+        parser (str): Parser option for the plugin.
+
+    Returns:
+        SnippyTldr: Plugin instance.
+    """
+
+    with tempfile.NamedTemporaryFile("w", suffix=".md", delete=False) as page:
+        page.write(PAGES["headers"](1))
+    try:
+        return SnippyTldr(
+            logging.getLogger(__name__),
+            page.name,
+            parser=parser,
+            max_size=0,
+            max_time=0,
+        )
+    finally:
+        os.remove(page.name)
+
+
+def measure(plugin_, page, repeat=3):
+    """Measure the fastest time used to parse one page.
+
+    Args:
+        plugin_ (SnippyTldr): Plugin instance.
+        page (str): Tldr page in a text string.
+        repeat (int): Number of repeated measurements.
+
+    Returns:
+        float: Elapsed time in seconds.
+    """
+
+    elapsed = []
+    for _ in range(repeat):
+        start = time.time()
+        plugin_._parse_tldr_page("", "linux", page)  # pylint: disable=protected-access
+        elapsed.append(time.time() - start)
+
+    return min(elapsed)
+
+
+def main():
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=65536)
+    args = parser.parse_args()
+
+    sizes = []
+    size = 1024
+    while size <= args.size:
+        sizes.append(size)
+        size *= 4
+    for parser_ in (TldrParser.PARSER_REGEX, TldrParser.PARSER_LINES):
+        plugin_ = plugin(parser_)
+        for name, page in sorted(PAGES.items()):
+            times = [measure(plugin_, page(size)) for size in sizes]
+            print(
+                "%-5s  %-8s  %s"
+                % (
+                    parser_,
+                    name,
+                    "  ".join(
+                        "%dKiB: %8.5fs" % (size // 1024, elapsed)
+                        for size, elapsed in zip(sizes, times)
+                    ),
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""bench_bundle: Benchmark importing the offline tldr zip bundle.
+
+Run from the project root with:
+
+    python -m benchmarks.bench_bundle --pages 20000
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+
+from benchmarks.mock_github import MockGitHub
+from snippy_tldr.plugin import SnippyTldr
+
+TRANSLATIONS = ("pages", "pages.de", "pages.it", "pages.pt-BR", "pages.zh")
+
+
+def corpus(root, pages):
+    """Generate local tldr repository and the same pages in a zip bundle.
+
+    Args:
+        root (str): Root directory for the tldr repository and the bundle.
+        pages (int): Number of pages.
+
+    Returns:
+        tuple: Path to the tldr repository and path to the zip bundle.
+    """
+
+    repository = os.path.join(root, "tldr")
+    bundle = os.path.join(root, "tldr.zip")
+    with zipfile.ZipFile(bundle, "w", zipfile.ZIP_DEFLATED) as archive:
+        for i in range(pages):
+            translation = TRANSLATIONS[i % len(TRANSLATIONS)]
+            platform = SnippyTldr.TLDR_PLATFORMS[i % len(SnippyTldr.TLDR_PLATFORMS)]
+            directory = os.path.join(repository, translation, platform)
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            name = "page-%d.md" % i
+            with open(os.path.join(directory, name), "w") as page:
+                page.write(MockGitHub.page(i))
+            archive.writestr(
+                "/".join((translation, platform, name)), MockGitHub.page(i)
+            )
+
+    return repository, bundle
+
+
+def main():
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=20000)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp()
+    try:
+        repository, bundle = corpus(root, args.pages)
+        print("pages: %d" % args.pages)
+        baseline = None
+        for name, uri in (("directory", repository), ("zip", bundle)):
+            start = time.time()
+            contents = SnippyTldr(logging.getLogger(__name__), uri)
+            elapsed = time.time() - start
+            snippets = [(snippet["name"], snippet["groups"]) for snippet in contents]
+            if baseline is None:
+                baseline = snippets
+            assert len(snippets) == args.pages
+            assert snippets == baseline
+            print(
+                "%-9s  time: %6.3fs  pages/s: %9.1f"
+                % (name, elapsed, args.pages / elapsed)
+            )
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
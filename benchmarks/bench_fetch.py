@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""bench_fetch: Benchmark concurrent tldr page fetching.
+
+Run from the project root with:
+
+    python -m benchmarks.bench_fetch --pages 200 --latency 0.02
+"""
+
+import argparse
+import logging
+import time
+
+from benchmarks.mock_github import MockGitHub
+from snippy_tldr.plugin import SnippyTldr
+
+
+def run(server, workers):
+    """Import all pages from the mock server.
+
+    Args:
+        server (obj): Running mock GitHub server.
+        workers (int): Number of concurrent workers.
+
+    Returns:
+        tuple: Number of imported snippets and elapsed time in seconds.
+    """
+
+    class BenchmarkTldr(SnippyTldr):  # pylint: disable=too-few-public-methods
+        """Plugin that reads from the mock server."""
+
+        GITHUB_API = server.api
+        GITHUB_RAW = server.raw
+
+    start = time.time()
+    contents = BenchmarkTldr(logging.getLogger(__name__), "", workers=workers)
+    elapsed = time.time() - start
+    assert [snippet["name"] for snippet in contents] == [
+        "page-%d" % i for i in range(server.pages)
+    ]
+
+    return len(contents), elapsed
+
+
+def main():
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--workers", type=int, nargs="+", default=(1, 8, 32))
+    args = parser.parse_args()
+
+    with MockGitHub(pages=args.pages, latency=args.latency) as server:
+        print("pages: %d latency: %.3fs" % (args.pages, args.latency))
+        for workers in args.workers:
+            pages, elapsed = run(server, workers)
+            print(
+                "workers: %3d  pages: %5d  time: %7.3fs  pages/sec: %8.1f"
+                % (workers, pages, elapsed, pages / elapsed)
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""bench_index: Benchmark building and querying the example index.
+
+Run from the project root with:
+
+    python -m benchmarks.bench_index --pages 10000
+"""
+
+import argparse
+import logging
+import shutil
+import tempfile
+import time
+
+from benchmarks.bench_process import corpus
+from snippy_tldr.index import ExampleIndex
+from snippy_tldr.plugin import SnippyTldr
+
+QUERIES = (("--recursive",), ("name:page-1234",), ("page-42", "--version"), ("tar",))
+
+
+def main():
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp()
+    try:
+        uri = corpus(root, args.pages)
+        logger = logging.getLogger(__name__)
+        print("pages: %d" % args.pages)
+        start = time.time()
+        contents = SnippyTldr(logger, uri)
+        print("import      time: %6.3fs" % (time.time() - start))
+        start = time.time()
+        contents = SnippyTldr(logger, uri, index=True)
+        print("import+index time: %6.3fs" % (time.time() - start))
+        index = ExampleIndex()
+        start = time.time()
+        for record in contents._snippets:  # pylint: disable=protected-access
+            index.add(record)
+        print(
+            "index build time: %6.3fs  examples: %d" % (time.time() - start, len(index))
+        )
+        for terms in QUERIES:
+            start = time.time()
+            for _ in range(args.repeat):
+                results = contents.query(*terms)
+            elapsed = (time.time() - start) / args.repeat
+            print(
+                "query time: %8.3fms  results: %5d  %s"
+                % (elapsed * 1000, len(results), " ".join(terms))
+            )
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""bench_parser: Benchmark tldr page parsers.
+
+Run from the project root with:
+
+    python -m benchmarks.bench_parser --pages 10000
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from benchmarks.mock_github import MockGitHub
+from snippy_tldr.parser import TldrParser
+from snippy_tldr.plugin import SnippyTldr
+
+
+def measure(pages, parser):
+    """Measure time used to parse tldr pages.
+
+    Args:
+        pages (list): Tldr pages in text strings.
+        parser (str): Parser option for the plugin.
+
+    Returns:
+        tuple: Parsed snippets and elapsed time.
+    """
+
+    with tempfile.NamedTemporaryFile("w", suffix=".md", delete=False) as page:
+        page.write(pages[0])
+    try:
+        plugin = SnippyTldr(logging.getLogger(__name__), page.name, parser=parser)
+    finally:
+        os.remove(page.name)
+    start = time.time()
+    snippets = [
+        plugin._parse_tldr_page("", "linux", page)  # pylint: disable=protected-access
+        for page in pages
+    ]
+
+    return snippets, time.time() - start
+
+
+def main():
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=10000)
+    args = parser.parse_args()
+
+    pages = [MockGitHub.page(i) for i in range(args.pages)]
+    print("pages: %d" % args.pages)
+    results = {}
+    for parser_ in (TldrParser.PARSER_REGEX, TldrParser.PARSER_LINES):
+        results[parser_], elapsed = measure(pages, parser_)
+        print(
+            "%-5s  time: %6.3fs  pages/s: %9.1f"
+            % (parser_, elapsed, args.pages / elapsed)
+        )
+    assert results[TldrParser.PARSER_REGEX] == results[TldrParser.PARSER_LINES]
+
+
+if __name__ == "__main__":
+    main()
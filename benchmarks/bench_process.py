@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""bench_process: Benchmark parsing local tldr pages in worker processes.
+
+Run from the project root with:
+
+    python -m benchmarks.bench_process --pages 20000
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.mock_github import MockGitHub
+from snippy_tldr.plugin import SnippyTldr
+
+
+def corpus(root, pages):
+    """Generate local tldr pages.
+
+    Args:
+        root (str): Root directory for the tldr pages.
+        pages (int): Number of pages.
+
+    Returns:
+        str: Path to the generated tldr platform.
+    """
+
+    platform = os.path.join(root, "pages", "linux")
+    os.makedirs(platform)
+    for i in range(pages):
+        with open(os.path.join(platform, "page-%d.md" % i), "w") as page:
+            page.write(MockGitHub.page(i))
+
+    return platform
+
+
+def main():
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=20000)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp()
+    try:
+        uri = corpus(root, args.pages)
+        print("pages: %d" % args.pages)
+        baseline = None
+        for processes in (1, 2, 4, 8):
+            start = time.time()
+            contents = SnippyTldr(logging.getLogger(__name__), uri, processes=processes)
+            elapsed = time.time() - start
+            snippets = list(contents)
+            if baseline is None:
+                baseline = snippets
+            assert snippets == baseline
+            print(
+                "processes: %d  time: %6.3fs  pages/s: %9.1f"
+                % (processes, elapsed, args.pages / elapsed)
+            )
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""bench_record: Benchmark memory of parsed snippets.
+
+Run from the project root with:
+
+    python -m benchmarks.bench_record --pages 10000
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.mock_github import MockGitHub
+from snippy_tldr.plugin import SnippyTldr
+from snippy_tldr.record import TldrRecord
+
+
+def corpus(pages):
+    """Generate parsed tldr pages.
+
+    The pages are spread over translations and platforms like in the tldr
+    project.
+
+    Args:
+        pages (int): Number of pages.
+
+    Returns:
+        generator: Snippet dictionaries parsed from generated pages.
+    """
+
+    translations = ("pages", "pages.de", "pages.it", "pages.pt-BR", "pages.zh")
+    with tempfile.NamedTemporaryFile("w", suffix=".md", delete=False) as page:
+        page.write(MockGitHub.page(0))
+    try:
+        plugin = SnippyTldr(logging.getLogger(__name__), page.name)
+    finally:
+        os.remove(page.name)
+    for i in range(pages):
+        translation = translations[i % len(translations)]
+        platform = SnippyTldr.TLDR_PLATFORMS[i % len(SnippyTldr.TLDR_PLATFORMS)]
+        source = "%s%s/%s/page-%d.md" % (
+            SnippyTldr.GITHUB_RAW,
+            translation,
+            platform,
+            i,
+        )
+        yield plugin._parse_tldr_page(  # pylint: disable=protected-access
+            source, platform, MockGitHub.page(i)
+        )
+
+
+def measure(pages, compact):
+    """Measure memory used to store parsed tldr pages.
+
+    Args:
+        pages (int): Number of pages.
+        compact (bool): Store pages in compact records.
+
+    Returns:
+        tuple: Retained and peak memory in bytes and elapsed time.
+    """
+
+    tracemalloc.start()
+    start = time.time()
+    if compact:
+        snippets = [TldrRecord(snippet) for snippet in corpus(pages)]
+    else:
+        snippets = list(corpus(pages))
+    elapsed = time.time() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(snippets) == pages
+
+    return retained, peak, elapsed
+
+
+def main():
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=10000)
+    args = parser.parse_args()
+
+    print("pages: %d" % args.pages)
+    for compact in (False, True):
+        retained, peak, elapsed = measure(args.pages, compact)
+        print(
+            "%-7s  retained: %9.1f KiB  peak: %9.1f KiB  time: %6.3fs"
+            % (
+                "record" if compact else "dict",
+                retained / 1024.0,
+                peak / 1024.0,
+                elapsed,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
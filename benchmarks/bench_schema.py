@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""bench_schema: Benchmark JSON schema validation of parsed tldr pages.
+
+Run from the project root with:
+
+    python -m benchmarks.bench_schema --pages 10000
+"""
+
+import argparse
+import logging
+import time
+
+from snippy.plugins import Schema
+
+from benchmarks.mock_github import MockGitHub
+from snippy_tldr.parser import TldrParser
+from snippy_tldr.plugin import SnippyTldr
+from snippy_tldr.schema import SnippetValidator
+
+
+def main():
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=10000)
+    parser.add_argument("--batch", type=int, default=128)
+    args = parser.parse_args()
+
+    logger = logging.getLogger(__name__)
+    plugin = TldrParser(logger, dict(SnippyTldr.OPTIONS))
+    snippets = [
+        plugin.parse_page("", "linux", MockGitHub.page(i)) for i in range(args.pages)
+    ]
+    print("pages: %d" % args.pages)
+
+    schema = Schema()
+    start = time.time()
+    expect = [schema.validate(snippet) for snippet in snippets]
+    elapsed = time.time() - start
+    print("per page  time: %6.3fs  pages/s: %9.1f" % (elapsed, args.pages / elapsed))
+
+    validator = SnippetValidator(logger, schema)
+    start = time.time()
+    valid = []
+    for i in range(0, len(snippets), args.batch):
+        valid.extend(validator.validate(snippets[i : i + args.batch]))
+    elapsed = time.time() - start
+    print("batched   time: %6.3fs  pages/s: %9.1f" % (elapsed, args.pages / elapsed))
+    assert valid == expect
+
+
+if __name__ == "__main__":
+    main()
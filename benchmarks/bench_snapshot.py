@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""bench_snapshot: Benchmark importing parsed tldr pages from a snapshot.
+
+Run from the project root with:
+
+    python -m benchmarks.bench_snapshot --pages 20000
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.bench_process import corpus
+from snippy_tldr.plugin import SnippyTldr
+
+
+def main():
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=20000)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp()
+    try:
+        uri = corpus(root, args.pages)
+        path = os.path.join(root, "tldr.snapshot")
+        logger = logging.getLogger(__name__)
+        print("pages: %d" % args.pages)
+        start = time.time()
+        contents = SnippyTldr(logger, uri)
+        print("parse     time: %6.3fs" % (time.time() - start))
+        start = time.time()
+        assert contents.export_snapshot(path) == args.pages
+        print(
+            "export    time: %6.3fs  size: %d bytes"
+            % (time.time() - start, os.path.getsize(path))
+        )
+        baseline = list(contents)
+        start = time.time()
+        contents = SnippyTldr(logger, path)
+        print("snapshot  time: %6.3fs" % (time.time() - start))
+        assert list(contents) == baseline
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""bench_stream: Benchmark time-to-first-snippet and memory in stream mode.
+
+Run from the project root with:
+
+    python -m benchmarks.bench_stream --pages 1000 --latency 0.002
+"""
+
+import argparse
+import logging
+import time
+import tracemalloc
+
+from benchmarks.mock_github import MockGitHub
+from snippy_tldr.plugin import SnippyTldr
+
+
+def run(server, stream, workers):
+    """Import all pages from the mock server.
+
+    Args:
+        server (obj): Running mock GitHub server.
+        stream (bool): Read tldr pages lazily.
+        workers (int): Number of concurrent workers.
+
+    Returns:
+        tuple: Time to first snippet, total time and peak memory in bytes.
+    """
+
+    class BenchmarkTldr(SnippyTldr):  # pylint: disable=too-few-public-methods
+        """Plugin that reads from the mock server."""
+
+        GITHUB_API = server.api
+        GITHUB_RAW = server.raw
+
+    tracemalloc.start()
+    start = time.time()
+    contents = BenchmarkTldr(
+        logging.getLogger(__name__), "", stream=stream, workers=workers
+    )
+    next(contents)
+    first = time.time() - start
+    for _ in contents:
+        pass
+    total = time.time() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return first, total, peak
+
+
+def main():
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.002)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    with MockGitHub(pages=args.pages, latency=args.latency) as server:
+        print("pages: %d latency: %.3fs" % (args.pages, args.latency))
+        for stream in (False, True):
+            first, total, peak = run(server, stream, args.workers)
+            print(
+                "stream: %-5s  first snippet: %7.3fs  total: %7.3fs  peak: %8.1f KiB"
+                % (stream, first, total, peak / 1024.0)
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""bench_walk: Benchmark listing a local tldr repository.
+
+Run from the project root with:
+
+    python -m benchmarks.bench_walk --pages 50000
+"""
+
+import argparse
+import glob
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+from snippy_tldr.local import LocalPages
+from snippy_tldr.plugin import SnippyTldr
+
+TRANSLATIONS = ("pages", "pages.de", "pages.it", "pages.pt-BR", "pages.zh")
+
+
+def corpus(root, pages):
+    """Generate local tldr repository with empty pages.
+
+    Args:
+        root (str): Root directory for the tldr repository.
+        pages (int): Number of pages.
+    """
+
+    for translation in TRANSLATIONS:
+        for platform in SnippyTldr.TLDR_PLATFORMS:
+            os.makedirs(os.path.join(root, translation, platform))
+    for i in range(pages):
+        translation = TRANSLATIONS[i % len(TRANSLATIONS)]
+        platform = SnippyTldr.TLDR_PLATFORMS[i % len(SnippyTldr.TLDR_PLATFORMS)]
+        open(os.path.join(root, translation, platform, "page-%d.md" % i), "w").close()
+
+
+def list_glob(root):
+    """List tldr pages with glob for each translation and platform.
+
+    Args:
+        root (str): Root directory for the tldr repository.
+
+    Returns:
+        list: Tldr page paths.
+    """
+
+    pages = []
+    for translation in sorted(os.listdir(root)):
+        for platform in sorted(os.listdir(os.path.join(root, translation))):
+            path = os.path.join(root, translation, platform)
+            if os.path.isdir(path):
+                pages.extend(glob.glob(os.path.join(path, "*.md")))
+
+    return pages
+
+
+def main():
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=50000)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp()
+    try:
+        corpus(root, args.pages)
+        local = LocalPages(logging.getLogger(__name__))
+        print("pages: %d" % args.pages)
+        start = time.time()
+        pages = list_glob(root)
+        elapsed = time.time() - start
+        assert len(pages) == args.pages
+        print("glob     time: %6.3fs" % elapsed)
+        start = time.time()
+        pages = list(local.walk(root))
+        elapsed = time.time() - start
+        assert len(pages) == args.pages
+        print("scandir  time: %6.3fs" % elapsed)
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""mock_github: Local mock server for the GitHub API and raw content."""
+
+import json
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+PAGE = "\n".join(
+    (
+        "# {name}",
+        "",
+        "> Benchmark page number {number}.",
+        "> More information: <https://example.com/{name}>.",
+        "",
+        "- List files in the current directory:",
+        "",
+        "`{name} --list {{{{path/to/directory}}}}`",
+        "",
+        "- Remove files recursively:",
+        "",
+        "`{name} --recursive --force {{{{path/to/file}}}}`",
+        "",
+        "- Show the version:",
+        "",
+        "`{name} --version`",
+    )
+)
+
+
+class MockGitHub(object):
+    """Mock GitHub API and raw content server for benchmarks.
+
+    The server serves one branch with one translation and one platform that
+    contains the requested number of generated tldr pages. Each request is
+    delayed with the given latency to simulate the network round-trip time.
+    """
+
+    def __init__(self, pages=100, latency=0.01, platform="linux"):
+        self.pages = pages
+        self.latency = latency
+        self.platform = platform
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+
+    @property
+    def url(self):
+        """Base URL of the server."""
+
+        return "http://127.0.0.1:%d/" % self._server.server_port
+
+    @property
+    def api(self):
+        """Base URL of the mocked GitHub API."""
+
+        return self.url + "repos/tldr-pages/tldr/"
+
+    @property
+    def raw(self):
+        """Base URL of the mocked GitHub raw content."""
+
+        return self.url + "raw/"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_):
+        self._server.shutdown()
+        self._server.server_close()
+
+    @staticmethod
+    def page(number):
+        """Generated tldr page.
+
+        Args:
+            number (int): Page number.
+
+        Returns:
+            str: Generated tldr page in a text string.
+        """
+
+        return PAGE.format(name="page-%d" % number, number=number)
+
+    def tree(self, path):
+        """GitHub API tree response for the path.
+
+        Args:
+            path (str): Tree path after the ``git/trees/`` in the URL.
+
+        Returns:
+            dict: GitHub API tree response.
+        """
+
+        tree = self.api + "git/trees/"
+        if path == "branch":
+            return {"tree": [{"path": "pages", "type": "tree", "url": tree + "pages"}]}
+        if path == "pages":
+            return {
+                "tree": [
+                    {"path": self.platform, "type": "tree", "url": tree + "platform"}
+                ]
+            }
+        return {
+            "tree": [
+                {"path": "page-%d.md" % i, "type": "blob", "sha": "%040x" % i}
+                for i in range(self.pages)
+            ]
+        }
+
+    def get(self, path):
+        """Response for HTTP GET request.
+
+        Args:
+            path (str): Requested URL path.
+
+        Returns:
+            tuple: HTTP status code, content type and response body.
+        """
+
+        if path.startswith("/repos/tldr-pages/tldr/branches/"):
+            tree = self.api + "git/trees/branch"
+            body = {"commit": {"sha": "0" * 40, "commit": {"tree": {"url": tree}}}}
+            return 200, "application/json", json.dumps(body)
+        if path.startswith("/repos/tldr-pages/tldr/git/trees/"):
+            body = self.tree(path.split("/")[-1].split("?")[0])
+            return 200, "application/json", json.dumps(body)
+        if path.startswith("/raw/") and path.endswith(".md"):
+            number = int(path.rsplit("-", 1)[-1][:-3])
+            return 200, "text/plain; charset=utf-8", self.page(number)
+
+        return 404, "text/plain", "not found"
+
+    def _handler(self):
+        """Request handler class bound to this server."""
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """HTTP request handler."""
+
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):  # pylint: disable=invalid-name
+                """Serve HTTP GET request."""
+
+                with server._lock:  # pylint: disable=protected-access
+                    server.requests += 1
+                time.sleep(server.latency)
+                status, content_type, body = server.get(self.path)
+                body = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *_):  # pylint: disable=arguments-differ
+                """Disable request logging."""
+
+        return Handler
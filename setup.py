@@ -28,6 +28,7 @@ with io.open("README.rst", mode="r", encoding="utf-8") as infile:
 
 REQUIRES = (
     "requests",
+    'scandir ; python_version<"3.5"',  # The os.scandir is in Python 3.5 and later.
     "jsonschema==3.2.0",  # For the snippy.plugins module.
     "snippy>=0.11.0",
 )
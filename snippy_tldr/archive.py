@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""archive: Read tldr pages from a GitHub branch archive."""
+
+import tarfile
+
+from snippy_tldr.github import GitHubPages
+from snippy_tldr.pages import TldrPages
+from snippy_tldr.record import TldrRecord
+
+
+class GitHubArchive(object):  # pylint: disable=too-few-public-methods
+    """Read tldr pages from a GitHub branch archive.
+
+    The branch is downloaded as one gzipped tarball that is read as a
+    stream. The tldr pages are parsed directly from the archive members
+    without extracting the archive to disk or keeping it in memory. The
+    archive is not limited by the GitHub API rate limit.
+    """
+
+    def __init__(self, logger, options, client, selector, parser):
+        self._logger = logger
+        self._options = options
+        self._client = client
+        self._selector = selector
+        self._parser = parser
+
+    def read(self, tree):
+        """Read tldr pages from GitHub branch archive.
+
+        The snippets are sorted to the same order as the GitHub tree listing
+        uses and they have the same GitHub raw links as tldr pages read one
+        by one.
+
+        Args:
+            tree (GitHubTree): GitHub branch, translations and platforms.
+
+        Returns:
+            tuple: List of compact records and a list of read translations or
+            None if the archive was not read.
+        """
+
+        if not tree.platforms or tree.translations == ():
+            self._logger.debug("no tldr platforms or translations selected")
+            return [], None
+        url = TldrPages.join_paths(GitHubPages.GITHUB_ARCHIVE, tree.branch)
+        self._logger.debug("request tldr archive: %s", url)
+        resp = self._client.get(url, stream=True)
+        if self._client.is_error(resp):
+            return [], None
+
+        records = []
+        pending = []
+        found = []
+        resp.raw.decode_content = True
+        raw = TldrPages.join_paths(GitHubPages.GITHUB_RAW, tree.branch)
+        with tarfile.open(fileobj=resp.raw, mode="r|gz") as archive:
+            for member, path, key in self._get_members(archive, tree):
+                if path[0] not in found:
+                    found.append(path[0])
+                source = TldrPages.join_paths(raw, "/".join(path))
+                snippet = self._read_member(archive, member, source, path[1])
+                if snippet:
+                    pending.append((key, snippet))
+                    if len(pending) >= self._options["batch"]:
+                        self._flush(pending, records)
+        resp.close()
+        self._flush(pending, records)
+
+        records.sort(key=lambda record: record[0])
+        if self._options["max_pages"]:
+            del records[self._options["max_pages"] :]
+        self._logger.debug("read total of %d tldr pages from archive", len(records))
+
+        return [record for _, record in records], sorted(found)
+
+    def _get_members(self, archive, tree):
+        """Get selected tldr pages from the archive members.
+
+        The sort key of a page is the order of the translation, the order
+        of the platform and the page name. All translations are sorted by
+        name when the translations are not defined.
+
+        Args:
+            archive (obj): Tarball opened as a stream.
+            tree (GitHubTree): GitHub branch, translations and platforms.
+
+        Returns:
+            generator: Archive member, page path and sort key tuples.
+        """
+
+        for member in archive:
+            path = member.name.split("/")[1:]
+            if not member.isfile() or len(path) != 3:
+                continue
+            translation, platform, page = path
+            if not page.endswith(".md") or platform not in tree.platforms:
+                continue
+            order = self._get_order(translation, tree.translations)
+            if order is None or not self._selector.is_selected(page):
+                continue
+            key = (order, tree.platforms.index(platform), page.encode("utf-8"))
+            yield member, path, key
+
+    def _get_order(self, translation, translations):
+        """Get sort order of a selected translation.
+
+        Args:
+            translation (str): Translation of an archive member.
+            translations (tuple): List of translations or None for all translations.
+
+        Returns:
+            obj: Sort order or None if the translation is not selected.
+        """
+
+        if translations is not None:
+            if translation not in translations:
+                return None
+            return translations.index(translation)
+        if not TldrPages.RE_MATCH_TLDR_TRANSLATION_DIR.match(translation):
+            return None
+        if not self._selector.select("translations", (translation,)):
+            return None
+
+        return translation + "/"
+
+    def _read_member(self, archive, member, source, platform):
+        """Read and parse one tldr page from the archive.
+
+        Args:
+            archive (obj): Tarball opened as a stream.
+            member (obj): Archive member of the tldr page.
+            source (str): GitHub raw link of the tldr page.
+            platform (str): Platform where the page is stored.
+
+        Returns:
+            dict: Parsed snippet or None if the page could not be read.
+        """
+
+        try:
+            page = archive.extractfile(member).read().decode("utf-8")
+        except UnicodeDecodeError as error:
+            self._logger.debug("failed to read: %s :%s", source, error)
+            page = None
+
+        return self._parser.parse(source, source, platform, page)
+
+    def _flush(self, pending, records):
+        """Validate pending snippets and store them in compact records.
+
+        Args:
+            pending (list): Sort key and snippet tuples to validate.
+            records (list): Sort key and compact record tuples.
+        """
+
+        valid = self._parser.validate([snippet for _, snippet in pending])
+        for (key, snippet), valid_ in zip(pending, valid):
+            if valid_:
+                records.append((key, TldrRecord(snippet)))
+        del pending[:]
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""bundle: Read tldr pages from a local zip bundle."""
+
+import threading
+import zipfile
+
+from snippy.plugins import Cause
+
+from snippy_tldr.pages import TldrPages
+
+
+class ZipBundle(object):
+    """Read tldr pages from a local zip bundle.
+
+    The pages are listed from the central directory of the zip file and
+    they are read directly from the zip file without extracting it. The
+    pages can be in translation directories at the root of the zip file
+    like in the offline tldr bundle or under one top level directory like
+    in a GitHub branch archive.
+    """
+
+    def __init__(self, logger, path):
+        self._logger = logger
+        self._path = path
+        self._lock = threading.Lock()
+        self._zip = None
+        self._members = {}
+
+    def list_pages(self):
+        """Get all tldr pages from the zip bundle.
+
+        Pages are listed in the order of translation, platform and page
+        names.
+
+        Returns:
+            dict: All tldr pages with a path to the zip file member.
+        """
+
+        pages = {}
+        try:
+            self._zip = zipfile.ZipFile(  # pylint: disable=consider-using-with
+                self._path
+            )
+            members = self._zip.infolist()
+        except (IOError, OSError, zipfile.BadZipfile) as error:
+            Cause.push(
+                Cause.HTTP_FORBIDDEN,
+                "tldr zip bundle cannot be read: {} :{}".format(self._path, error),
+            )
+            return pages
+
+        found = []
+        for member in members:
+            path = TldrPages.split_path("/".join(member.filename.split("/")[-3:]))
+            if member.filename.count("/") not in (2, 3) or not path:
+                continue
+            found.append((path, member))
+        found.sort(key=lambda page: page[0])
+        for (translation, platform, _), member in found:
+            uri = TldrPages.join_paths(self._path, member.filename)
+            pages.setdefault(translation, {}).setdefault(platform, []).append(uri)
+            self._members[uri] = member
+        self._logger.debug("read tldr pages from zip bundle: %s", self._path)
+
+        return pages
+
+    def read(self, uri):
+        """Read a tldr page from the zip bundle.
+
+        Args:
+            uri (str): Path to the zip file member.
+
+        Returns:
+            str: The tldr page in a text string.
+        """
+
+        self._logger.debug("read tldr page: %s", uri)
+        with self._lock:
+            return self._zip.read(self._members[uri]).decode("utf-8")
+
+    def close(self):
+        """Close the zip bundle."""
+
+        if self._zip:
+            self._zip.close()
@@ -0,0 +1,521 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""cache: Persistent caches for tldr pages."""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+
+from collections import OrderedDict
+from collections import namedtuple
+from contextlib import contextmanager
+
+# Cache directory, size limit and the version of the cached content.
+CacheConfig = namedtuple("CacheConfig", ("path", "limit", "version"))
+
+
+@contextmanager
+def atomic_write(path):
+    """Write a file through a temporary file that replaces the file.
+
+    The temporary file is created in the same directory as the file. It
+    replaces the file only when the block exits without an exception and
+    it is removed if the block fails. Readers never see a partially
+    written file.
+
+    Args:
+        path (str): Path to the written file.
+
+    Returns:
+        generator: Path to the temporary file that is written in the block.
+    """
+
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    fd_, temp = tempfile.mkstemp(dir=directory)
+    os.close(fd_)
+    try:
+        yield temp
+        if os.path.isfile(path):
+            os.remove(path)
+        os.rename(temp, path)
+    finally:
+        if os.path.isfile(temp):
+            os.remove(temp)
+
+
+class PageCache(object):
+    """Content addressed cache for tldr pages.
+
+    The raw tldr pages are stored on disk with the git blob SHA as a key.
+    The GitHub tree listing contains the blob SHA of each page which means
+    that an unchanged page can be read from the cache without requesting
+    it from GitHub.
+
+    The total size of the cache is limited. The least recently used pages
+    are evicted when the limit is exceeded. The file modification time is
+    used to store the access order between plugin runs.
+    """
+
+    def __init__(self, logger, path, max_size):
+        self._logger = logger
+        self._config = CacheConfig(path, max_size, None)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def get(self, key):
+        """Get cached page.
+
+        Args:
+            key (str): Git blob SHA of the page.
+
+        Returns:
+            bytes: Cached page or None if the page is not in the cache.
+        """
+
+        with self._lock:
+            if key not in self._entries:
+                self.misses = self.misses + 1
+                return None
+            self._entries[key] = self._entries.pop(key)
+        path = self._get_path(key)
+        try:
+            with open(path, "rb") as infile:
+                data = infile.read()
+            os.utime(path, None)
+        except (IOError, OSError) as error:
+            self._logger.debug("failed to read cached page: %s :%s", path, error)
+            with self._lock:
+                self._size = self._size - self._entries.pop(key, 0)
+                self.misses = self.misses + 1
+            return None
+        with self._lock:
+            self.hits = self.hits + 1
+
+        return data
+
+    def put(self, key, data):
+        """Store page to cache.
+
+        Args:
+            key (str): Git blob SHA of the page.
+            data (bytes): Page content.
+        """
+
+        with self._lock:
+            if key in self._entries or len(data) > self._config.limit:
+                return
+        path = self._get_path(key)
+        try:
+            with atomic_write(path) as temp, open(temp, "wb") as outfile:
+                outfile.write(data)
+        except (IOError, OSError) as error:
+            self._logger.debug("failed to write cached page: %s :%s", path, error)
+            return
+        with self._lock:
+            self._entries[key] = len(data)
+            self._size = self._size + len(data)
+            self._evict()
+
+    @staticmethod
+    def blob_sha(data):
+        """Calculate git blob SHA.
+
+        Args:
+            data (bytes): Blob content.
+
+        Returns:
+            str: Git blob SHA1 in a hex string.
+        """
+
+        header = ("blob %d\0" % len(data)).encode("ascii")
+
+        return hashlib.sha1(header + data).hexdigest()
+
+    def _load(self):
+        """Load cached pages in the least recently used order."""
+
+        entries = []
+        if os.path.isdir(self._config.path):
+            for prefix in os.listdir(self._config.path):
+                directory = os.path.join(self._config.path, prefix)
+                if len(prefix) != 2 or not os.path.isdir(directory):
+                    continue
+                for name in os.listdir(directory):
+                    if len(name) != 38:
+                        continue
+                    stat = os.stat(os.path.join(directory, name))
+                    entries.append((stat.st_mtime, prefix + name, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._entries[key] = size
+            self._size = self._size + size
+        self._evict()
+        self._logger.debug(
+            "page cache: %s :has %d pages with %d bytes",
+            self._config.path,
+            len(self._entries),
+            self._size,
+        )
+
+    def _evict(self):
+        """Remove least recently used pages over the size limit."""
+
+        while self._size > self._config.limit and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._size = self._size - size
+            try:
+                os.remove(self._get_path(key))
+            except OSError:
+                pass
+
+    def _get_path(self, key):
+        """Get file path for cached page.
+
+        Args:
+            key (str): Git blob SHA of the page.
+
+        Returns:
+            str: Path to the cached page.
+        """
+
+        return os.path.join(self._config.path, key[:2], key[2:])
+
+
+class HttpCache(object):
+    """HTTP response cache with conditional requests.
+
+    The cache stores the response body together with the ``ETag`` and the
+    ``Last-Modified`` validators for each requested URL. A cached response
+    that is still fresh according to the ``Cache-Control`` header is used
+    without a request. A stale response is revalidated with a conditional
+    request and the cached body is used if the server responds with 304.
+    GitHub does not count 304 responses against the API rate limit.
+    """
+
+    # Response headers stored with the cached body.
+    HEADERS = ("Cache-Control", "Content-Type", "ETag", "Last-Modified")
+
+    RE_CATCH_MAX_AGE = re.compile(r"max-age=(?P<age>\d+)")
+
+    def __init__(self, logger, path):
+        self._logger = logger
+        self._path = path
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+
+    def get(self, url):
+        """Get cached response.
+
+        Args:
+            url (str): Requested URL with the query string.
+
+        Returns:
+            tuple: Cached response metadata and body or None.
+        """
+
+        try:
+            with open(self._get_path(url), "rb") as infile:
+                meta = json.loads(infile.readline().decode("utf-8"))
+                body = infile.read()
+        except (IOError, OSError, ValueError):
+            return None
+        if meta.get("url") != url:
+            return None
+
+        return meta, body
+
+    def put(self, url, headers, body):
+        """Store response to cache.
+
+        The response is stored only if it has validators or if it can be
+        cached for some time.
+
+        Args:
+            url (str): Requested URL with the query string.
+            headers (dict): Response headers.
+            body (bytes): Response body.
+        """
+
+        headers_ = {name: headers[name] for name in self.HEADERS if name in headers}
+        validators = "ETag" in headers_ or "Last-Modified" in headers_
+        if not validators and not self.max_age(headers_):
+            return
+        meta = {"url": url, "stored": time.time(), "headers": headers_}
+        path = self._get_path(url)
+        try:
+            with atomic_write(path) as temp, open(temp, "wb") as outfile:
+                outfile.write(json.dumps(meta).encode("utf-8") + b"\n")
+                outfile.write(body)
+        except (IOError, OSError) as error:
+            self._logger.debug("failed to write cached response: %s :%s", url, error)
+
+    def is_fresh(self, meta):
+        """Test if cached response can be used without revalidation.
+
+        Args:
+            meta (dict): Cached response metadata.
+
+        Returns:
+            bool: True if the cached response is fresh.
+        """
+
+        return time.time() - meta["stored"] < self.max_age(meta["headers"])
+
+    def touch(self, url, meta, body):
+        """Mark revalidated response fresh again.
+
+        Args:
+            url (str): Requested URL with the query string.
+            meta (dict): Cached response metadata.
+            body (bytes): Cached response body.
+        """
+
+        if self.max_age(meta["headers"]):
+            self.put(url, meta["headers"], body)
+
+    def count(self, result):
+        """Count cache hits, revalidations and misses.
+
+        Args:
+            result (str): One of ``hits``, ``revalidations`` or ``misses``.
+        """
+
+        with self._lock:
+            setattr(self, result, getattr(self, result) + 1)
+
+    def max_age(self, headers):
+        """Get maximum age of the response from the ``Cache-Control`` header.
+
+        Args:
+            headers (dict): Response headers.
+
+        Returns:
+            int: Maximum age in seconds.
+        """
+
+        control = headers.get("Cache-Control", "")
+        match = self.RE_CATCH_MAX_AGE.search(control)
+        if not match or "no-cache" in control or "no-store" in control:
+            return 0
+
+        return int(match.group("age"))
+
+    def _get_path(self, url):
+        """Get file path for cached response.
+
+        Args:
+            url (str): Requested URL with the query string.
+
+        Returns:
+            str: Path to the cached response.
+        """
+
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+        return os.path.join(self._path, key[:2], key[2:])
+
+
+class ParseCache(object):
+    """Cache for parsed tldr pages.
+
+    The parsed snippets are stored with a key that is calculated from the
+    tldr page content, platform and source link. The cache is stored in one
+    SQLite database for each parser version. The parser version is a
+    fingerprint of the parser code which means that the cache from a
+    different parser is removed when the cache is opened. The snippets are
+    read from the database one at a time and only the snippets stored in
+    the current run are written when the cache is saved.
+
+    The number of cached snippets is limited. The snippets are stored in
+    the order of use where the snippets read or stored in the current run
+    are the last. The least recently used snippets are evicted when the
+    cache is saved and the limit is exceeded. The cache is saved only when
+    new snippets were stored in the run.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS snippets "
+        "(key TEXT PRIMARY KEY, snippet TEXT, used INTEGER)"
+    )
+
+    def __init__(self, logger, path, version, max_entries=50000):
+        self._logger = logger
+        self._config = CacheConfig(path, max_entries, version)
+        self._lock = threading.Lock()
+        self._connection = None
+        self._used = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def get(self, key):
+        """Get cached snippet.
+
+        Args:
+            key (str): Key calculated from the parsed tldr page.
+
+        Returns:
+            dict: Cached snippet or None if the page is not in the cache.
+        """
+
+        with self._lock:
+            snippet = self._used.get(key)
+            if snippet is None and self._connection is not None:
+                try:
+                    row = self._connection.execute(
+                        "SELECT snippet FROM snippets WHERE key = ?", (key,)
+                    ).fetchone()
+                    snippet = json.loads(row[0]) if row else None
+                except (sqlite3.Error, ValueError) as error:
+                    self._logger.debug("parse cache not read: %s :%s", key, error)
+            if snippet is None:
+                self.misses = self.misses + 1
+            else:
+                self.hits = self.hits + 1
+                self._used.setdefault(key, None)
+
+        return snippet
+
+    def put(self, key, snippet):
+        """Store snippet to cache.
+
+        Args:
+            key (str): Key calculated from the parsed tldr page.
+            snippet (dict): Parsed snippet.
+        """
+
+        with self._lock:
+            self._used[key] = snippet
+
+    @staticmethod
+    def key(page, platform, source):
+        """Calculate cache key for a tldr page.
+
+        Args:
+            page (str): A tldr man page in a text string.
+            platform (str): Platform where the page is stored.
+            source (str): A link where the tldr man page was read.
+
+        Returns:
+            str: SHA1 of the page, platform and source in a hex string.
+        """
+
+        key = hashlib.sha1(page.encode("utf-8"))
+        key.update(("\0%s\0%s" % (platform, source)).encode("utf-8"))
+
+        return key.hexdigest()
+
+    def save(self):
+        """Save the cache to the database if it was changed.
+
+        The snippets used in the current run are moved last and the least
+        recently used snippets over the limit are evicted in the same
+        transaction where the snippets stored in the current run are written.
+        """
+
+        with self._lock:
+            if self._connection is None or all(
+                snippet is None for snippet in self._used.values()
+            ):
+                return
+            try:
+                with self._connection:
+                    evicted = self._write()
+                self._used = OrderedDict()
+            except sqlite3.Error as error:
+                self._logger.debug(
+                    "failed to save parse cache: %s :%s", self._get_path(), error
+                )
+                return
+        if evicted:
+            self._logger.debug("evicted %d snippets from parse cache", evicted)
+
+    def _write(self):
+        """Write the snippets used in the current run in one transaction.
+
+        Returns:
+            int: Number of evicted snippets.
+        """
+
+        used = self._connection.execute("SELECT MAX(used) FROM snippets").fetchone()
+        stored = []
+        read = []
+        for index, (key, snippet) in enumerate(self._used.items(), (used[0] or 0) + 1):
+            if snippet is None:
+                read.append((index, key))
+            else:
+                stored.append((key, json.dumps(snippet), index))
+        self._connection.executemany("UPDATE snippets SET used = ? WHERE key = ?", read)
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO snippets (key, snippet, used) VALUES (?, ?, ?)",
+            stored,
+        )
+
+        return self._connection.execute(
+            "DELETE FROM snippets WHERE key IN (SELECT key FROM snippets "
+            "ORDER BY used LIMIT max((SELECT COUNT(*) FROM snippets) - ?, 0))",
+            (self._config.limit,),
+        ).rowcount
+
+    def _load(self):
+        """Open the cache database and remove caches from other parsers."""
+
+        path = self._get_path()
+        if os.path.isdir(self._config.path):
+            for name in os.listdir(self._config.path):
+                extension = os.path.splitext(name)[1]
+                if extension in (".json", ".sqlite") and name != os.path.basename(path):
+                    try:
+                        os.remove(os.path.join(self._config.path, name))
+                    except OSError:
+                        pass
+        try:
+            if not os.path.isdir(self._config.path):
+                os.makedirs(self._config.path)
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            self._connection.execute(self.SCHEMA)
+            count = self._connection.execute("SELECT COUNT(*) FROM snippets")
+            self._logger.debug(
+                "parse cache: %s :has %d snippets", path, count.fetchone()[0]
+            )
+        except (OSError, sqlite3.Error) as error:
+            self._logger.debug("parse cache not read: %s :%s", path, error)
+            self._connection = None
+
+    def _get_path(self):
+        """Get database path for the parser version.
+
+        Returns:
+            str: Path to the cache database.
+        """
+
+        return os.path.join(self._config.path, self._config.version + ".sqlite")
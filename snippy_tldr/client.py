@@ -0,0 +1,468 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""client: HTTP client for GitHub requests."""
+
+import threading
+import time
+
+from email.utils import mktime_tz
+from email.utils import parsedate_tz
+
+import requests
+
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+try:
+    from urllib.parse import urlparse
+except ImportError:
+    from urlparse import urlparse
+
+from snippy.plugins import Cause
+
+
+class RateLimitError(Exception):
+    """GitHub API rate limit is exhausted."""
+
+
+class RetryPolicy(object):  # pylint: disable=too-few-public-methods
+    """Timeout and retry settings for HTTP requests.
+
+    The settings are the timeout in seconds for one request, the number of
+    retries for failed requests, the initial exponential backoff in seconds
+    between retries and the maximum delay in seconds before one retry.
+    """
+
+    def __init__(self, timeout=10.0, retries=3, backoff=0.5, max_wait=60.0):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_wait = max_wait
+
+
+class HttpClient(object):
+    """HTTP client for GitHub requests.
+
+    All GitHub requests from the plugin are sent through one client. The
+    client keeps a pool of persistent connections per host so that bulk
+    imports do not pay TCP and TLS handshakes for each tldr page.
+
+    Failed requests are retried with exponential backoff. The backoff is
+    overridden by the ``Retry-After`` header and by the ``X-RateLimit-Reset``
+    header when the GitHub API rate limit is exhausted. A request is not
+    retried if the server asks to wait longer than the ``max_wait`` seconds.
+    """
+
+    # HTTP status codes that are considered temporary failures.
+    RETRY_STATUS = (429, 500, 502, 503, 504)
+
+    def __init__(self, logger, pool=10, retry=None, cache=None, limiter=None):
+        self._logger = logger
+        self._cache = cache
+        self._limiter = limiter
+        self._retry = retry or RetryPolicy()
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool, pool_maxsize=pool)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    @property
+    def cache(self):
+        """HTTP response cache or None."""
+
+        return self._cache
+
+    @property
+    def limiter(self):
+        """Rate limit aware request scheduler or None."""
+
+        return self._limiter
+
+    def get(self, url, cache=True, **kwargs):
+        """Send HTTP GET request.
+
+        Args:
+            url (str): Requested URL.
+            cache (bool): Use the HTTP cache if it is enabled.
+            **kwargs: Optional arguments for the ``requests`` GET method.
+
+        Returns:
+            obj: Request package response object.
+        """
+
+        kwargs.setdefault("timeout", self._retry.timeout)
+        if self._cache is None or not cache or kwargs.get("stream", False):
+            return self._get(url, **kwargs)
+
+        key = requests.Request("GET", url, params=kwargs.get("params")).prepare().url
+        cached = self._cache.get(key)
+        if cached and self._cache.is_fresh(cached[0]):
+            self._cache.count("hits")
+            return self._get_cached_response(key, *cached)
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if cached:
+            if "ETag" in cached[0]["headers"]:
+                headers["If-None-Match"] = cached[0]["headers"]["ETag"]
+            if "Last-Modified" in cached[0]["headers"]:
+                headers["If-Modified-Since"] = cached[0]["headers"]["Last-Modified"]
+        resp = self._get(url, headers=headers, **kwargs)
+        if resp.status_code == 304 and cached:
+            self._cache.count("revalidations")
+            self._cache.touch(key, *cached)
+            return self._get_cached_response(key, *cached)
+
+        self._cache.count("misses")
+        if resp.status_code == 200:
+            self._cache.put(key, resp.headers, resp.content)
+
+        return resp
+
+    def _get(self, url, **kwargs):
+        """Send HTTP GET request with retries.
+
+        Args:
+            url (str): Requested URL.
+            **kwargs: Optional arguments for the ``requests`` GET method.
+
+        Returns:
+            obj: Request package response object.
+        """
+
+        attempt = 0
+        while True:
+            if self._limiter:
+                self._limiter.acquire(url)
+            try:
+                resp = self._session.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as error:
+                if attempt >= self._retry.retries:
+                    raise
+                delay = self._get_backoff(attempt)
+                self._logger.debug("request failed: %s :retry in %.2fs", error, delay)
+            else:
+                if self._limiter:
+                    self._limiter.update(url, resp)
+                delay = self._get_delay(resp, attempt)
+                if delay is None:
+                    return resp
+                self._logger.debug(
+                    "request %s failed with %s :retry in %.2fs",
+                    url,
+                    resp.status_code,
+                    delay,
+                )
+            time.sleep(delay)
+            attempt = attempt + 1
+
+    def is_error(self, http):
+        """Test if GitHub response was an error.
+
+        Args:
+            http (obj): Request package response object.
+
+        Returns:
+            bool: True in case of error response.
+        """
+
+        if http.status_code != 200:
+            if self.is_rate_limited(http):
+                Cause.push(Cause.HTTP_FORBIDDEN, "github api rate limit reached")
+            else:
+                Cause.push(
+                    Cause.HTTP_FORBIDDEN,
+                    "github api failure:  {}".format(http.status_code),
+                )
+            self._logger.debug(
+                "github api response %s with headers: %s"
+                % (http.status_code, http.headers)
+            )
+            return True
+
+        return False
+
+    def close(self):
+        """Close all pooled connections."""
+
+        self._session.close()
+
+    @staticmethod
+    def is_rate_limited(http):
+        """Test if GitHub response failed because of the API rate limit.
+
+        Args:
+            http (obj): Request package response object.
+
+        Returns:
+            bool: True if the rate limit is exhausted.
+        """
+
+        return http.headers.get("X-RateLimit-Remaining", "0") == "0"
+
+    @staticmethod
+    def _get_cached_response(url, meta, body):
+        """Create response object from cached response.
+
+        Args:
+            url (str): Requested URL with the query string.
+            meta (dict): Cached response metadata.
+            body (bytes): Cached response body.
+
+        Returns:
+            obj: Request package response object.
+        """
+
+        resp = requests.Response()
+        resp.status_code = 200
+        resp.url = url
+        resp.headers = CaseInsensitiveDict(meta["headers"])
+        resp.encoding = get_encoding_from_headers(resp.headers)
+        resp._content = body  # pylint: disable=protected-access
+
+        return resp
+
+    def _get_delay(self, http, attempt):
+        """Get delay before retrying the request.
+
+        Args:
+            http (obj): Request package response object.
+            attempt (int): Number of already failed attempts.
+
+        Returns:
+            float: Delay in seconds or None if the request is not retried.
+        """
+
+        if attempt >= self._retry.retries:
+            return None
+        limited = http.status_code == 403 and "X-RateLimit-Remaining" in http.headers
+        if http.status_code not in self.RETRY_STATUS and not limited:
+            return None
+        if limited and not self.is_rate_limited(http):
+            return None
+
+        delay = self._get_retry_after(http.headers.get("Retry-After"))
+        if delay is None and "X-RateLimit-Reset" in http.headers:
+            delay = max(0.0, float(http.headers["X-RateLimit-Reset"]) - time.time())
+        if delay is None:
+            delay = self._get_backoff(attempt)
+        if delay > self._retry.max_wait:
+            self._logger.debug("server requested too long retry delay: %.2fs", delay)
+            return None
+
+        return delay
+
+    def _get_backoff(self, attempt):
+        """Get exponential backoff delay.
+
+        Args:
+            attempt (int): Number of already failed attempts.
+
+        Returns:
+            float: Delay in seconds.
+        """
+
+        return min(self._retry.backoff * (2**attempt), self._retry.max_wait)
+
+    @staticmethod
+    def _get_retry_after(value):
+        """Parse the ``Retry-After`` header.
+
+        The header value is either delay in seconds or a HTTP date.
+
+        Args:
+            value (str): Value of the ``Retry-After`` header.
+
+        Returns:
+            float: Delay in seconds or None if the value cannot be parsed.
+        """
+
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            date = parsedate_tz(value)
+            if date:
+                return max(0.0, mktime_tz(date) - time.time())
+
+        return None
+
+
+class RateLimitWindow(object):  # pylint: disable=too-few-public-methods
+    """Rate limit window and token bucket for paced requests.
+
+    The window has the remaining requests and the reset time from the
+    latest GitHub API response. The token bucket holds at most ``burst``
+    tokens and it was last refilled at the ``updated`` time.
+    """
+
+    def __init__(self, burst):
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.time()
+        self.remaining = None
+        self.reset = 0.0
+
+
+class RateLimiter(object):
+    """Rate limit aware scheduler for GitHub requests.
+
+    The scheduler tracks the ``X-RateLimit-Remaining`` and ``X-RateLimit-Reset``
+    headers from all responses. Only hosts that send these headers are
+    scheduled which means that for example raw content requests are never
+    delayed.
+
+    Requests are paced with a token bucket. The bucket is refilled at the
+    rate that spreads the remaining requests over the time left until the
+    rate limit is reset. This allows short bursts like listing one branch
+    without delays but prevents long imports from hitting the limit in the
+    middle of the import.
+
+    When the rate limit is exhausted, the ``wait`` policy waits until the
+    rate limit is reset if the wait is shorter than ``max_wait`` seconds.
+    The ``fallback`` policy raises ``RateLimitError`` so that the caller can
+    use sources that are not rate limited.
+    """
+
+    WAIT = "wait"
+    FALLBACK = "fallback"
+
+    def __init__(self, logger, policy=WAIT, burst=10, max_wait=60.0):
+        self._logger = logger
+        self._policy = policy
+        self._max_wait = max_wait
+        self._lock = threading.Lock()
+        self._hosts = set()
+        self._window = RateLimitWindow(burst)
+        self.metrics = {
+            "requests": 0,
+            "paced": 0,
+            "waited": 0,
+            "wait_time": 0.0,
+            "exhausted": 0,
+        }
+
+    def acquire(self, url):
+        """Wait until a request to the URL can be sent.
+
+        Args:
+            url (str): Requested URL.
+
+        Raises:
+            RateLimitError: Rate limit is exhausted with the ``fallback`` policy.
+        """
+
+        if urlparse(url).netloc not in self._hosts:
+            return
+        with self._lock:
+            self.metrics["requests"] = self.metrics["requests"] + 1
+            now = time.time()
+            if self._window.remaining is not None and self._window.remaining <= 0:
+                if self._window.reset > now:
+                    self._wait_reset(self._window.reset - now)
+                    now = time.time()
+                self._window.remaining = None
+            delay = self._take(now)
+            if delay:
+                self.metrics["paced"] = self.metrics["paced"] + 1
+                self.metrics["wait_time"] = self.metrics["wait_time"] + delay
+                time.sleep(delay)
+            if self._window.remaining is not None:
+                self._window.remaining = self._window.remaining - 1
+
+    def update(self, url, http):
+        """Update rate limit from the response.
+
+        Args:
+            url (str): Requested URL.
+            http (obj): Request package response object.
+
+        Raises:
+            RateLimitError: Rate limit is exhausted with the ``fallback`` policy.
+        """
+
+        if "X-RateLimit-Remaining" not in http.headers:
+            return
+        try:
+            remaining = int(http.headers["X-RateLimit-Remaining"])
+            reset = float(http.headers.get("X-RateLimit-Reset", 0))
+        except ValueError:
+            return
+        with self._lock:
+            self._hosts.add(urlparse(url).netloc)
+            if reset != self._window.reset or self._window.remaining is None:
+                self._window.remaining = remaining
+                self._window.reset = reset
+            else:
+                self._window.remaining = min(self._window.remaining, remaining)
+            limited = remaining == 0 and http.status_code in (403, 429)
+            if limited and self._policy == self.FALLBACK:
+                self.metrics["exhausted"] = self.metrics["exhausted"] + 1
+                raise RateLimitError("github api rate limit reached")
+
+    def _wait_reset(self, wait):
+        """Wait until the rate limit is reset.
+
+        Args:
+            wait (float): Time in seconds until the rate limit is reset.
+
+        Raises:
+            RateLimitError: Rate limit is exhausted with the ``fallback`` policy.
+        """
+
+        self.metrics["exhausted"] = self.metrics["exhausted"] + 1
+        if self._policy == self.FALLBACK:
+            raise RateLimitError("github api rate limit reached")
+        if wait > self._max_wait:
+            self._logger.debug("rate limit reset in %.2fs is too long to wait", wait)
+            return
+        self._logger.debug("rate limit reached :wait %.2fs for reset", wait)
+        self.metrics["waited"] = self.metrics["waited"] + 1
+        self.metrics["wait_time"] = self.metrics["wait_time"] + wait
+        time.sleep(wait)
+
+    def _take(self, now):
+        """Take one token from the bucket.
+
+        Args:
+            now (float): Current time.
+
+        Returns:
+            float: Delay in seconds before the request can be sent.
+        """
+
+        window = self._window
+        if window.remaining is None:
+            return 0.0
+        rate = max(window.remaining, 1) / max(window.reset - now, 1.0)
+        window.tokens = min(window.burst, window.tokens + (now - window.updated) * rate)
+        window.updated = now
+        if window.tokens >= 1:
+            window.tokens = window.tokens - 1
+            return 0.0
+        delay = (1 - window.tokens) / rate
+        if delay > self._max_wait:
+            self._logger.debug("request pacing %.2fs is too long to wait", delay)
+            return 0.0
+        window.tokens = 0.0
+        window.updated = now + delay
+
+        return delay
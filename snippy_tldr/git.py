@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""git: Read tldr pages from a local git repository."""
+
+import subprocess
+import threading
+
+from snippy.plugins import Cause
+
+from snippy_tldr.github import GitHubPages
+from snippy_tldr.pages import TldrPages
+
+
+class GitRepository(object):
+    """Read files from the objects of a local git repository.
+
+    The repository can be a bare mirror or a clone with a working tree.
+    Files are read directly from the git objects of a branch, tag or commit
+    without checking them out. All files are read through one long running
+    ``git cat-file --batch`` process instead of starting a new process for
+    each file.
+    """
+
+    def __init__(self, logger, path, git="git"):
+        self._logger = logger
+        self._path = path
+        self._git = git
+        self._lock = threading.Lock()
+        self._process = None
+        self.blobs = {}
+
+    def resolve(self, ref):
+        """Resolve a branch, tag or commit to a commit SHA.
+
+        Args:
+            ref (str): Git branch, tag or commit.
+
+        Returns:
+            str: Commit SHA or None if the reference does not exist.
+        """
+
+        output = self._run("rev-parse", "--verify", "--quiet", ref + "^{commit}")
+        if not output:
+            return None
+
+        return output.decode("ascii").strip()
+
+    def get_pages(self, ref, metadata):
+        """Get all tldr pages from a branch, tag or commit.
+
+        The pages are listed from the given reference in the same order and
+        with the same GitHub raw links as the pages read from the GitHub
+        branch. The pages are read later from the git objects with the blob
+        SHA.
+
+        Args:
+            ref (str): Git branch, tag or commit.
+            metadata (PageMetadata): Metadata updated with the commit and blobs.
+
+        Returns:
+            dict: All tldr pages with GitHub raw URL.
+        """
+
+        commit = self.resolve(ref)
+        if not commit:
+            Cause.push(
+                Cause.HTTP_NOT_FOUND,
+                "git reference cannot be read: {} :from: {}".format(ref, self._path),
+            )
+            return {}
+        self._logger.debug(
+            "read tldr pages from git: %s :commit: %s", self._path, commit
+        )
+        metadata.source.update(branch=ref, commit=commit)
+        pages = self.list_pages(
+            commit, TldrPages.join_paths(GitHubPages.GITHUB_RAW, ref)
+        )
+        metadata.blobs.update(self.blobs)
+
+        return pages
+
+    def list_blobs(self, commit):
+        """List all files in a commit.
+
+        The files are listed in the git tree order. This is the same order
+        as the GitHub tree API uses.
+
+        Args:
+            commit (str): Commit SHA.
+
+        Returns:
+            list: File path and blob SHA tuples.
+        """
+
+        output = self._run("ls-tree", "-r", "-z", "--full-tree", commit)
+        if output is None:
+            return []
+        blobs = []
+        for entry in output.split(b"\0"):
+            if not entry:
+                continue
+            info, path = entry.split(b"\t", 1)
+            _, type_, sha = info.split(b" ")
+            if type_ == b"blob":
+                blobs.append((path.decode("utf-8"), sha.decode("ascii")))
+
+        return blobs
+
+    def list_pages(self, commit, raw):
+        """List all tldr pages in a commit.
+
+        The pages are listed in the same order and with the same GitHub raw
+        links as the pages read from the GitHub branch. The blob SHA of each
+        page is stored to read the page later from the git objects.
+
+        Args:
+            commit (str): Commit SHA.
+            raw (str): GitHub raw URL for the branch.
+
+        Returns:
+            dict: All tldr pages with GitHub raw URL.
+        """
+
+        pages = {}
+        for path, sha in self.list_blobs(commit):
+            path_ = TldrPages.split_path(path)
+            if not path_:
+                continue
+            translation, platform, _ = path_
+            uri = TldrPages.join_paths(raw, path)
+            pages.setdefault(translation, {}).setdefault(platform, []).append(uri)
+            self.blobs[uri] = sha
+
+        return pages
+
+    def read_page(self, uri):
+        """Read one tldr page listed from the repository.
+
+        Args:
+            uri (str): GitHub raw URL of the tldr page.
+
+        Returns:
+            str: The tldr page in a text string or None.
+        """
+
+        data = self.read(self.blobs[uri])
+
+        return None if data is None else data.decode("utf-8")
+
+    def read(self, sha):
+        """Read one blob.
+
+        Args:
+            sha (str): Blob SHA.
+
+        Returns:
+            bytes: Blob content or None if the blob cannot be read.
+        """
+
+        with self._lock:
+            try:
+                if self._process is None:
+                    self._process = (
+                        subprocess.Popen(  # pylint: disable=consider-using-with
+                            [self._git, "-C", self._path, "cat-file", "--batch"],
+                            stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE,
+                        )
+                    )
+                self._process.stdin.write(sha.encode("ascii") + b"\n")
+                self._process.stdin.flush()
+                header = self._process.stdout.readline().split()
+                if len(header) != 3 or header[1] != b"blob":
+                    self._logger.debug("git blob cannot be read: %s", sha)
+                    return None
+                size = int(header[2])
+                data = self._process.stdout.read(size + 1)[:size]
+            except (OSError, ValueError) as error:
+                self._logger.debug("git blob read failed: %s: %s", sha, error)
+                self._close()
+                return None
+
+        return data
+
+    def close(self):
+        """Stop the git object reader process."""
+
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        """Stop the git object reader process without locking."""
+
+        if self._process is None:
+            return
+        try:
+            self._process.stdin.close()
+            self._process.wait()
+            self._process.stdout.close()
+        except OSError as error:
+            self._logger.debug("git object reader stop failed: %s", error)
+        self._process = None
+
+    def _run(self, *args):
+        """Run a git command in the repository.
+
+        Args:
+            *args (str): Git command and arguments.
+
+        Returns:
+            bytes: Command output or None if the command failed.
+        """
+
+        command = [self._git, "-C", self._path] + list(args)
+        try:
+            process = subprocess.Popen(  # pylint: disable=consider-using-with
+                command, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+            )
+            output, error = process.communicate()
+        except OSError as error_:
+            self._logger.debug("git command failed: %s: %s", command, error_)
+            return None
+        if process.returncode:
+            self._logger.debug(
+                "git command failed: %s: %s", command, error.decode("utf-8", "replace")
+            )
+            return None
+
+        return output
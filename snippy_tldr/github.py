@@ -0,0 +1,527 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""github: Read tldr pages from GitHub."""
+
+import re
+
+from collections import namedtuple
+
+from snippy_tldr.cache import PageCache
+from snippy_tldr.pages import TldrPages
+
+# GitHub branch with the selected translations and platforms. The
+# translations are None when all translations are read from the branch.
+GitHubTree = namedtuple("GitHubTree", ("branch", "translations", "platforms"))
+
+
+class GitHubPages(object):
+    """List and read tldr pages from GitHub.
+
+    The tldr pages are listed with the GitHub API and read one by one from
+    the GitHub raw content. The git blob SHA and the size of each listed page
+    are stored to the page metadata. The blob SHA allows reading unchanged
+    pages from the page cache without requesting them from GitHub.
+    """
+
+    GITHUB_API = "https://api.github.com/repos/tldr-pages/tldr/"
+    GITHUB_RAW = "https://raw.githubusercontent.com/tldr-pages/tldr/"
+    GITHUB_ARCHIVE = "https://codeload.github.com/tldr-pages/tldr/tar.gz/"
+    GITHUB_COMPARE_LIMIT = 300
+
+    RE_MATCH_GITHUB_URL = re.compile(
+        r"""
+        http[s]?://github.com/tldr-pages/tldr/(tree|blob)/
+        """,
+        re.VERBOSE,
+    )
+
+    # A 'blob' URI should be always used with URIs pointing to a file. Someone
+    # may accidentally use a GitHub 'tree' URI with a tldr page. A 'tree' URL
+    # pointing to a tldr page is still accepted just to be flexible.
+    RE_CATCH_GITHUB_PAGE = re.compile(
+        r"""
+        (?:
+            raw.githubusercontent.com/tldr-pages/tldr  # GitHub raw content URL.
+            |                                          # or
+            tldr/(?:blob|tree)                         # GitHub blob (or tree) URL.
+        )/
+        (?P<branch>.*)/         # Catch branches like 'master' or 'waldyrious/alt-syntax'.
+        (?P<translation>.*)/    # Catch translations like 'pages' or 'pages.pt-BR'.
+        (?P<platform>.*)/       # Catch platform like 'common' or 'linux'.
+        (?P<page>.*[.]md)       # Catch tldr Markdown page.
+        """,
+        re.VERBOSE,
+    )
+
+    RE_CATCH_GITHUB_PLATFORM = re.compile(
+        r"""
+        (?:http[s]?://github.com/tldr-pages/tldr/(?:blob|tree))/  # GitHub URL.
+        (?P<branch>.*)/         # Catch branches like 'master' or 'waldyrious/alt-syntax'.
+        (?P<translation>.*)/    # Catch translations like 'pages' or 'pages.pt-BR'.
+        (?P<platform>%s)        # Catch platform like 'common' or 'linux'
+        (?:[/]?$)               # Match optional trailing slash and end of string.
+        """ % TldrPages.RE_MATCH_TLDR_PLATFORM,
+        re.VERBOSE,
+    )
+
+    RE_CATCH_GITHUB_TRANSLATION = re.compile(
+        r"""
+        (?:http[s]?://github.com/tldr-pages/tldr/(?:blob|tree))/  # GitHub  URL.
+        (?P<branch>.*)/         # Catch branches like 'master' or 'waldyrious/alt-syntax'.
+        (?P<translation>%s)     # Catch translations like 'pages' or 'pages.pt-BR'.
+        (?:[/]?$)               # Match optional trailing slash and end of string.
+        """ % TldrPages.RE_MATCH_TLDR_TRANSLATION,
+        re.VERBOSE,
+    )
+
+    RE_CATCH_GITHUB_BRANCH = re.compile(
+        r"""
+        (?:http[s]?://github.com/tldr-pages/tldr/(?:blob|tree))/  # GitHub  URL.
+        (?P<branch>.+?)         # Catch branches like 'master' or 'waldyrious/alt-syntax'.
+        (?:[/]?$)               # Match optional trailing slash and end of string.
+        """,
+        re.VERBOSE,
+    )
+
+    def __init__(self, logger, client, selector, metadata, cache=None):
+        self._logger = logger
+        self._client = client
+        self._selector = selector
+        self._metadata = metadata
+        self._cache = cache
+
+    def get_tree(self, uri):
+        """Get GitHub branch, translations and platforms from URI.
+
+        The URI may point to one platform, one translation or to a whole
+        branch in GitHub. A URI that points to a single page does not have
+        a tree. All translations are read from a branch when the
+        translations are not defined. The translations and platforms are
+        limited with the selector options.
+
+        Args:
+            uri (str): URI where the tldr pages are read.
+
+        Returns:
+            GitHubTree: Branch, translations and platforms or None.
+        """
+
+        match = self.RE_CATCH_GITHUB_PAGE.search(uri)
+        if match and match.group("page"):
+            return None
+
+        match = self.RE_CATCH_GITHUB_PLATFORM.search(uri)
+        if match and match.group("platform"):
+            self._logger.debug(
+                "read tldr pages from platform: %s :from branch: %s",
+                match.group("platform"),
+                match.group("branch"),
+            )
+            return GitHubTree(
+                match.group("branch"),
+                self._selector.select("translations", (match.group("translation"),)),
+                self._selector.select("platforms", (match.group("platform"),)),
+            )
+
+        match = self.RE_CATCH_GITHUB_TRANSLATION.search(uri)
+        if match and match.group("translation"):
+            self._logger.debug(
+                "read tldr pages from translation: %s :from branch: %s",
+                match.group("translation"),
+                match.group("branch"),
+            )
+            return GitHubTree(
+                match.group("branch"),
+                self._selector.select("translations", (match.group("translation"),)),
+                self._selector.select("platforms", TldrPages.TLDR_PLATFORMS),
+            )
+
+        match = self.RE_CATCH_GITHUB_BRANCH.search(uri)
+        if match:
+            self._logger.debug("read tldr pages from branch: %s", match.group("branch"))
+            return GitHubTree(
+                match.group("branch"),
+                None,
+                self._selector.select("platforms", TldrPages.TLDR_PLATFORMS),
+            )
+
+        return None
+
+    def get_page(self, uri):
+        """Get a single tldr page from URI.
+
+        Args:
+            uri (str): URI where the tldr pages are read.
+
+        Returns:
+            dict: The tldr page or None if the URI is not a GitHub page.
+        """
+
+        match = self.RE_CATCH_GITHUB_PAGE.search(uri)
+        if not match or not match.group("page"):
+            return None
+        self._logger.debug(
+            "read tldr page: %s :from branch: %s",
+            match.group("page"),
+            match.group("branch"),
+        )
+
+        return {match.group("translation"): {match.group("platform"): (uri,)}}
+
+    def get_pages(self, tree, state=None, recursive=False):
+        """Get tldr pages.
+
+        Method takes a list of translations and platforms to try to read all
+        the needed tldr pages with as less GitHub API requests as possible.
+
+        Args:
+            tree (GitHubTree): GitHub branch, translations and platforms.
+            state (SyncState): Sync state for incremental imports or None.
+            recursive (bool): List the pages with one recursive tree request.
+
+        Returns:
+            dict: Tldr pages under given translations and platforms.
+        """
+
+        def read_translations(url, data, pages):
+            """Read translations from the data.
+
+            Args:
+                url (str): URL to be added with translations, platforms and tldr pages.
+                data (dict): GitHub JSON dictionary for a branch translations.
+                pages (dict): Tldr pages stored under the branch.
+            """
+
+            if tree.translations is None:
+                translations_ = self._get_translations(data)
+            else:
+                translations_ = tree.translations
+            for translation in translations_:
+                url_ = TldrPages.join_paths(url, translation)
+                translation_url = next(
+                    entry for entry in data["tree"] if entry["path"] == translation
+                )["url"]
+                platform_data = self._client.get(translation_url).json()
+                pages[translation] = {}
+                read_platforms(url_, tree.platforms, platform_data, pages[translation])
+
+        def read_platforms(url, platforms, data, pages):
+            """Read platforms from the data.
+
+            Args:
+                url (str): URL to be added with platforms and tldr pages.
+                data (dict): GitHub JSON dictionary for a branch platforms.
+                pages (dict): Tldr pages stored under each platforms.
+            """
+
+            for platform in platforms:
+                pages[platform] = []
+                try:
+                    platform_url = next(
+                        entry for entry in data["tree"] if entry["path"] == platform
+                    )["url"]
+                    pages_data = self._client.get(platform_url).json()
+                    url_ = TldrPages.join_paths(url, platform)
+                    read_pages(url_, pages_data, pages[platform])
+                except StopIteration:
+                    pass
+
+        def read_pages(url, data, pages):
+            """Read tldr pages under the data
+
+            Args:
+                url (str): URL to be used with the read tldr pages.
+                data (dict): GitHub JSON dictionary for a branch tldr pages.
+                pages (dict): Tldr pages stored under a platform.
+            """
+
+            for entry in data["tree"]:
+                if entry["type"] == "blob" and entry["path"].endswith(".md"):
+                    pages.append(TldrPages.join_paths(url, entry["path"]))
+                    self._metadata.blobs[pages[-1]] = entry.get("sha")
+                    self._metadata.sizes[pages[-1]] = entry.get("size")
+
+        pages = {}
+        if not tree.platforms or tree.translations == ():
+            self._logger.debug("no tldr platforms or translations selected")
+            return pages
+        repo_url = TldrPages.join_paths(self.GITHUB_API, "branches")
+        repo_url = TldrPages.join_paths(repo_url, tree.branch)
+        resp = self._client.get(repo_url)
+        if self._client.is_error(resp):
+            return pages
+        data = resp.json()
+        self._metadata.source.update(branch=tree.branch, commit=data["commit"]["sha"])
+        branch_url = data["commit"]["commit"]["tree"]["url"]
+        url = TldrPages.join_paths(self.GITHUB_RAW, tree.branch)
+        if state:
+            changed = self._get_changed_pages(url, data["commit"]["sha"], tree, state)
+            if changed is not None:
+                return changed
+        if recursive:
+            resp = self._client.get(branch_url, params={"recursive": "1"})
+            if self._client.is_error(resp):
+                return pages
+            data = resp.json()
+            if not data.get("truncated", False):
+                return self._read_tree(url, data, tree)
+            self._logger.debug("recursive tree truncated, read trees one by one")
+        translations_data = self._client.get(branch_url).json()
+        read_translations(url, translations_data, pages)
+
+        return pages
+
+    def read(self, uri):
+        """Read a tldr page from GitHub.
+
+        The page is read from the page cache when the blob SHA of the page
+        is known and the page is in the cache. The HTTP cache is not used
+        for these pages because the page cache already stores the content
+        by the blob SHA.
+
+        Args:
+            uri (str): GitHub raw URL of the tldr page.
+
+        Returns:
+            str: The tldr page in a text string or None.
+        """
+
+        page = self._read_cached_page(uri)
+        if page is None:
+            self._logger.debug("request tldr page: %s", uri)
+            cache = not (self._cache and self._metadata.blobs.get(uri))
+            resp = self._client.get(uri, cache=cache)
+            page = None if self._client.is_error(resp) else resp.text
+            if page is not None:
+                self._cache_page(uri, resp.content)
+
+        return page
+
+    def _get_changed_pages(self, url, sha, tree, state):
+        """Get tldr pages changed since the previous import.
+
+        The last imported commit SHA is stored for each branch, translation
+        and platform combination. If the branch has moved, the GitHub compare
+        API returns the files changed between the commits. Only the added and
+        modified pages are imported and the deleted pages are reported with
+        the ``deleted`` attribute. The state is not saved if any page could
+        not be read. This reads the failed pages again in the next import.
+
+        Args:
+            url (str): GitHub raw URL for the branch.
+            sha (str): Current commit SHA of the branch.
+            tree (GitHubTree): GitHub branch, translations and platforms.
+            state (SyncState): Sync state for incremental imports.
+
+        Returns:
+            dict: Changed tldr pages or None if all pages must be read.
+        """
+
+        key = ":".join(
+            (
+                tree.branch,
+                ",".join(tree.translations or ("*",)),
+                ",".join(tree.platforms),
+            )
+        )
+        if self._selector.key():
+            key = key + ":" + self._selector.key()
+        previous = state.get("github", key)
+        state.set("github", key, sha)
+        if not previous:
+            return None
+        if previous == sha:
+            self._logger.debug("no changes in branch: %s :since: %s", tree.branch, sha)
+            return {}
+
+        compare_url = TldrPages.join_paths(self.GITHUB_API, "compare")
+        compare_url = TldrPages.join_paths(compare_url, "%s...%s" % (previous, sha))
+        resp = self._client.get(compare_url)
+        if resp.status_code != 200:
+            self._logger.debug("compare failed with %s, read all", resp.status_code)
+            return None
+        files = resp.json().get("files", [])
+        if len(files) >= self.GITHUB_COMPARE_LIMIT:
+            self._logger.debug("too many changed files to compare, read all")
+            return None
+        pages = self._read_changed_files(url, files, tree)
+        self._logger.debug(
+            "read %d changed files since commit: %s :deleted pages: %d",
+            len(files),
+            previous,
+            len(self._metadata.deleted),
+        )
+
+        return pages
+
+    def _read_changed_files(self, url, files, tree):
+        """Read tldr pages from the files in a GitHub compare response.
+
+        Args:
+            url (str): GitHub raw URL for the branch.
+            files (list): Changed files from the GitHub compare API.
+            tree (GitHubTree): GitHub branch, translations and platforms.
+
+        Returns:
+            dict: Added and modified tldr pages.
+        """
+
+        pages = {}
+        deleted = self._metadata.deleted
+        for file_ in files:
+            previous = file_.get("previous_filename")
+            if previous and self._get_tree_path(previous, tree):
+                deleted.append(TldrPages.join_paths(url, previous))
+            path = self._get_tree_path(file_["filename"], tree)
+            if not path:
+                continue
+            uri = TldrPages.join_paths(url, file_["filename"])
+            if file_["status"] == "removed":
+                deleted.append(uri)
+                continue
+            pages.setdefault(path[0], {}).setdefault(path[1], []).append(uri)
+            self._metadata.blobs[uri] = file_.get("sha")
+        for platforms in pages.values():
+            for uris in platforms.values():
+                uris.sort()
+
+        return pages
+
+    def _get_tree_path(self, filename, tree):
+        """Test if the file is a tldr page under the imported tree.
+
+        Args:
+            filename (str): File path in the GitHub branch.
+            tree (GitHubTree): GitHub branch, translations and platforms.
+
+        Returns:
+            list: Translation, platform and page name or None.
+        """
+
+        path = filename.split("/")
+        if len(path) != 3 or not path[2].endswith(".md"):
+            return None
+        if tree.translations is None:
+            if not TldrPages.RE_MATCH_TLDR_TRANSLATION_DIR.match(path[0]):
+                return None
+            if not self._selector.select("translations", (path[0],)):
+                return None
+        elif path[0] not in tree.translations:
+            return None
+
+        return path if path[1] in tree.platforms else None
+
+    def _read_tree(self, url, data, tree):
+        """Read tldr pages from a recursive GitHub tree.
+
+        The recursive tree response contains every object under the branch
+        with a full path like ``pages.it/linux/alpine.md``. The tldr pages are
+        picked from the paths without additional GitHub API requests.
+
+        Args:
+            url (str): GitHub raw URL for the branch.
+            data (dict): GitHub JSON dictionary for a recursive branch tree.
+            tree (GitHubTree): GitHub branch, translations and platforms.
+
+        Returns:
+            dict: Tldr pages under given translations and platforms.
+        """
+
+        pages = {}
+        paths = set(entry["path"] for entry in data["tree"] if entry["type"] == "tree")
+        translations = tree.translations
+        if translations is None:
+            translations = self._get_translations(data)
+        for translation in translations:
+            if translation in paths:
+                pages[translation] = {platform: [] for platform in tree.platforms}
+        for entry in data["tree"]:
+            path = entry["path"].split("/")
+            if entry["type"] != "blob" or len(path) != 3 or not path[2].endswith(".md"):
+                continue
+            translation, platform, _ = path
+            if translation in pages and platform in pages[translation]:
+                uri = TldrPages.join_paths(url, entry["path"])
+                pages[translation][platform].append(uri)
+                self._metadata.blobs[uri] = entry.get("sha")
+                self._metadata.sizes[uri] = entry.get("size")
+
+        return pages
+
+    def _get_translations(self, data):
+        """Get all translations from GitHub branch tree.
+
+        The translations are limited with the selector options.
+
+        Args:
+            data (dict): GitHub JSON dictionary for a branch tree.
+
+        Returns:
+            tuple: Translations in the same order as in the tree.
+        """
+
+        translations = tuple(
+            entry["path"]
+            for entry in data["tree"]
+            if entry["type"] == "tree"
+            and TldrPages.RE_MATCH_TLDR_TRANSLATION_DIR.match(entry["path"])
+        )
+
+        return self._selector.select("translations", translations)
+
+    def _read_cached_page(self, uri):
+        """Read tldr page from the page cache.
+
+        Args:
+            uri (str): GitHub raw URL of the tldr page.
+
+        Returns:
+            str: Cached tldr page in a text string or None.
+        """
+
+        sha = self._metadata.blobs.get(uri)
+        if not self._cache or not sha:
+            return None
+        data = self._cache.get(sha)
+        if data is None:
+            return None
+        self._logger.debug("read cached tldr page: %s", uri)
+
+        return data.decode("utf-8")
+
+    def _cache_page(self, uri, data):
+        """Store tldr page to the page cache.
+
+        The page is stored only if the content matches to the blob SHA in
+        the GitHub tree listing. The GitHub raw content is served through
+        a CDN that may return an older version of the page.
+
+        Args:
+            uri (str): GitHub raw URL of the tldr page.
+            data (bytes): Tldr page content.
+        """
+
+        sha = self._metadata.blobs.get(uri)
+        if not self._cache or not sha:
+            return
+        if PageCache.blob_sha(data) == sha:
+            self._cache.put(sha, data)
+        else:
+            self._logger.debug("tldr page does not match blob sha: %s", uri)
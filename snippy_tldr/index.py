@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""index: In-memory inverted index for parsed tldr examples."""
+
+import re
+
+from array import array
+from bisect import bisect_left
+
+from snippy.plugins import Const
+
+
+class ExampleIndex(object):
+    """Inverted index from command tokens and page names to examples.
+
+    Each example in the indexed records gets an integer identifier. The
+    record and the position of the example in the record ``data`` are stored
+    in compact integer arrays. The posting list for each command token and
+    page name is a compact array of example identifiers in ascending order.
+
+    Command tokens are the words and flags in the example commands without
+    the tldr ``{{placeholders}}``. A flag with a value like ``--depth=1`` is
+    indexed as ``--depth``. The page names are indexed with the ``name:``
+    prefix and they refer to all examples of the page.
+    """
+
+    NAME = "name:"
+
+    RE_MATCH_PLACEHOLDER = re.compile(r"\{\{.*?\}\}")
+    RE_CATCH_COMMAND_TOKEN = re.compile(r"[^\s|;&<>()=\"'`]+")
+
+    def __init__(self):
+        self._records = []
+        self._pages = array("I")
+        self._offsets = array("I")
+        self._postings = {}
+
+    def __len__(self):
+        """Return count of the indexed examples.
+
+        Returns:
+            int: Number of indexed examples.
+        """
+
+        return len(self._pages)
+
+    def add(self, record):
+        """Add a record to the index.
+
+        Args:
+            record (TldrRecord): Parsed tldr page in a compact record.
+        """
+
+        page = len(self._records)
+        self._records.append(record)
+        example = len(self._pages)
+        for offset, data in enumerate(record.data):
+            self._pages.append(page)
+            self._offsets.append(offset)
+            command = data.partition(Const.SNIPPET_COMMENT)[0]
+            command = self.RE_MATCH_PLACEHOLDER.sub(" ", command)
+            for token in self.RE_CATCH_COMMAND_TOKEN.findall(command):
+                self._post(token, example + offset)
+        for example_ in range(example, len(self._pages)):
+            self._post(self.NAME + record.name, example_)
+
+    def query(self, *terms):
+        """Find examples that match all terms.
+
+        The examples in the shortest posting list are searched from the other
+        posting lists with a binary search.
+
+        Args:
+            *terms (str): Command tokens or page names with the ``name:`` prefix.
+
+        Returns:
+            list: Page name and example tuples in the indexed order.
+        """
+
+        if not terms:
+            return []
+        postings = sorted((self._postings.get(term, ()) for term in terms), key=len)
+        examples = postings[0]
+        for posting in postings[1:]:
+            examples = [
+                example for example in examples if self._contains(posting, example)
+            ]
+        results = []
+        for example in examples:
+            record = self._records[self._pages[example]]
+            results.append((record.name, record.data[self._offsets[example]]))
+
+        return results
+
+    @staticmethod
+    def _contains(posting, example):
+        """Test if a sorted posting list contains an example.
+
+        Args:
+            posting (array): Posting list in ascending order.
+            example (int): Example identifier.
+
+        Returns:
+            bool: True if the example is in the posting list.
+        """
+
+        i = bisect_left(posting, example)
+
+        return i < len(posting) and posting[i] == example
+
+    def _post(self, term, example):
+        """Add an example to the posting list of a term.
+
+        Args:
+            term (str): Command token or page name.
+            example (int): Example identifier.
+        """
+
+        posting = self._postings.get(term)
+        if posting is None:
+            self._postings[term] = array("I", (example,))
+        elif posting[-1] != example:
+            posting.append(example)
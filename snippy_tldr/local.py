@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""local: Read tldr pages from a local path."""
+
+import os
+import os.path
+import time
+
+from collections import OrderedDict
+
+try:
+    from os import scandir
+except ImportError:
+    from scandir import scandir
+
+from snippy_tldr.cache import PageCache
+from snippy_tldr.pages import TldrPages
+
+
+class LocalPages(object):
+    """Walk, read and watch local tldr pages.
+
+    The local path can be a tldr page, platform, translation or a directory
+    like the tldr repository root that contains translations. The directories
+    are read with ``scandir`` which provides the file type without separate
+    ``stat`` calls.
+    """
+
+    def __init__(self, logger):
+        self._logger = logger
+
+    def read(self, path):
+        """Read a local tldr page.
+
+        Args:
+            path (str): Path where the tldr file is read.
+
+        Returns:
+            str: The tldr page in a text string.
+        """
+
+        with open(path, "r") as infile:
+            self._logger.debug("read tldr page: %s", path)
+
+            return infile.read()
+
+    def stat(self, uri):
+        """Read size and modification time of local tldr pages.
+
+        Args:
+            uri (str): Path where the tldr pages are read.
+
+        Returns:
+            OrderedDict: Size, modification time and platform for each page.
+        """
+
+        pages = OrderedDict()
+        for path, _, platform in self.walk(uri):
+            try:
+                stat = os.stat(path)
+            except OSError as error:
+                self._logger.debug("failed to stat: %s :%s", path, error)
+                continue
+            pages[path] = (stat.st_size, self.get_mtime_ns(stat), platform)
+
+        return pages
+
+    def watch(self, uri, snapshot, options, parser):
+        """Poll local tldr pages and yield debounced changes.
+
+        The local path is polled with the ``interval`` option. Changes are
+        read only after the pages have not changed for the ``debounce`` time.
+        A page that cannot be read is read again in the next poll.
+
+        Args:
+            uri (str): Path where the tldr pages are read.
+            snapshot (dict): Local tldr pages when the watch started.
+            options (dict): Plugin options with ``interval`` and ``debounce``.
+            parser (TldrParser): Parser for the changed tldr pages.
+
+        Returns:
+            generator: Tuples of changed snippets and deleted page paths.
+        """
+
+        current = snapshot
+        changed = None
+        while True:
+            time.sleep(options["interval"])
+            pages = self.stat(uri)
+            now = time.time()
+            if pages != current:
+                current = pages
+                changed = now
+                continue
+            if changed is None or now - changed < options["debounce"]:
+                continue
+            changed = None
+            modified = [
+                (path, pages[path][2])
+                for path in pages
+                if snapshot.get(path) != pages[path]
+            ]
+            deleted = tuple(path for path in snapshot if path not in pages)
+            snippets, failed = self._read_changed(modified, parser)
+            snapshot = OrderedDict(
+                (path, pages[path]) for path in pages if path not in failed
+            )
+            if failed:
+                changed = now
+            if len(modified) == len(failed) and not deleted:
+                continue
+            self._logger.debug(
+                "watch read %d changed tldr pages :deleted pages: %d",
+                len(modified) - len(failed),
+                len(deleted),
+            )
+            yield snippets, deleted
+
+    def _read_changed(self, pages, parser):
+        """Read changed local tldr pages in the watch mode.
+
+        A page that cannot be read does not stop the watch. The failed pages
+        are returned so that they can be read again in the next poll.
+
+        Args:
+            pages (list): List of tldr page path and platform tuples.
+            parser (TldrParser): Parser for the changed tldr pages.
+
+        Returns:
+            tuple: List of changed snippets and a set of failed page paths.
+        """
+
+        snippets = []
+        failed = set()
+        for path, platform in pages:
+            try:
+                snippet = parser.parse(path, "", platform, self.read(path))
+            except (IOError, OSError, UnicodeDecodeError) as error:
+                self._logger.debug("failed to read: %s :%s", path, error)
+                failed.add(path)
+                continue
+            if snippet:
+                snippets.append(snippet)
+        snippets = [record.to_dict() for record in parser.validate_snippets(snippets)]
+
+        return snippets, failed
+
+    def walk(self, uri):
+        """Walk local tldr pages.
+
+        The path can be a tldr page, platform, translation or a directory
+        like the tldr repository root that contains translations. The
+        translation and platform are read from the directory names. Pages
+        are yielded in the order of translation, platform and page names.
+
+        The platform is needed for the ``groups`` and ``tags`` attributes. If
+        the path does not contain the tldr platform, it cannot be read from
+        the Markdown page and the value is not stored. Examples of paths:
+
+        1. /path/to/tldr/pages/linux/
+        2. ./tldr/pages/linux/alpine.md
+        3. ./tldr/pages.it/linux/alpine.md
+        4. ../tldr/pages.pt-BR/linux/alpine.md
+        5. ./pages/linux/
+        6. ./alpine.md
+        7. alpine.md
+
+        Args:
+            uri (str): Path where the tldr pages are read.
+
+        Returns:
+            generator: Tldr page path, translation and platform tuples.
+        """
+
+        is_translation = TldrPages.RE_MATCH_TLDR_TRANSLATION_DIR.match
+        path = os.path.abspath(uri)
+        name = os.path.basename(path)
+        parent = os.path.basename(os.path.dirname(path))
+        if os.path.isfile(uri):
+            yield (uri,) + self._get_page_directories(path)
+            return
+
+        if name in TldrPages.TLDR_PLATFORMS:
+            translation = parent if is_translation(parent) else None
+            for page in self._walk_platform(uri):
+                yield page, translation, name
+            return
+
+        entries = self._scan_directory(uri)
+        translations = self._get_translations(uri, entries)
+        if not translations:
+            translations = [(None, uri)]
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(".md"):
+                    yield entry.path, None, None
+        for translation, directory in translations:
+            if directory != uri:
+                entries = self._scan_directory(directory)
+            for entry in entries:
+                if entry.is_dir() and entry.name in TldrPages.TLDR_PLATFORMS:
+                    for page in self._walk_platform(entry.path):
+                        yield page, translation, entry.name
+
+    @staticmethod
+    def _get_page_directories(path):
+        """Get translation and platform of a local tldr page.
+
+        Args:
+            path (str): Absolute path to the tldr page.
+
+        Returns:
+            tuple: Translation and platform or None for each unknown value.
+        """
+
+        platform = os.path.basename(os.path.dirname(path))
+        translation = os.path.basename(os.path.dirname(os.path.dirname(path)))
+        if platform not in TldrPages.TLDR_PLATFORMS:
+            return None, None
+        if not TldrPages.RE_MATCH_TLDR_TRANSLATION_DIR.match(translation):
+            return None, platform
+
+        return translation, platform
+
+    @staticmethod
+    def _get_translations(uri, entries):
+        """Get translation directories under a local directory.
+
+        Args:
+            uri (str): Path to the local directory.
+            entries (list): Directory entries under the path.
+
+        Returns:
+            list: Translation name and directory path tuples.
+        """
+
+        name = os.path.basename(os.path.abspath(uri))
+        if TldrPages.RE_MATCH_TLDR_TRANSLATION_DIR.match(name):
+            return [(name, uri)]
+
+        return [
+            (entry.name, entry.path)
+            for entry in entries
+            if entry.is_dir()
+            and TldrPages.RE_MATCH_TLDR_TRANSLATION_DIR.match(entry.name)
+        ]
+
+    @staticmethod
+    def get_blob_sha(path):
+        """Calculate git blob SHA of a local tldr page.
+
+        Args:
+            path (str): Path to the tldr page.
+
+        Returns:
+            str: Git blob SHA1 in a hex string.
+        """
+
+        with open(path, "rb") as infile:
+            return PageCache.blob_sha(infile.read())
+
+    @staticmethod
+    def get_mtime_ns(stat):
+        """Get file modification time in nanoseconds.
+
+        Args:
+            stat (obj): Result from ``os.stat``.
+
+        Returns:
+            int: Modification time in nanoseconds.
+        """
+
+        mtime = getattr(stat, "st_mtime_ns", None)
+        if mtime is None:
+            mtime = int(stat.st_mtime * 1000000000)
+
+        return mtime
+
+    def _walk_platform(self, path):
+        """Walk local tldr pages under one platform.
+
+        Args:
+            path (str): Path to the tldr platform directory.
+
+        Returns:
+            generator: Tldr page paths.
+        """
+
+        for entry in self._scan_directory(path):
+            if entry.is_file() and entry.name.endswith(".md"):
+                yield entry.path
+
+    def _scan_directory(self, path):
+        """Read local directory entries sorted by name.
+
+        Args:
+            path (str): Path to the directory.
+
+        Returns:
+            list: Directory entries.
+        """
+
+        try:
+            entries = list(scandir(path))
+        except OSError as error:
+            self._logger.debug("failed to read directory: %s :%s", path, error)
+            return []
+        entries.sort(key=lambda entry: entry.name)
+
+        return entries
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""pages: Layout of tldr pages in translations and platforms."""
+
+import os
+import re
+
+try:
+    from urllib.parse import urljoin
+    from urllib.parse import urlparse
+except ImportError:
+    from urlparse import urljoin, urlparse
+
+
+class TldrPages(object):
+    """Layout of tldr pages.
+
+    The tldr pages are stored in translation directories like ``pages`` and
+    ``pages.it``. Each translation has platform directories like ``linux``
+    and ``osx`` with one Markdown file for each page. The page index is a
+    dictionary of translations that contains a dictionary of platforms with
+    a list of GitHub raw links or local paths of the pages.
+    """
+
+    TLDR_PLATFORMS = ("common", "linux", "osx", "sunos", "windows")
+    TLDR_TRANSLATION = "pages"
+
+    # Match examples like 'pages', 'pages.pt-BR' and 'pages.it'.
+    RE_MATCH_TLDR_TRANSLATION = r"pages(?:\.[a-zA-Z0-9-]+)?"
+
+    # Match a translation directory name like 'pages.it' and nothing else.
+    RE_MATCH_TLDR_TRANSLATION_DIR = re.compile(r"^%s$" % RE_MATCH_TLDR_TRANSLATION)
+
+    # Match all known tldr platforms.
+    RE_MATCH_TLDR_PLATFORM = r"%s" % "|".join(TLDR_PLATFORMS)
+
+    @classmethod
+    def split_path(cls, path):
+        """Split a tldr page path to the translation, platform and page.
+
+        Args:
+            path (str): Relative path like ``pages.it/linux/alpine.md``.
+
+        Returns:
+            tuple: Translation, platform and page or None if not a tldr page.
+        """
+
+        path_ = path.split("/")
+        if len(path_) != 3 or not path_[2].endswith(".md"):
+            return None
+        if path_[1] not in cls.TLDR_PLATFORMS:
+            return None
+        if not cls.RE_MATCH_TLDR_TRANSLATION_DIR.match(path_[0]):
+            return None
+
+        return tuple(path_)
+
+    @staticmethod
+    def count(pages):
+        """Count tldr pages in the page index.
+
+        Args:
+            pages (dict): Tldr pages in translations and platforms.
+
+        Returns:
+            tuple: Number of pages, translations and platforms.
+        """
+
+        count = 0
+        platforms = 0
+        for translation in pages:
+            for platform in pages[translation]:
+                platforms = platforms + 1
+                count = count + len(pages[translation][platform])
+
+        return count, len(pages), platforms
+
+    @staticmethod
+    def join_paths(uri, path_object):
+        """Join URI or path to an object.
+
+        Args:
+            uri (str): URI or path base.
+            path_object (str): Path object to be added to the URI.
+
+        Returns:
+            str: Joined URI or path.
+        """
+
+        if "http" in urlparse(uri).scheme:
+            uri_ = uri
+            if not uri_.endswith("/"):
+                uri_ = uri_ + "/"
+            path = urljoin(uri_, path_object)
+        else:
+            path = os.path.join(uri, path_object)
+
+        return path
+
+
+class PageMetadata(object):  # pylint: disable=too-few-public-methods
+    """Metadata of the listed tldr pages.
+
+    The page sources store the git blob SHA and the size of the listed pages
+    when they are known. The source metadata contains the ``uri`` and, when
+    they are known, the ``branch``, ``commit`` and ``translations`` of the
+    imported pages. Pages deleted since the previous import are known only
+    in incremental imports.
+    """
+
+    def __init__(self, uri):
+        self.blobs = {}
+        self.sizes = {}
+        self.source = {"uri": uri}
+        self.deleted = []
@@ -0,0 +1,695 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""parser: Parse tldr pages to snippets."""
+
+import hashlib
+import inspect
+import re
+import time
+
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool
+
+from snippy.plugins import Const
+from snippy.plugins import Parser
+
+from snippy_tldr.local import LocalPages
+from snippy_tldr.record import TldrRecord
+from snippy_tldr.schema import SnippetValidator
+
+
+class TldrParser(object):
+    """Parse and validate tldr pages.
+
+    The ``lines`` parser reads a tldr page in one pass and the ``regex``
+    parser uses regular expressions for each field. The parsed snippets
+    are cached with the parse cache and validated in batches against the
+    Snippy JSON schema when the cache and the validator are given.
+    """
+
+    PARSER_LINES = "lines"
+    PARSER_REGEX = "regex"
+
+    # Largest page in characters parsed with the ``regex`` parser. A match
+    # cannot be interrupted so larger pages are parsed with the ``lines``
+    # parser that reads the page in linear time.
+    PARSER_REGEX_SIZE = 64 * 1024
+
+    # Methods that parse a tldr page. The source code of these methods is
+    # part of the parser version that invalidates the parse cache.
+    PARSER_METHODS = (
+        "parse_page",
+        "_read_tldr_lines",
+        "_read_tldr_examples",
+        "_parse_tldr_regex",
+        "_read_tldr_data",
+        "_read_tldr_brief",
+        "_read_tldr_description",
+        "_read_tldr_name",
+        "_format_list",
+        "_format_brief",
+        "_format_description",
+        "_limit_string",
+    )
+
+    # The tldr page regular expressions do not overlap with themselves or
+    # with each other. This keeps the backtracking linear to the page size.
+    RE_CATCH_TLDR_HEADER = re.compile(
+        r"""
+        (?<![\#])[\#]+\s+  # Match Markdown headers token from the first hash.
+        (?P<header>\S+)    # Catch the header.
+        """,
+        re.VERBOSE,
+    )
+
+    RE_CATCH_TLDR_DESCRIPTION = re.compile(
+        r"""
+        ^[\#]+[^\S\n][^\n]*\n          # Match header line.
+        (?:[^\S\n]*\n)+                # Match empty lines after the header.
+        [>]{1}[^\S\n]+                 # Match Markdown quote before description.
+        (?P<description>(?:\S[^\n]*)?  # Catch description until an empty line.
+        (?:\n[^\S\n]*\S[^\n]*)*)
+        \n[^\S\n]*\n                   # Match one empty line after the description.
+        """,
+        re.MULTILINE | re.VERBOSE,
+    )
+
+    RE_CATCH_TLDR_SNIPPETS = re.compile(
+        r"""
+        ^[\#]+[^\S\n][^\n]*\n                       # Match header line.
+        (?:[^\S\n]*\n)+                             # Match empty lines.
+        [>]{1}[^\S\n]+(?:\S[^\n]*)?                 # Match description.
+        (?:\n[^\S\n]*\S[^\n]*)*\n[^\S\n]*\n         # Match description lines and empty line.
+        (?P<snippets>.*)                            # Catch tldr man page snippets.
+        """,
+        re.DOTALL | re.MULTILINE | re.VERBOSE,
+    )
+
+    RE_SPLIT_TLDR_SNIPPET = re.compile(
+        r"""
+        \n{2}(?=[-]{1}\s{1}\S)  # Split before next snippet marked by list token.
+        """,
+        re.VERBOSE,
+    )
+
+    RE_CATCH_TLDR_SNIPPET_COMMAND = re.compile(
+        r"""
+        [-]{1}[^\S\n]+         # Match first Markdown list token.
+        (?P<comment>[^\n]*)\n  # Catch one line comment.
+        \s+[`]                 # Match whitespaces and the first backtick before the command.
+        (?P<command>[^\n]*)    # Catch one line command.
+        [`]                    # Match the backtick after the command.
+        """,
+        re.VERBOSE,
+    )
+
+    RE_MATCH_STRING_LAST_COLUMN = re.compile(
+        r"""
+        [:]{1}$  # Match optional last column in multiline string.
+        """,
+        re.MULTILINE | re.VERBOSE,
+    )
+
+    RE_MATCH_MKDN_BLOCK_QUOTE_TOKEN = re.compile(
+        r"""
+        \n[>]{1}  # Match Markdown block quote after newline.
+        """,
+        re.MULTILINE | re.VERBOSE,
+    )
+
+    RE_CATCH_FIRST_SENTENCE = re.compile(
+        r"""
+        ^(?P<sentence>.*?[\.!?])  # Match the first sentence.
+        """,
+        re.MULTILINE | re.VERBOSE,
+    )
+
+    def __init__(self, logger, options, cache=None, validator=None):
+        self._logger = logger
+        self._options = options
+        self._platforms = {}
+        self.cache = cache
+        self.validator = validator
+        self.state = ParseState()
+
+    def parse(self, uri, source, platform, page):
+        """Parse a tldr page to a snippet.
+
+        Args:
+            uri (str): URI or path where the tldr file was read.
+            source (str): A link where the tldr man page was read.
+            platform (str): Platform where the page is stored.
+            page (str): A tldr man page in a text string or None.
+
+        Returns:
+            dict: Parsed snippet or None if the page could not be parsed.
+        """
+
+        if page is None:
+            self._logger.debug("failed to read tldr man page: %s", uri)
+            self.state.failed.append(uri)
+            return None
+        if self._options["max_size"] and len(page) > self._options["max_size"]:
+            self._logger.debug(
+                "skipped tldr man page: %s :size: %d :limit: %d",
+                uri,
+                len(page),
+                self._options["max_size"],
+            )
+            self.state.skipped.append(uri)
+            return None
+        key = None
+        if self.cache:
+            key = self.cache.key(page, platform, source)
+            snippet = self.cache.get(key)
+            if snippet:
+                return snippet
+        start = time.time()
+        snippet = self.parse_page(source, platform, page)
+        elapsed = time.time() - start
+        if self._options["max_time"] and elapsed > self._options["max_time"]:
+            self._logger.debug(
+                "skipped tldr man page: %s :time: %.3fs :limit: %.3fs",
+                uri,
+                elapsed,
+                self._options["max_time"],
+            )
+            self.state.skipped.append(uri)
+            return None
+        if not snippet:
+            self._logger.debug("failed to parse tldr man page: %s :from: %s", uri, page)
+            return None
+        if key:
+            self.cache.put(key, snippet)
+
+        return snippet
+
+    def validate_snippets(self, snippets):
+        """Validate parsed snippets in batches.
+
+        Args:
+            snippets (iterable): Parsed snippets.
+
+        Returns:
+            generator: Valid snippets in compact records.
+        """
+
+        batch = []
+        for snippet in snippets:
+            batch.append(snippet)
+            if len(batch) >= self._options["batch"]:
+                for snippet_, valid in zip(batch, self.validate(batch)):
+                    if valid:
+                        yield TldrRecord(snippet_)
+                batch = []
+        for snippet_, valid in zip(batch, self.validate(batch)):
+            if valid:
+                yield TldrRecord(snippet_)
+
+    def validate(self, snippets):
+        """Validate a batch of parsed snippets against the Snippy JSON schema.
+
+        Args:
+            snippets (list): Parsed snippets.
+
+        Returns:
+            list: True for each valid snippet and False for invalid snippet.
+        """
+
+        if not self.validator:
+            return [True] * len(snippets)
+        valid = self.validator.validate(snippets)
+        for snippet, valid_ in zip(snippets, valid):
+            if not valid_:
+                self._logger.debug("invalid tldr man page: %s", snippet)
+                self.state.invalid = self.state.invalid + 1
+
+        return valid
+
+    def parse_local(self, pages, processes):
+        """Read and parse local tldr pages in worker processes.
+
+        The pages are sent to the workers in batches and the workers return
+        the parsed and validated snippets in compact records. At most two
+        batches per worker are submitted ahead of the consumed batch which
+        keeps the memory bounded when the records are consumed slowly. The
+        batches are consumed in the same order as the pages were given.
+
+        Args:
+            pages (list): List of tldr page path, platform and text tuples.
+            processes (int): Number of worker processes.
+
+        Returns:
+            generator: Parsed snippets in compact records.
+        """
+
+        def submit(count):
+            """Submit batches of tldr pages to the worker processes."""
+
+            for _ in range(count):
+                batch = list(islice(queue, size))
+                if not batch:
+                    return
+                window.append(pool.apply_async(_parse_tldr_batch, (batch,)))
+
+        size = max(self._options["batch"], 1)
+        self._logger.debug(
+            "parse %d tldr pages with %d processes", len(pages), processes
+        )
+        pool = Pool(  # pylint: disable=consider-using-with
+            processes,
+            initializer=_init_parse_worker,
+            initargs=(self._logger, self._options),
+        )
+        queue = iter(pages)
+        window = deque()
+        try:
+            submit(processes * 2)
+            while window:
+                records, skipped, invalid = window.popleft().get()
+                submit(1)
+                self.state.skipped.extend(skipped)
+                self.state.invalid = self.state.invalid + invalid
+                for record in records:  # pylint: disable=use-yield-from
+                    yield record
+        finally:
+            pool.close()
+            pool.join()
+
+    @classmethod
+    def get_version(cls, logger, parser):
+        """Get fingerprint of the tldr page parser.
+
+        The fingerprint is calculated from the selected parser, regular
+        expressions and the source code of the parser methods and the
+        Snippy parser modules. Any change in the parser code changes the
+        fingerprint.
+
+        Args:
+            logger (obj): Logger.
+            parser (str): Selected tldr page parser.
+
+        Returns:
+            str: Parser fingerprint or None if the source code is not available.
+        """
+
+        version = hashlib.sha1(parser.encode("utf-8"))
+        for name in sorted(vars(cls)):
+            if name.startswith("RE_") and hasattr(getattr(cls, name), "pattern"):
+                version.update(getattr(cls, name).pattern.encode("utf-8"))
+        module = inspect.getmodule(Parser)
+        try:
+            for method in cls.PARSER_METHODS:
+                version.update(inspect.getsource(getattr(cls, method)).encode("utf-8"))
+            for object_ in (module, getattr(module, "SnippyParser", module)):
+                version.update(
+                    inspect.getsource(inspect.getmodule(object_)).encode("utf-8")
+                )
+        except (IOError, OSError, TypeError) as error:
+            logger.debug("parser version not read: %s", error)
+            return None
+
+        return version.hexdigest()
+
+    def parse_page(self, source, platform, page):
+        """Parse and validate one tldr man page.
+
+        The method parses and validates one tldr man page to a snippet
+        data structure for the Snippy tool.
+
+        Args:
+            source (str): A link where the tldr man page was read.
+            platform (str, tuple): Platform or platforms where the tldr page belongs.
+            page (str): A tldr man page in a text string.
+
+        Returns:
+            dict: Validated JSON structure from a tldr man page.
+        """
+
+        if self._options["parser"] == self.PARSER_REGEX:
+            if len(page) <= self.PARSER_REGEX_SIZE:
+                return self._parse_tldr_regex(source, platform, page)
+            self._logger.debug(
+                "parse tldr man page with lines parser: %s :size: %d :limit: %d",
+                source,
+                len(page),
+                self.PARSER_REGEX_SIZE,
+            )
+
+        name, description, examples = self._read_tldr_lines(page)
+        data = []
+        for comment, command in examples:
+            if comment.endswith(":"):
+                comment = comment[:-1] + "."
+            data.append(command + Const.SNIPPET_COMMENT + comment)
+        if not data:
+            self._logger.debug("parser did not find tldr snippets at all: %s", page)
+
+        snippet = {}
+        snippet["category"] = Const.SNIPPET
+        snippet["data"] = Parser.format_data(Const.SNIPPET, data)
+        snippet["brief"] = Parser.format_brief(
+            Const.SNIPPET, self._format_brief(description)
+        )
+        snippet["description"] = Parser.format_description(Const.SNIPPET, description)
+        snippet["name"] = Parser.format_name(Const.SNIPPET, name)
+        if platform not in self._platforms:
+            self._platforms[platform] = (
+                Parser.format_groups(Const.SNIPPET, platform),
+                Parser.format_tags(Const.SNIPPET, platform),
+            )
+        groups, tags = self._platforms[platform]
+        snippet["groups"] = list(groups)
+        snippet["tags"] = list(tags)
+        snippet["links"] = Parser.format_links(Const.SNIPPET, source)
+        snippet["source"] = source
+
+        return snippet
+
+    def _read_tldr_lines(self, tldr):
+        """Read tldr man page header, description and examples in one pass.
+
+        The page is tokenized line by line. The header is the first Markdown
+        header line, the description is the first block quote after empty
+        lines and the examples are list items followed by a command in
+        backticks. The description is read only when it is followed by an
+        empty line. The results match the ``regex`` parser for well-formed
+        pages and for the malformed and adversarial pages in the tests, but
+        the parsers may differ on other malformed pages.
+
+        Args
+            tldr (str): A tldr snippet in a text string.
+
+        Returns:
+            tuple: The name, description and a list of comment and command pairs.
+        """
+
+        name = ""
+        description = []
+        section = 0  # Header and description.
+        empty = False
+        lines = tldr.split("\n")
+        if not lines[-1]:
+            lines.pop()  # The last newline does not start an empty line.
+        for index, line in enumerate(lines):
+            if not line or line.isspace():
+                if section == 1:
+                    examples = self._read_tldr_examples(lines[index + 1 :])
+                    return name, "".join(description), examples
+                empty = True
+                continue
+            if section == 1:
+                description.append(line[1:] if line[0] == ">" else "\n" + line)
+            elif not name:
+                header = line.lstrip("#") if line[0] == "#" else ""
+                if header[:1].isspace() and header.strip():
+                    name = header.split(None, 1)[0]
+            elif empty and line[0] == ">" and line[1:2].isspace():
+                description.append(line[1:].lstrip())
+                section = 1
+            else:
+                break
+            empty = False
+
+        return name, "", []
+
+    @staticmethod
+    def _read_tldr_examples(lines):
+        """Read tldr man page examples after the description.
+
+        Args
+            lines (list): Lines after the empty line that ends the description.
+
+        Returns:
+            list: Comment and command pairs.
+        """
+
+        examples = []
+        comment = None
+        empty = True
+        for line in lines:
+            if not line:
+                empty = True
+                continue
+            if empty and line[0] == "-" and line[1:2].isspace() and line[2:3].strip():
+                comment = line[1:].lstrip()
+            elif comment is not None:
+                command = line.lstrip()
+                end = command.rfind("`")
+                if (empty or line[0].isspace()) and command[:1] == "`" and end > 0:
+                    examples.append((comment, command[1:end]))
+                comment = None
+            empty = False
+
+        return examples
+
+    def _parse_tldr_regex(self, source, platform, page):
+        """Parse one tldr man page with regular expressions.
+
+        Args:
+            source (str): A link where the tldr man page was read.
+            platform (str, tuple): Platform or platforms where the tldr page belongs.
+            page (str): A tldr man page in a text string.
+
+        Returns:
+            dict: Validated JSON structure from a tldr man page.
+        """
+
+        snippet = {}
+        snippet["category"] = Const.SNIPPET
+        snippet["data"] = self._read_tldr_data(page)
+        snippet["brief"] = self._read_tldr_brief(page)
+        snippet["description"] = self._read_tldr_description(page)
+        snippet["name"] = self._read_tldr_name(page)
+        snippet["groups"] = Parser.format_groups(Const.SNIPPET, platform)
+        snippet["tags"] = Parser.format_tags(Const.SNIPPET, platform)
+        snippet["links"] = Parser.format_links(Const.SNIPPET, source)
+        snippet["source"] = source
+
+        return snippet
+
+    def _read_tldr_data(self, tldr):
+        """Parse and format tldr man page ``data`` attribute.
+
+        Args
+            tldr (str): A tldr snippet in a text string.
+
+        Returns:
+            tuple: Formatted list of tldr man page snippets.
+        """
+
+        data = []
+        match = self.RE_CATCH_TLDR_SNIPPETS.search(tldr)
+        if match:
+            snippets = self.RE_SPLIT_TLDR_SNIPPET.split(match.group("snippets"))
+            if any(snippets):
+                snippets = self._format_list(snippets)
+                for snippet in snippets:
+                    match = self.RE_CATCH_TLDR_SNIPPET_COMMAND.match(snippet)
+                    if match:
+                        comment = self.RE_MATCH_STRING_LAST_COLUMN.sub(
+                            ".", match.group("comment")
+                        )
+                        data.append(
+                            match.group("command") + Const.SNIPPET_COMMENT + comment
+                        )
+                    else:
+                        self._logger.debug(
+                            "parser was not able to read tldr snippet: %s", snippet
+                        )
+            else:
+                self._logger.debug(
+                    "parser did not find tldr snippets from snippet section: %s",
+                    snippets,
+                )
+        else:
+            self._logger.debug("parser did not find tldr snippets at all: %s", tldr)
+
+        return Parser.format_data(Const.SNIPPET, data)
+
+    def _read_tldr_brief(self, tldr):
+        """Parse and format tldr man page ``brief`` attribute.
+
+        Args
+            tldr (str): A tldr snippet in a text string.
+
+        Returns:
+            str: Utf-8 encoded unicode string.
+        """
+
+        brief = ""
+        match = self.RE_CATCH_TLDR_DESCRIPTION.search(tldr)
+        if match:
+            brief = self._format_brief(match.group("description"))
+
+        return Parser.format_brief(Const.SNIPPET, brief)
+
+    def _read_tldr_description(self, tldr):
+        """Parse and format tldr man page ``description`` attribute.
+
+        Args
+            tldr (str): A tldr snippet in a text string.
+
+        Returns:
+            str: Utf-8 encoded unicode string.
+        """
+
+        description = ""
+        match = self.RE_CATCH_TLDR_DESCRIPTION.search(tldr)
+        if match:
+            description = self._format_description(match.group("description"))
+
+        return Parser.format_description(Const.SNIPPET, description)
+
+    def _read_tldr_name(self, tldr):
+        """Parse and format tldr man page ``name`` attribute.
+
+        Args
+            tldr (str): A tldr snippet in a text string.
+
+        Returns:
+            str: Utf-8 encoded unicode string.
+        """
+
+        name = ""
+        match = self.RE_CATCH_TLDR_HEADER.search(tldr)
+        if match:
+            name = match.group("header")
+
+        return Parser.format_name(Const.SNIPPET, name)
+
+    @staticmethod
+    def _format_list(data):
+        """Remove empty strings and trim newlines from a list.
+
+        Args
+            data (list): List of strings.
+
+        Returns:
+            list: Formatted list of tldr man page snippets.
+        """
+
+        list_ = [value.strip() for value in data]
+        list_ = list(filter(None, list_))
+
+        return list_
+
+    def _format_brief(self, brief):
+        """Format brief description for tldr man page.
+
+        Remove additional Markdown tokens like '>' and limit the length of
+        the string to be more suitable for content ``brief`` attribute.
+
+        The last dot is removed because it is not considered part of the
+        ``brief`` attribute for styling issue.
+
+        Args
+            brief (str): Brief read from the tldr man page.
+
+        Returns:
+            str: Tldr specific format for the ``brief`` attribute.
+        """
+
+        brief = self.RE_MATCH_MKDN_BLOCK_QUOTE_TOKEN.sub("", brief)
+        match = self.RE_CATCH_FIRST_SENTENCE.search(brief)
+        if match:
+            brief = self._limit_string(match.group("sentence").rstrip("."), 40)
+
+        return brief
+
+    def _format_description(self, description):
+        """Format tldr man page description.
+
+        Remove additional Markdown tokens like '>' from the description.
+
+        Args
+            description (str): Description read from the tldr man page.
+
+        Returns:
+            str: Tldr specific format for the ``description`` attribute.
+        """
+
+        return self.RE_MATCH_MKDN_BLOCK_QUOTE_TOKEN.sub("", description)
+
+    @staticmethod
+    def _limit_string(string_, len_):
+        """Limit the string length"""
+
+        return string_ if len(string_) <= len_ else string_[0 : len_ - 3] + "..."
+
+
+class ParseState(object):  # pylint: disable=too-few-public-methods
+    """Counters of the tldr page parser.
+
+    The counters contain the pages that failed or were skipped and the
+    number of invalid pages. The worker processes that parse local tldr
+    pages return their counters with each batch of pages.
+    """
+
+    def __init__(self):
+        self.failed = []
+        self.skipped = []
+        self.invalid = 0
+
+
+# Parser and page reader in a worker process.
+_PARSER = None
+_PAGES = None
+
+
+def _init_parse_worker(logger, options):
+    """Initialize a worker process to parse local tldr pages.
+
+    The parse cache is not used in the worker processes because the
+    processes cannot share the cache file.
+
+    Args:
+        logger (obj): Logger.
+        options (dict): Plugin options.
+    """
+
+    global _PARSER, _PAGES  # pylint: disable=global-statement
+    validator = SnippetValidator(logger) if options["validate"] else None
+    _PARSER = TldrParser(logger, options, validator=validator)
+    _PAGES = LocalPages(logger)
+
+
+def _parse_tldr_batch(pages):
+    """Read and parse a batch of local tldr pages in a worker process.
+
+    Args:
+        pages (list): List of tldr page path, platform and text tuples.
+
+    Returns:
+        tuple: Valid compact records, skipped pages and number of invalid pages.
+    """
+
+    _PARSER.state = ParseState()
+    snippets = []
+    for uri, platform, page in pages:
+        if page is None:
+            page = _PAGES.read(uri)
+        snippet = _PARSER.parse(uri, "", platform, page)
+        if snippet:
+            snippets.append(snippet)
+    records = list(_PARSER.validate_snippets(snippets))
+
+    return records, _PARSER.state.skipped, _PARSER.state.invalid
@@ -19,25 +19,46 @@
 
 """Snippy-tldr is a plugin to import tldr man pages for Snippy."""
 
+import os
 import os.path
-import re
+import time
+import zipfile
 
-from glob import glob
+from collections import deque
+from itertools import islice
+from multiprocessing.pool import ThreadPool
 
 try:
-    from urllib.parse import urljoin
     from urllib.parse import urlparse
 except ImportError:
-    from urlparse import urljoin, urlparse
+    from urlparse import urlparse
 
-import requests
-
-
-from snippy.plugins import Const
-from snippy.plugins import Parser
 from snippy.plugins import Schema
 from snippy.plugins import Cause
 
+from snippy_tldr.archive import GitHubArchive
+from snippy_tldr.bundle import ZipBundle
+from snippy_tldr.cache import HttpCache
+from snippy_tldr.cache import PageCache
+from snippy_tldr.cache import ParseCache
+from snippy_tldr.client import HttpClient
+from snippy_tldr.client import RateLimiter
+from snippy_tldr.client import RateLimitError
+from snippy_tldr.client import RetryPolicy
+from snippy_tldr.git import GitRepository
+from snippy_tldr.github import GitHubPages
+from snippy_tldr.index import ExampleIndex
+from snippy_tldr.local import LocalPages
+from snippy_tldr.pages import PageMetadata
+from snippy_tldr.pages import TldrPages
+from snippy_tldr.parser import TldrParser
+from snippy_tldr.schema import SnippetValidator
+from snippy_tldr.selector import PageSelector
+from snippy_tldr.snapshot import Snapshot
+from snippy_tldr.sqlite import SqliteExport
+from snippy_tldr.sync import LocalManifest
+from snippy_tldr.sync import SyncState
+
 
 def snippy_import_hook(logger, infile):
     """Import content for Snippy tool.
@@ -137,164 +158,153 @@ def snippy_import_hook(logger, infile):
 class SnippyTldr(object):  # pylint: disable=too-many-instance-attributes
     """Plugin to import tldr man pages for snippy."""
 
-    GITHUB_API = "https://api.github.com/repos/tldr-pages/tldr/"
-    GITHUB_RAW = "https://raw.githubusercontent.com/tldr-pages/tldr/"
+    GITHUB_API = GitHubPages.GITHUB_API
+    GITHUB_RAW = GitHubPages.GITHUB_RAW
     TLDR_DEFAULT_URI = "https://github.com/tldr-pages/tldr/tree/master/pages/linux"
-    TLDR_PLATFORMS = ("common", "linux", "osx", "sunos", "windows")
-
-    RE_MATCH_GITHUB_URL = re.compile(
-        r"""
-        http[s]?://github.com/tldr-pages/tldr/(tree|blob)/
-        """,
-        re.VERBOSE,
-    )
-
-    # Match examples like 'pages', 'pages.pt-BR' and 'pages.it'.
-    RE_MATCH_TLDR_TRANSLATION = r"pages(?:\.[a-zA-Z0-9-]+)?"
-
-    # Match all known tldr platforms.
-    RE_MATCH_TLDR_PLATFORM = r"%s" % "|".join(TLDR_PLATFORMS)
-
-    # A 'blob' URI should be always used with URIs pointing to a file. Someone
-    # may accidentally use a GitHub 'tree' URI with a tldr page. A 'tree' URL
-    # pointing to a tldr page is still accepted just to be flexible.
-    RE_CATCH_GITHUB_PAGE = re.compile(
-        r"""
-        (?:
-            raw.githubusercontent.com/tldr-pages/tldr  # GitHub raw content URL.
-            |                                          # or
-            tldr/(?:blob|tree)                         # GitHub blob (or tree) URL.
-        )/
-        (?P<branch>.*)/         # Catch branches like 'master' or 'waldyrious/alt-syntax'.
-        (?P<translation>.*)/    # Catch translations like 'pages' or 'pages.pt-BR'.
-        (?P<platform>.*)/       # Catch platform like 'common' or 'linux'.
-        (?P<page>.*[.]md)       # Catch tldr Markdown page.
-        """,
-        re.VERBOSE,
-    )
-
-    RE_CATCH_GITHUB_PLATFORM = re.compile(
-        r"""
-        (?:http[s]?://github.com/tldr-pages/tldr/(?:blob|tree))/  # GitHub URL.
-        (?P<branch>.*)/         # Catch branches like 'master' or 'waldyrious/alt-syntax'.
-        (?P<translation>.*)/    # Catch translations like 'pages' or 'pages.pt-BR'.
-        (?P<platform>%s)        # Catch platform like 'common' or 'linux'
-        (?:[/]?|$)              # Match optional trailing slash or end of string.
-        """
-        % RE_MATCH_TLDR_PLATFORM,
-        re.VERBOSE,
-    )
-
-    RE_CATCH_GITHUB_TRANSLATION = re.compile(
-        r"""
-        (?:http[s]?://github.com/tldr-pages/tldr/(?:blob|tree))/  # GitHub  URL.
-        (?P<branch>.*)/         # Catch branches like 'master' or 'waldyrious/alt-syntax'.
-        (?P<translation>%s)     # Catch translations like 'pages' or 'pages.pt-BR'.
-        (?:[/]?|$)              # Match optional trailing slash or end of string.
-        """
-        % RE_MATCH_TLDR_TRANSLATION,
-        re.VERBOSE,
-    )
-
-    # User may give the file path in different ways. This regexp tries to get the
-    # tldr platform out from the file path. The platform is needed for 'groups'
-    # and 'tags' attributes. If the file path does not contain the tldr platform,
-    # it cannot be read from the Markdown page and the value is not stored.
-    #
-    # Examples that work with this regexp:
+    TLDR_PLATFORMS = TldrPages.TLDR_PLATFORMS
+
+    # Default plugin options. Each option can be set with a keyword argument
+    # or with an environment variable like ``SNIPPY_TLDR_WORKERS``.
     #
-    #   1. /path/to/tldr/pages/linux/
-    #   2. ./tldr/pages/linux/alpine.md
-    #   3. ./tldr/pages.it/linux/alpine.md
-    #   4. ../tldr/pages.pt-BR/linux/alpine.md
-    #   5. ./pages/linux/
-    #   6. ./alpine.md
-    #   7. alpine.md
-    RE_CATCH_LOCAL_TLDR_PAGES = re.compile(
-        r"""
-        (?:[.])?                        # Match optional leading dot like in './alpine.md'.
-        (?:.*/tldr/)?                   # Match optional tldr project root path.
-        (?P<translation>%s)?[/]?        # Catch optional translation.
-        (?P<platform>%s)?[/]?           # Catch optional platform.
-        (?P<page>[a-zA-Z0-9-]+[.]md)?   # Catch optional tldr page.
-        """
-        % (RE_MATCH_TLDR_TRANSLATION, RE_MATCH_TLDR_PLATFORM),
-        re.VERBOSE,
-    )
-
-    RE_CATCH_TLDR_HEADER = re.compile(
-        r"""
-        [\#]+\s+         # Match Markdown headers token.
-        (?P<header>\S+)  # Catch the header.
-        """,
-        re.VERBOSE,
-    )
-
-    RE_CATCH_TLDR_DESCRIPTION = re.compile(
-        r"""
-        [\#]+\s+[\S\s]+       # Match first line header.
-        \n\n                  # Match one empty line after the header.
-        [>]{1}\s+             # Match Markdown quote before description.
-        (?P<description>.*?)  # Catch description ungreedely.
-        \n\n                  # Match one empty line after the description.
-        """,
-        re.DOTALL | re.VERBOSE,
-    )
-
-    RE_CATCH_TLDR_SNIPPETS = re.compile(
-        r"""
-        [>]{1}\s+.*?      # Match description.
-        \n\n              # Match empty line after description.
-        (?P<snippets>.*)  # Catch tldr man page snippet.
-        """,
-        re.DOTALL | re.VERBOSE,
-    )
-
-    RE_CATCH_TLDR_SNIPPET = re.compile(
-        r"""
-        (?P<snippet>.*?)          # Catch a singpe snippet that contains a header and the snippet.
-        (?=\n{2}[-]{1}\s{1}\S|$)  # Lookahead next snippet marked by list token or end of a string.
-        """,
-        re.DOTALL | re.VERBOSE,
-    )
-
-    RE_CATCH_TLDR_SNIPPET_COMMAND = re.compile(
-        r"""
-        \s?[-]{1}\s+       # Match optional leading whitespaces and first Markdown list token.
-        (?P<comment>.*)\n  # Catch one line comment.
-        \s+[`]             # Match whitespaces and the first backtick before the command.
-        (?P<command>.*)    # Catch one line command.
-        [`]                # Match the backtick after the command.
-        """,
-        re.DOTALL | re.VERBOSE,
-    )
-
-    RE_MATCH_STRING_LAST_COLUMN = re.compile(
-        r"""
-        [:]{1}$  # Match optional last column in multiline string.
-        """,
-        re.MULTILINE | re.VERBOSE,
-    )
-
-    RE_MATCH_MKDN_BLOCK_QUOTE_TOKEN = re.compile(
-        r"""
-        \n[>]{1}  # Match Markdown block quote after newline.
-        """,
-        re.MULTILINE | re.VERBOSE,
-    )
-
-    RE_CATCH_FIRST_SENTENCE = re.compile(
-        r"""
-        ^(?P<sentence>.*?[\.!?])  # Match the first sentence.
-        """,
-        re.MULTILINE | re.VERBOSE,
-    )
-
-    def __init__(self, logger, uri):
+    #   workers    Number of concurrent workers used to fetch tldr pages.
+    #   recursive  List GitHub pages with one recursive tree API request.
+    #   timeout    Timeout in seconds for one HTTP request.
+    #   retries    Number of retries for failed HTTP requests.
+    #   backoff    Initial exponential backoff in seconds between retries.
+    #   max_wait   Maximum delay in seconds to wait before one retry.
+    #   archive    Read GitHub translations and branches from one tarball.
+    #   cache      Directory for persistent caches. Caches are not used if not set.
+    #   cache_size Maximum size of the tldr page cache in bytes.
+    #   state      File to store the sync state for incremental imports.
+    #   rate_limit Policy when the GitHub API rate limit is exhausted. The
+    #              'wait' waits for the reset and 'fallback' reads the GitHub
+    #              branch archive that is not rate limited.
+    #   rate_burst Number of GitHub API requests sent without pacing.
+    #   stream     Read tldr pages lazily when the iterator is consumed.
+    #   read_ahead Number of tldr pages fetched ahead of the parsed page.
+    #   parser     Parser for tldr pages. The 'lines' reads a page in one pass
+    #              and the 'regex' uses regular expressions for each field.
+    #   max_size   Maximum size of one tldr page in characters. Larger pages
+    #              are skipped. Zero disables the limit.
+    #   max_time   Maximum time in seconds to parse one tldr page. Slower pages
+    #              are skipped. Zero disables the limit which is the default
+    #              because the parse time depends on the load of the host. The
+    #              regex parser reads pages over 64 KiB with the lines parser
+    #              because one match cannot be interrupted.
+    #   processes  Number of worker processes to parse local tldr pages. The
+    #              parse cache is not used in the worker processes.
+    #   batch      Number of local tldr pages sent to a worker process at once
+    #              and number of snippets validated at once.
+    #   validate   Validate parsed snippets against the Snippy JSON schema.
+    #   ref        Git branch, tag or commit to read when the URI is a local
+    #              git repository. The pages are read from the git objects.
+    #   interval   Interval in seconds to poll local tldr pages in watch mode.
+    #   debounce   Time in seconds without changes before changed local tldr
+    #              pages are imported in watch mode.
+    #   index      Build an in-memory index of the examples for queries.
+    #   dedup      Import identical tldr pages only once with merged groups and
+    #              tags from all platforms where the page exists.
+    #   pages      Page name globs like 'git-*' to select the imported pages.
+    #   platforms  Platforms to import. All platforms are imported if not set.
+    #   skip_platforms
+    #              Platforms that are not imported.
+    #   translations
+    #              Translations to import. All are imported if not set.
+    #   skip_translations
+    #              Translations that are not imported.
+    #   max_pages  Maximum number of imported pages. Zero disables the limit.
+    OPTIONS = {
+        "workers": 1,
+        "recursive": False,
+        "timeout": 10.0,
+        "retries": 3,
+        "backoff": 0.5,
+        "max_wait": 60.0,
+        "archive": False,
+        "cache": None,
+        "cache_size": 100 * 1024 * 1024,
+        "state": None,
+        "rate_limit": RateLimiter.WAIT,
+        "rate_burst": 10,
+        "stream": False,
+        "read_ahead": 16,
+        "parser": "lines",
+        "max_size": 256 * 1024,
+        "max_time": 0.0,
+        "processes": 1,
+        "batch": 128,
+        "validate": True,
+        "ref": None,
+        "interval": 1.0,
+        "debounce": 0.5,
+        "index": False,
+        "dedup": False,
+        "pages": (),
+        "platforms": (),
+        "skip_platforms": (),
+        "translations": (),
+        "skip_translations": (),
+        "max_pages": 0,
+    }
+
+    def __init__(self, logger, uri, **options):
         self._logger = logger
+        self._options = self._get_options(options)
+        self._cache = None
+        parsed = None
+        http_cache = None
+        if self._options["cache"]:
+            self._cache = PageCache(
+                logger,
+                os.path.join(self._options["cache"], "pages"),
+                self._options["cache_size"],
+            )
+            http_cache = HttpCache(logger, os.path.join(self._options["cache"], "http"))
+            version = TldrParser.get_version(logger, self._options["parser"])
+            if version:
+                parsed = ParseCache(
+                    logger, os.path.join(self._options["cache"], "parsed"), version
+                )
+        self._client = HttpClient(
+            logger,
+            pool=max(10, self._options["workers"]),
+            retry=RetryPolicy(
+                timeout=self._options["timeout"],
+                retries=self._options["retries"],
+                backoff=self._options["backoff"],
+                max_wait=self._options["max_wait"],
+            ),
+            cache=http_cache,
+            limiter=RateLimiter(
+                logger,
+                policy=self._options["rate_limit"],
+                burst=self._options["rate_burst"],
+                max_wait=self._options["max_wait"],
+            ),
+        )
+        self._state = None
+        if self._options["state"]:
+            self._state = SyncState(logger, self._options["state"])
         self._uri = self._get_uri(uri)
+        self._metadata = PageMetadata(self._uri)
+        self._selector = PageSelector(logger, self._options)
+        self._local = LocalPages(logger)
+        self._github = GitHubPages(
+            logger, self._client, self._selector, self._metadata, self._cache
+        )
+        self._git = None
+        self._zip = None
+        self._snapshot = None
+        self._index = ExampleIndex() if self._options["index"] else None
         self._schema = Schema()
+        validator = None
+        if self._options["validate"]:
+            validator = SnippetValidator(logger, self._schema)
+        self._parser = TldrParser(logger, self._options, parsed, validator)
         self._snippets = []
+        self._pages = []
+        self._texts = {}
+        self._stream = None
         self._i = 0
 
         self._read_tldr_pages()
@@ -302,512 +312,675 @@ class SnippyTldr(object):  # pylint: disable=too-many-instance-attributes
     def __len__(self):
         """Return count of the snippets.
 
+        In the stream mode the count is the number of tldr pages in the page
+        index or the number of records in a snapshot. The iterator may return
+        less snippets if some of the pages cannot be read or parsed.
+
         Returns:
             int: The len of the iterator object.
         """
 
+        if self._stream is not None:
+            return self._snapshot.count if self._snapshot else len(self._pages)
+
         return len(self._snippets)
 
     def __iter__(self):
         return self
 
-    def next(self):
-        """Return the next tldr man page.
+    @property
+    def deleted(self):
+        """Source links of tldr pages deleted since the previous import.
 
-        The returned pages are pre-formatted for Snippy tool.
+        Deleted pages are known only in incremental imports.
 
         Returns:
-            dict: The next tldr mage in interator.
+            tuple: GitHub raw links or local paths of deleted tldr pages.
         """
 
-        if self._i < len(self):
-            note = self._snippets[self._i]
-            self._i += 1
-        else:
-            raise StopIteration
+        return tuple(self._metadata.deleted)
 
-        return note
+    @property
+    def skipped(self):
+        """Links of tldr pages skipped by the parser.
 
-    def _get_uri(self, uri):
-        """Format URI from the user.
+        Pages are skipped when they exceed the ``max_size`` or ``max_time``
+        limits.
 
-        This method makes sure that the URI or path received from user is in
-        correct format.
+        Returns:
+            tuple: Links or paths of skipped tldr pages.
+        """
 
-        The trailing slash is added if the URI is not pointing to a file. The
-        trailing slash allows ``ulrjoin`` to add path objects like filenames
-        to the URI without removing the last object in the URI path.
+        return tuple(self._parser.state.skipped)
 
-        Args:
-            uri (str): URI or path received from the ``--file`` CLI option.
+    @property
+    def duplicates(self):
+        """Links of tldr pages that were not imported because of duplicates.
+
+        Duplicates are removed only when the ``dedup`` option is set.
 
         Returns:
-            str: Formatted URI for the plugin.
+            tuple: Tuples of a duplicate page and the imported identical page.
         """
 
-        uri_ = uri if uri else self.TLDR_DEFAULT_URI
-        _, file_extension = os.path.splitext(urlparse(uri_).path)
-        if file_extension != ".md" and not uri_.endswith("/"):
-            uri_ = uri_ + "/"
+        return tuple(self._selector.duplicates)
 
-        return uri_
+    @property
+    def source(self):
+        """Metadata about the source of the tldr pages.
 
-    def _read_tldr_pages(self):
-        """Read all ``tldr pages`` from the URI."""
+        The metadata contains the ``uri`` and, when they are known, the
+        ``branch``, ``commit`` and ``translations`` of the imported pages.
+        The metadata of an imported snapshot is the metadata of the source
+        from which the snapshot was exported.
+
+        Returns:
+            dict: Source metadata.
+        """
 
-        pages = self._get_tlrd_pages(self._uri)
-        for translation in pages:
-            for platform in pages[translation]:
-                self._read_pages(platform, pages[translation][platform])
+        return dict(self._metadata.source)
 
-    def _get_tlrd_pages(self, uri):
-        """Get all ``tldr pages``.
+    def query(self, *terms):
+        """Find examples from the imported tldr pages.
 
-        Read all tldr pages from the given URI. The pages are returned in a
-        dictionary that contains keys for translations and tldr platforms.
-        The tldr pages are in a list of full GitHub raw URLs under each
-        platform.
+        The examples are found from the example index that is built when the
+        ``index`` option is set. The terms are command tokens like ``tar``
+        or ``--recursive`` and page names with the ``name:`` prefix. Only the
+        examples that match all terms are returned. In the stream mode the
+        index contains the pages read so far.
 
         Args:
-            uri (str): URI where the tldr pages are read.
+            *terms (str): Command tokens or page names.
 
         Returns:
-            dict: All tldr pages with GitHib raw URL.
+            list: Page name and example tuples.
         """
 
-        def count(data):
-            """Count tldr pages and print log.
+        if self._index is None:
+            self._logger.debug("example index not enabled for query: %s", terms)
+            return []
 
-            Args:
-                data (dict): All read tldr pages in a dictionary.
-            """
+        return self._index.query(*terms)
 
-            pages = 0
-            platforms = 0
-            translations = 0
-            for translation in data:
-                translations = translations + 1
-                for platform in data[translation]:
-                    platforms = platforms + 1
-                    pages = pages + len(data[translation][platform])
+    def export_snapshot(self, path):
+        """Export parsed snippets to a snapshot.
 
-            self._logger.debug(
-                "read total of %d tldr pages from %d translations and %d platforms",
-                pages,
-                translations,
-                platforms,
-            )
+        The snapshot can be imported later with the plugin by using the
+        snapshot path as the URI. Importing a snapshot does not read or
+        parse the tldr pages again. In the stream mode the pages are read
+        while the snapshot is written and the iterator is consumed.
 
-        pages = {}
-        match = self.RE_CATCH_GITHUB_PAGE.search(uri)
-        if match and match.group("page"):
-            self._logger.debug(
-                "read tldr page: %s :from branch: %s",
-                match.group("page"),
-                match.group("branch"),
-            )
-            pages = {match.group("translation"): {match.group("platform"): (uri,)}}
-            count(pages)
+        Args:
+            path (str): Path to the snapshot file.
 
-            return pages
+        Returns:
+            int: Number of exported snippets or None if the export failed.
+        """
 
-        match = self.RE_CATCH_GITHUB_PLATFORM.search(uri)
-        if match and match.group("platform"):
-            self._logger.debug(
-                "read tldr pages from platform: %s :from branch: %s",
-                match.group("platform"),
-                match.group("branch"),
-            )
-            pages = self._get_github_tldr_pages(
-                match.group("branch"),
-                (match.group("translation"),),
-                (match.group("platform"),),
-            )
-            count(pages)
+        return Snapshot.write(self._logger, path, *self._get_export())
 
-            return pages
+    def export_sqlite(self, path):
+        """Export parsed snippets to a SQLite database.
 
-        match = self.RE_CATCH_GITHUB_TRANSLATION.search(uri)
-        if match and match.group("translation"):
-            pages = self._get_github_tldr_pages(
-                match.group("branch"),
-                (match.group("translation"),),
-                self.TLDR_PLATFORMS,
-            )
-            count(pages)
-
-            return pages
-
-        match = self.RE_CATCH_LOCAL_TLDR_PAGES.search(uri)
-        if match:
-            translation = match.groupdict().get("translations", "undefined")
-            platform = match.groupdict().get("platform", "undefined")
-            if os.path.isfile(uri) and os.access(uri, os.R_OK):
-                pages = {translation: {platform: (uri,)}}
-                count(pages)
-            elif os.path.isdir(uri) and os.access(uri, os.R_OK):
-                # Try to read under a platform or all platforms.
-                files = glob(os.path.join(uri, "*.md"))
-                if files:
-                    pages = {translation: {platform: tuple(files)}}
-                else:
-                    pages[translation] = {}
-                    platforms = os.listdir(uri)
-                    for platform in platforms:
-                        if platform in self.TLDR_PLATFORMS:
-                            files = glob(os.path.join(uri + platform, "*.md"))
-                            pages[translation][platform] = tuple(files)
-                count(pages)
-            else:
-                Cause.push(
-                    Cause.HTTP_FORBIDDEN,
-                    "local tldr pages cannot be read: {}".format(uri),
-                )
+        The database contains the parsed tldr pages, their examples split to
+        commands and comments and an FTS5 full-text index over the page
+        name, brief, description and the example commands and comments. In
+        the stream mode the pages are read while the database is written and
+        the iterator is consumed.
 
-        return pages
+        Args:
+            path (str): Path to the database file.
 
-    def _get_github_tldr_pages(self, branch, translations, platforms):
-        """Get tldr pages.
+        Returns:
+            int: Number of exported snippets or None if the export failed.
+        """
 
-        Method takes a list of translations and platforms to try to read all
-        the needed tldr pages with as less GitHub API requests as possible.
+        return SqliteExport.write(self._logger, path, *self._get_export())
 
-        Args:
-            branch (str): GitHub branch.
-            translations (tuple): List of translations to read under the branch.
-            platforms (tuple): List of platforms to read under the branch.
+    def _get_export(self):
+        """Get source metadata and records to export.
 
         Returns:
-            dict: Tldr pages under given translations and platforms.
+            tuple: Source metadata and iterable of compact records.
         """
 
-        def read_translations(url, data, pages):
-            """Read translations from the data.
-
-            Args:
-                url (str): URL to be added with translations, platforms and tldr pages.
-                data (dict): GitHub JSON dictionary for a branch translations.
-                pages (dict): Tldr pages stored under the branch.
-            """
-
-            for translation in translations:
-                url_ = self._join_paths(url, translation)
-                translation_url = next(
-                    tree for tree in data["tree"] if tree["path"] == translation
-                )["url"]
-                platform_data = requests.get(translation_url).json()
-                pages[translation] = {}
-                read_platforms(url_, platforms, platform_data, pages[translation])
-
-        def read_platforms(url, platforms, data, pages):
-            """Read platforms from the data.
-
-            Args:
-                url (str): URL to be added with platforms and tldr pages.
-                data (dict): GitHub JSON dictionary for a branch platforms.
-                pages (dict): Tldr pages stored under each platforms.
-            """
-
-            for platform in platforms:
-                pages[platform] = []
-                try:
-                    platform_url = next(
-                        tree for tree in data["tree"] if tree["path"] == platform
-                    )["url"]
-                    pages_data = requests.get(platform_url).json()
-                    url_ = self._join_paths(url, platform)
-                    read_pages(url_, pages_data, pages[platform])
-                except StopIteration:
-                    pass
-
-        def read_pages(url, data, pages):
-            """Read tldr pages under the data
-
-            Args:
-                url (str): URL to be used with the read tldr pages.
-                data (dict): GitHub JSON dictionary for a branch tldr pages.
-                pages (dict): Tldr pages stored under a platform.
-            """
-
-            for tree in data["tree"]:
-                if tree["type"] == "blob" and tree["path"].endswith(".md"):
-                    pages.append(self._join_paths(url, tree["path"]))
-
-        pages = {}
-        repo_url = self._join_paths(self.GITHUB_API, "branches")
-        repo_url = self._join_paths(repo_url, branch)
-        resp = requests.get(repo_url)
-        if self.is_api_error(resp):
-            return pages
-        data = resp.json()
-        branch_url = data["commit"]["commit"]["tree"]["url"]
-        translations_data = requests.get(branch_url).json()
-        url = self._join_paths(self.GITHUB_RAW, branch)
-        read_translations(url, translations_data, pages)
+        records = self._snippets
+        if self._stream is not None:
+            records = self._stream
+        metadata = dict(self._metadata.source, parser=self._options["parser"])
+        metadata["created"] = int(time.time())
 
-        return pages
+        return metadata, records
 
-    def _read_pages(self, platform, pages):
-        """Read tldr pages from the platform.
+    @property
+    def metrics(self):
+        """Metrics from the previous import.
 
-        Args:
-            platform (str): A tldr platform where the pages are read.
-            pages (tuple): List of tldr pages under the platform.
+        Returns:
+            dict: Cache, parser and GitHub API rate limit metrics.
         """
 
-        for uri in pages:
-            self._read_tldr_page(uri, platform)
+        metrics = {"rate_limit": dict(self._client.limiter.metrics)}
+        metrics["parser"] = {
+            "failed": len(self._parser.state.failed),
+            "skipped": len(self._parser.state.skipped),
+            "invalid": self._parser.state.invalid,
+        }
+        if self._options["dedup"]:
+            metrics["dedup"] = {"duplicates": len(self._selector.duplicates)}
+        if self._selector.key():
+            metrics["selectors"] = dict(self._selector.filtered)
+        if self._cache:
+            metrics["page_cache"] = {
+                "hits": self._cache.hits,
+                "misses": self._cache.misses,
+            }
+        if self._parser.cache:
+            metrics["parse_cache"] = {
+                "hits": self._parser.cache.hits,
+                "misses": self._parser.cache.misses,
+            }
+        if self._client.cache:
+            metrics["http_cache"] = {
+                "hits": self._client.cache.hits,
+                "revalidations": self._client.cache.revalidations,
+                "misses": self._client.cache.misses,
+            }
+
+        return metrics
 
-    def _read_tldr_page(self, uri, platform):
-        """Read a tldr page.
+    def next(self):
+        """Return the next tldr man page.
 
-        Args:
-            uri (str): URI or path where the tldr file is read.
-            platform (str): Platform where the page is stored.
+        The returned pages are pre-formatted for Snippy tool.
+
+        Returns:
+            dict: The next tldr mage in interator.
         """
 
-        snippet = ""
-        uri = self.RE_MATCH_GITHUB_URL.sub(self.GITHUB_RAW, uri)
-        source = uri
-        if "http" in urlparse(uri).scheme:
-            self._logger.debug("request tldr page: %s", uri)
-            page = requests.get(uri).text
-        else:
-            with open(uri, "r") as infile:
-                self._logger.debug("read tldr page: %s", uri)
-                page = infile.read()
-            source = ""
+        if self._stream is not None:
+            note = next(self._stream).to_dict()
+            self._i += 1
+
+            return note
 
-        snippet = self._parse_tldr_page(source, platform, page)
-        if snippet:  # and self._schema.validate(snippet):
-            self._snippets.append(snippet)
+        if self._i < len(self):
+            note = self._snippets[self._i].to_dict()
+            self._i += 1
         else:
-            self._logger.debug("failed to parse tldr man page: %s :from: %s", uri, page)
+            raise StopIteration
 
-    @staticmethod
-    def _join_paths(uri, path_object):
-        """Join URI or path to an object.
+        return note
 
-        Args:
-            uri (str): URI or path base.
-            path_object (str): Path object to be added to the URI.
+    def watch(self):
+        """Watch local tldr pages and import changed pages.
+
+        The local path is polled with the ``interval`` option. Each poll lists
+        the tldr pages and compares their size and modification time to the
+        previous poll. Changes are imported only after the pages have not
+        changed for the ``debounce`` time. This groups changes like saving
+        many files at once to one import. Only the added and modified pages
+        are read and parsed.
+
+        The watch starts from the state of the pages when this method is
+        called. The returned generator does not stop by itself.
 
         Returns:
-            str: Joined URI or path.
+            generator: Tuples of changed snippets and deleted page paths.
         """
 
-        if "http" in urlparse(uri).scheme:
-            uri_ = uri
-            if not uri_.endswith("/"):
-                uri_ = uri_ + "/"
-            path = urljoin(uri_, path_object)
-        else:
-            path = os.path.join(uri, path_object)
+        if "http" in urlparse(self._uri).scheme or self._git or self._zip:
+            self._logger.debug("watch supports only local tldr pages: %s", self._uri)
+            return iter(())
 
-        return path
+        return self._local.watch(
+            self._uri, self._local.stat(self._uri), self._options, self._parser
+        )
 
-    def is_api_error(self, http):
-        """Test if GitHub API response was an error.
+    def _get_options(self, options):
+        """Get plugin options.
+
+        An option given as a keyword argument has the highest precedence. If
+        the option is not given, it is read from the environment variable
+        ``SNIPPY_TLDR_<OPTION>``. The default value is used if the option is
+        not set at all or if the value cannot be converted.
 
         Args:
-            http (obj): Request package response object.
+            options (dict): Plugin options from the caller.
 
         Returns:
-            bool: True in case of REST API error response.
+            dict: Plugin options with default values.
         """
 
-        if http.status_code != 200:
-            if http.headers.get("X-RateLimit-Remaining", "0") == "0":
-                Cause.push(Cause.HTTP_FORBIDDEN, "github api rate limit reached")
-            else:
-                Cause.push(
-                    Cause.HTTP_FORBIDDEN,
-                    "github api failure:  {}".format(http.status_code),
-                )
-            self._logger.debug(
-                "github api response %s with headers: %s"
-                % (http.status_code, http.headers)
+        options_ = {}
+        for option, default in self.OPTIONS.items():
+            value = options.get(
+                option, os.environ.get("SNIPPY_TLDR_" + option.upper(), default)
             )
-            return True
+            try:
+                options_[option] = self._format_option(value, default)
+            except ValueError as error:
+                self._logger.debug("invalid plugin option: %s :%s", option, error)
+                options_[option] = default
+        for option in set(options) - set(self.OPTIONS):
+            self._logger.debug("unknown plugin option ignored: %s", option)
 
-        return False
+        return options_
 
-    def _parse_tldr_page(self, source, platform, page):
-        """Parse and validate one tldr man page.
+    @staticmethod
+    def _format_option(value, default):
+        """Format option value to the same type as the default value.
 
-        The method parses and validates one tldr man page to a snippet
-        data structure for the Snippy tool.
+        Options read from environment variables are strings. These are
+        converted to the type of the default value. Lists are given as
+        comma separated strings.
 
         Args:
-            source (str): A link where the tldr man page was read.
-            platform (str): The platfrom where the tldr page belongs.
-            page (str): A tldr man page in a text string.
+            value (obj): Option value from the caller or environment.
+            default (obj): Default value for the option.
 
         Returns:
-            dict: Validated JSON structure from a tldr man page.
+            obj: Option value in the same type as the default value.
         """
 
-        snippet = {}
-        snippet["category"] = Const.SNIPPET
-        snippet["data"] = self._read_tldr_data(page)
-        snippet["brief"] = self._read_tldr_brief(page)
-        snippet["description"] = self._read_tldr_description(page)
-        snippet["name"] = self._read_tldr_name(page)
-        snippet["groups"] = Parser.format_groups(Const.SNIPPET, platform)
-        snippet["tags"] = Parser.format_tags(Const.SNIPPET, platform)
-        snippet["links"] = Parser.format_links(Const.SNIPPET, source)
-        snippet["source"] = source
+        if not isinstance(value, str) or default is None or isinstance(default, str):
+            return value
+        if isinstance(default, bool):
+            return value.lower() in ("1", "true", "yes", "on")
+        if isinstance(default, int):
+            return int(value)
+        if isinstance(default, float):
+            return float(value)
+        if isinstance(default, (list, tuple)):
+            return tuple(filter(None, [item.strip() for item in value.split(",")]))
+
+        return value
+
+    def _get_uri(self, uri):
+        """Format URI from the user.
 
-        return snippet
+        This method makes sure that the URI or path received from user is in
+        correct format.
 
-    def _read_tldr_data(self, tldr):
-        """Parse and format tldr man page ``data`` attribute.
+        The trailing slash is added if the URI is not pointing to a file. The
+        trailing slash allows ``ulrjoin`` to add path objects like filenames
+        to the URI without removing the last object in the URI path.
 
-        Args
-            tldr (str): A tldr snippet in a text string.
+        Args:
+            uri (str): URI or path received from the ``--file`` CLI option.
 
         Returns:
-            tuple: Formatted list of tldr man page snippets.
+            str: Formatted URI for the plugin.
         """
 
-        data = []
-        match = self.RE_CATCH_TLDR_SNIPPETS.search(tldr)
-        if match:
-            snippets = self.RE_CATCH_TLDR_SNIPPET.findall(match.group("snippets"))
-            if any(snippets):
-                snippets = self._format_list(snippets)
-                for snippet in snippets:
-                    match = self.RE_CATCH_TLDR_SNIPPET_COMMAND.search(snippet)
-                    if match:
-                        comment = self.RE_MATCH_STRING_LAST_COLUMN.sub(
-                            ".", match.group("comment")
-                        )
-                        data.append(
-                            match.group("command") + Const.SNIPPET_COMMENT + comment
-                        )
-                    else:
-                        self._logger.debug(
-                            "parser was not able to read tldr snippet: %s", snippet
-                        )
-            else:
-                self._logger.debug(
-                    "parser did not find tldr snippets from snippet section: %s",
-                    snippets,
-                )
+        uri_ = uri if uri else self.TLDR_DEFAULT_URI
+        _, file_extension = os.path.splitext(urlparse(uri_).path)
+        is_file = file_extension in (".md", ".zip") or os.path.isfile(uri_)
+        if not is_file and not uri_.endswith("/"):
+            uri_ = uri_ + "/"
+
+        return uri_
+
+    def _read_tldr_pages(self):
+        """Read all ``tldr pages`` from the URI.
+
+        In the stream mode only the page index is read here and the pages
+        are read and parsed when the iterator is consumed.
+        """
+
+        if Snapshot.is_snapshot(self._uri):
+            self._read_snapshot(self._uri)
+            return
+
+        tree = self._github.get_tree(self._uri) if self._options["archive"] else None
+        if tree:
+            self._read_github_archive(tree)
+            return
+
+        try:
+            pages = self._get_tlrd_pages(self._uri)
+        except RateLimitError:
+            tree = self._github.get_tree(self._uri)
+            if not tree:
+                raise
+            self._logger.debug("github api rate limit reached, read archive")
+            self._read_github_archive(tree)
+            return
+
+        if self._selector.key():
+            pages = self._selector.select_pages(pages, self._metadata.sizes)
+        self._metadata.source["translations"] = [name for name in pages if name]
+        if self._options["dedup"]:
+            self._pages = self._selector.dedup_pages(pages, self._get_page_sha)
+            kept = set(uri for uri, _ in self._pages)
+            self._texts = {uri: self._texts[uri] for uri in self._texts if uri in kept}
+        else:
+            self._pages = [
+                (uri, platform)
+                for translation in pages
+                for platform in pages[translation]
+                for uri in pages[translation][platform]
+            ]
+        if self._options["stream"]:
+            self._stream = self._read_pages(self._pages)
         else:
-            self._logger.debug("parser did not find tldr snippets at all: %s", tldr)
+            self._snippets.extend(self._read_pages(self._pages))
 
-        return Parser.format_data(Const.SNIPPET, data)
+    def _read_github_archive(self, tree):
+        """Read tldr pages from GitHub branch archive.
 
-    def _read_tldr_brief(self, tldr):
-        """Parse and format tldr man page ``brief`` attribute.
+        Args:
+            tree (GitHubTree): GitHub branch, translations and platforms.
+        """
+
+        archive = GitHubArchive(
+            self._logger, self._options, self._client, self._selector, self._parser
+        )
+        records, translations = archive.read(tree)
+        if translations is not None:
+            self._metadata.source.update(branch=tree.branch, translations=translations)
+        self._snippets.extend(self._index_records(records))
+        self._finish()
+
+    def _get_page_sha(self, uri):
+        """Get git blob SHA of a tldr page.
 
-        Args
-            tldr (str): A tldr snippet in a text string.
+        The SHA is taken from the GitHub tree listing or from the git
+        repository when it is known. Local pages are read and hashed. The
+        text of a hashed page is kept so that the page is not read again
+        when it is parsed.
+
+        Args:
+            uri (str): URI or path of the tldr page.
 
         Returns:
-            str: Utf-8 encoded unicode string.
+            str: Git blob SHA or None if it is not known.
         """
 
-        brief = ""
-        match = self.RE_CATCH_TLDR_DESCRIPTION.search(tldr)
-        if match:
-            brief = self._format_brief(match.group("description"))
+        sha = self._metadata.blobs.get(uri)
+        if sha or "http" in urlparse(uri).scheme:
+            return sha
+        try:
+            _, page = self._fetch_tldr_page(uri)
+        except (IOError, OSError) as error:
+            self._logger.debug("failed to read: %s :%s", uri, error)
+            return None
+        if page is None:
+            return None
+        self._texts[uri] = page
+
+        return PageCache.blob_sha(page.encode("utf-8"))
+
+    def _read_snapshot(self, path):
+        """Read parsed snippets from a snapshot.
+
+        Args:
+            path (str): Path to the snapshot file.
+        """
+
+        snapshot = Snapshot(self._logger, path)
+        self._metadata.source = snapshot.metadata
+        self._logger.debug(
+            "read %d records from tldr snapshot: %s :source: %s",
+            snapshot.count,
+            path,
+            self._metadata.source,
+        )
+        if self._options["stream"]:
+            self._snapshot = snapshot
+            self._stream = self._index_records(snapshot)
+        else:
+            self._snippets.extend(self._index_records(snapshot))
+            self._finish()
+
+    def _finish(self):
+        """Finish the import after all tldr pages are read."""
+
+        self._logger.debug("import metrics: %s", self.metrics)
+        if self._parser.cache:
+            self._parser.cache.save()
+        if self._git:
+            self._git.close()
+        if self._zip:
+            self._zip.close()
+        if self._state and self._state.changed and self._parser.state.failed:
+            self._logger.debug(
+                "sync state not updated after %d failed tldr pages",
+                len(self._parser.state.failed),
+            )
+        elif self._state:
+            self._state.save()
 
-        return Parser.format_brief(Const.SNIPPET, brief)
+    def _get_tlrd_pages(self, uri):
+        """Get all ``tldr pages``.
 
-    def _read_tldr_description(self, tldr):
-        """Parse and format tldr man page ``description`` attribute.
+        Read all tldr pages from the given URI. The pages are returned in a
+        dictionary that contains keys for translations and tldr platforms.
+        The tldr pages are in a list of full GitHub raw URLs under each
+        platform.
 
-        Args
-            tldr (str): A tldr snippet in a text string.
+        Args:
+            uri (str): URI where the tldr pages are read.
 
         Returns:
-            str: Utf-8 encoded unicode string.
+            dict: All tldr pages with GitHib raw URL.
         """
 
-        description = ""
-        match = self.RE_CATCH_TLDR_DESCRIPTION.search(tldr)
-        if match:
-            description = self._format_description(match.group("description"))
+        if self._options["ref"]:
+            self._git = GitRepository(self._logger, uri)
+            pages = self._git.get_pages(self._options["ref"], self._metadata)
+        else:
+            pages = self._github.get_page(uri)
+        tree = self._github.get_tree(uri) if pages is None else None
+        if tree:
+            pages = self._github.get_pages(
+                tree, self._state, self._options["recursive"]
+            )
+        elif pages is None:
+            pages = self._get_local_pages(uri)
+        self._logger.debug(
+            "read total of %d tldr pages from %d translations and %d platforms",
+            *TldrPages.count(pages)
+        )
 
-        return Parser.format_description(Const.SNIPPET, description)
+        return pages
 
-    def _read_tldr_name(self, tldr):
-        """Parse and format tldr man page ``name`` attribute.
+    def _get_local_pages(self, uri):
+        """Get all tldr pages from a local path or zip bundle.
 
-        Args
-            tldr (str): A tldr snippet in a text string.
+        Args:
+            uri (str): Path where the tldr pages are read.
 
         Returns:
-            str: Utf-8 encoded unicode string.
+            dict: All local tldr pages.
         """
 
-        name = ""
-        match = self.RE_CATCH_TLDR_HEADER.search(tldr)
-        if match:
-            name = match.group("header")
+        pages = {}
+        readable = os.access(uri, os.R_OK)
+        if readable and os.path.isfile(uri) and zipfile.is_zipfile(uri):
+            self._zip = ZipBundle(self._logger, uri)
+            pages = self._zip.list_pages()
+        elif readable and (os.path.isfile(uri) or os.path.isdir(uri)):
+            for path, translation, platform in self._local.walk(uri):
+                pages.setdefault(translation, {}).setdefault(platform, []).append(path)
+            if self._state and self._selector.key():
+                pages = self._selector.select_pages(pages, self._metadata.sizes)
+            if self._state:
+                key = os.path.abspath(uri)
+                if self._selector.key():
+                    key = key + ":" + self._selector.key()
+                manifest = LocalManifest(self._logger, self._state, key)
+                pages = manifest.changed(pages)
+                self._metadata.deleted.extend(manifest.deleted)
+        else:
+            Cause.push(
+                Cause.HTTP_FORBIDDEN,
+                "local tldr pages cannot be read: {}".format(uri),
+            )
 
-        return Parser.format_name(Const.SNIPPET, name)
+        return pages
 
-    @staticmethod
-    def _format_list(data):
-        """Remove empty strings and trim newlines from a list.
+    def _read_pages(self, pages):
+        """Read tldr pages.
 
-        Args
-            data (list): List of strings.
+        The pages are fetched with a bounded pool of worker threads when more
+        than one worker is configured or when the pages are streamed. The
+        workers only wait for the network or the file system while the pages
+        are parsed in the calling thread. At most ``read_ahead`` pages are
+        fetched ahead of the parsed page. The results are consumed in the same
+        order as the pages were given which keeps the order of the snippets
+        deterministic.
+
+        Local pages are read and parsed in worker processes when more than
+        one process is configured. Pages in a local git repository or in a zip
+        bundle are always read in the calling process from one open source.
+
+        Args:
+            pages (list): List of tldr page URI and platform tuples.
 
         Returns:
-            list: Formatted list of tldr man page snippets.
+            generator: Parsed and validated snippets in compact records.
         """
 
-        list_ = [value.strip() for value in data]
-        list_ = list(filter(None, list_))
+        processes = min(self._options["processes"], len(pages))
+        local = "http" not in urlparse(self._uri).scheme
+        if processes > 1 and local and not self._git and not self._zip:
+            pages = [
+                (uri, platform, self._texts.pop(uri, None)) for uri, platform in pages
+            ]
+            records = self._parser.parse_local(pages, processes)
+        else:
+            records = self._parser.validate_snippets(self._read_snippets(pages))
+        for record in self._index_records(records):  # pylint: disable=use-yield-from
+            yield record
+        self._finish()
 
-        return list_
+    def _index_records(self, records):
+        """Add records to the example index when the index is enabled.
 
-    def _format_brief(self, brief):
-        """Format brief description for tldr man page.
+        Args:
+            records (iterable): Compact records.
 
-        Remove additional Markdown tokens like '>' and limit the length of
-        the string to be more suitable for content ``brief`` attribute.
+        Returns:
+            generator: The same compact records.
+        """
 
-        The last dot is removed because it is not considered part of the
-        ``brief`` attribute for styling issue.
+        for record in records:
+            if self._index is not None:
+                self._index.add(record)
+            yield record
 
-        Args
-            brief (str): Brief read from the tldr man page.
+    def _read_snippets(self, pages):
+        """Read and parse tldr pages in the calling process.
+
+        Args:
+            pages (list): List of tldr page URI and platform tuples.
 
         Returns:
-            str: Tldr specific format for the ``brief`` attribute.
+            generator: Parsed snippets.
         """
 
-        brief = self.RE_MATCH_MKDN_BLOCK_QUOTE_TOKEN.sub("", brief)
-        match = self.RE_CATCH_FIRST_SENTENCE.search(brief)
-        if match:
-            brief = self._limit_string(match.group("sentence").rstrip("."), 40)
+        workers = min(self._options["workers"], len(pages))
+        if workers <= 1 and not self._options["stream"]:
+            for uri, platform in pages:
+                snippet = self._read_tldr_page(uri, platform)
+                if snippet:
+                    yield snippet
+            return
+
+        def submit(pages_):
+            """Submit tldr pages to be fetched by the workers."""
+
+            for uri, platform in pages_:
+                result = pool.apply_async(self._fetch_tldr_page, (uri,))
+                window.append((uri, platform, result))
+
+        workers = max(workers, 1)
+        self._logger.debug("fetch %d tldr pages with %d workers", len(pages), workers)
+        pool = ThreadPool(workers)
+        queue = iter(pages)
+        window = deque()
+        try:
+            submit(islice(queue, max(workers, self._options["read_ahead"])))
+            while window:
+                uri, platform, result = window.popleft()
+                submit(islice(queue, 1))
+                source, page = result.get()
+                snippet = self._parser.parse(uri, source, platform, page)
+                if snippet:
+                    yield snippet
+        finally:
+            pool.close()
+            pool.join()
 
-        return brief
+    def _read_tldr_page(self, uri, platform):
+        """Read a tldr page.
 
-    def _format_description(self, description):
-        """Format tldr man page description.
+        Args:
+            uri (str): URI or path where the tldr file is read.
+            platform (str): Platform where the page is stored.
 
-        Remove additional Markdown tokens like '>' from the description.
+        Returns:
+            dict: Parsed snippet or None if the page could not be read.
+        """
+
+        source, page = self._fetch_tldr_page(uri)
 
-        Args
-            description (str): Description read from the tldr man page.
+        return self._parser.parse(uri, source, platform, page)
+
+    def _fetch_tldr_page(self, uri):
+        """Fetch a tldr page from GitHub, local git repository, zip or file.
+
+        Args:
+            uri (str): URI or path where the tldr file is read.
 
         Returns:
-            str: Tldr specific format for the ``description`` attribute.
+            tuple: Source link and the tldr page in a text string.
         """
 
-        return self.RE_MATCH_MKDN_BLOCK_QUOTE_TOKEN.sub("", description)
+        page = self._texts.pop(uri, None)
+        if page is not None:
+            return "", page
+        uri = GitHubPages.RE_MATCH_GITHUB_URL.sub(GitHubPages.GITHUB_RAW, uri)
+        source = uri
+        if self._git:
+            page = self._git.read_page(uri)
+        elif self._zip:
+            page = self._zip.read(uri)
+            source = ""
+        elif "http" in urlparse(uri).scheme:
+            page = self._github.read(uri)
+        else:
+            page = self._local.read(uri)
+            source = ""
 
-    @staticmethod
-    def _limit_string(string_, len_):
-        """Limit the string length"""
+        return source, page
+
+    def is_api_error(self, http):
+        """Test if GitHub API response was an error.
+
+        Args:
+            http (obj): Request package response object.
+
+        Returns:
+            bool: True in case of REST API error response.
+        """
+
+        return self._client.is_error(http)
+
+    def _parse_tldr_page(self, source, platform, page):
+        """Parse one tldr man page.
+
+        Args:
+            source (str): A link where the tldr man page was read.
+            platform (str, tuple): Platform or platforms where the tldr page belongs.
+            page (str): A tldr man page in a text string.
+
+        Returns:
+            dict: JSON structure from a tldr man page.
+        """
 
-        return string_ if len(string_) <= len_ else string_[0 : len_ - 3] + "..."
+        return self._parser.parse_page(source, platform, page)
 
     # Python 3 compatible iterator [1].
     #
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""record: Compact snippet records for parsed tldr pages."""
+
+try:
+    from sys import intern
+except ImportError:  # pragma: no cover
+    pass  # Python 2 has intern as a built-in function.
+
+
+class TldrRecord(object):  # pylint: disable=too-many-instance-attributes
+    """Compact record for one parsed tldr page.
+
+    A parsed tldr page is stored in a slotted object instead of a dictionary.
+    The values that repeat between tldr pages, like ``category``, ``groups``
+    and ``tags``, are interned so that all records share the same objects.
+    The ``links`` are not stored when they contain only the ``source`` link.
+
+    The record is converted to a Snippy JSON dictionary only when it is
+    returned from the plugin iterator. Records can be pickled to send them
+    from worker processes and the shared values are interned again when
+    the record is unpickled.
+    """
+
+    __slots__ = (
+        "category",
+        "data",
+        "brief",
+        "description",
+        "name",
+        "groups",
+        "tags",
+        "links",
+        "source",
+    )
+
+    _interned = {}
+
+    def __init__(self, snippet):
+        self.category = self._intern_string(snippet["category"])
+        self.data = tuple(snippet["data"])
+        self.brief = snippet["brief"]
+        self.description = snippet["description"]
+        self.name = self._intern_string(snippet["name"])
+        self.groups = self._intern(snippet["groups"])
+        self.tags = self._intern(snippet["tags"])
+        self.source = snippet["source"]
+        self.links = None
+        if list(snippet["links"]) != ([self.source] if self.source else []):
+            self.links = tuple(snippet["links"])
+
+    def __getstate__(self):
+        """Return the record values for pickle."""
+
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __setstate__(self, state):
+        """Restore the record values from pickle."""
+
+        for slot, value in zip(self.__slots__, state):
+            setattr(self, slot, value)
+        self.category = self._intern_string(self.category)
+        self.name = self._intern_string(self.name)
+        self.groups = self._intern(self.groups)
+        self.tags = self._intern(self.tags)
+
+    def to_dict(self):
+        """Convert the record to a Snippy JSON dictionary.
+
+        Returns:
+            dict: Snippet in a Snippy JSON dictionary.
+        """
+
+        links = self.links
+        if links is None:
+            links = (self.source,) if self.source else ()
+
+        return {
+            "category": self.category,
+            "data": list(self.data),
+            "brief": self.brief,
+            "description": self.description,
+            "name": self.name,
+            "groups": list(self.groups),
+            "tags": list(self.tags),
+            "links": list(links),
+            "source": self.source,
+        }
+
+    @classmethod
+    def _intern(cls, values):
+        """Intern a list of strings.
+
+        Args:
+            values (list): List of strings.
+
+        Returns:
+            tuple: Shared tuple of interned strings.
+        """
+
+        values = tuple(cls._intern_string(value) for value in values)
+
+        return cls._interned.setdefault(values, values)
+
+    @staticmethod
+    def _intern_string(value):
+        """Intern a string.
+
+        Python 2 can intern only byte strings and unicode strings are
+        returned as they are.
+
+        Args:
+            value (str): String to be interned.
+
+        Returns:
+            str: Interned string.
+        """
+
+        try:
+            return intern(value)
+        except TypeError:
+            return value
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""schema: Precompiled JSON schema validation for parsed tldr pages."""
+
+import warnings
+
+from snippy.plugins import Schema
+
+
+class SnippetValidator(object):
+    """Validate parsed snippets in batches.
+
+    The Snippy plugin JSON schema is compiled to plain Python checks when
+    the validator is created. The schema uses only a small set of JSON
+    schema keywords and the compiled checks are much faster than the
+    generic JSON schema validator. A snippet that fails the compiled checks
+    is validated again with the Snippy ``Schema`` which produces the same
+    result, error causes and logs as validating the snippet directly with
+    the Snippy ``Schema``.
+
+    The schema is validated only with the Snippy ``Schema`` if it contains
+    keywords that are not supported by the compiled checks.
+    """
+
+    # Keywords that do not affect the validation result.
+    ANNOTATIONS = ("$comment", "$schema", "default", "description", "examples", "title")
+
+    # JSON schema types and Python types that are accepted for them.
+    TYPES = {"array": list, "object": dict, "string": str}
+
+    def __init__(self, logger, schema=None):
+        self._logger = logger
+        self._schema = schema if schema else Schema()
+        self._check = self._compile_schema()
+
+    @property
+    def compiled(self):
+        """Test if the schema was compiled.
+
+        Returns:
+            bool: True if the snippets are validated with compiled checks.
+        """
+
+        return self._check is not None
+
+    def validate(self, snippets):
+        """Validate a batch of snippets.
+
+        Args:
+            snippets (list): Parsed snippets.
+
+        Returns:
+            list: True for each valid snippet and False for invalid snippet.
+        """
+
+        check = self._check
+        if check is None:
+            return [self._schema.validate(snippet) for snippet in snippets]
+
+        return [
+            check(snippet) or self._schema.validate(snippet) for snippet in snippets
+        ]
+
+    def _compile_schema(self):
+        """Compile the Snippy plugin schema.
+
+        Returns:
+            callable: Compiled check for one snippet or None.
+        """
+
+        validator = getattr(self._schema, "_schema", None)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", DeprecationWarning)
+            resolver = getattr(validator, "resolver", None)
+        schema = getattr(validator, "schema", None)
+        if resolver is None or not isinstance(schema, dict):
+            self._logger.debug("snippet schema not compiled: unknown validator")
+            return None
+        try:
+            return self._compile(schema, resolver)
+        except (KeyError, TypeError, ValueError) as error:
+            self._logger.debug("snippet schema not compiled: %s", error)
+
+        return None
+
+    def _compile(self, schema, resolver):  # pylint: disable=too-many-branches
+        """Compile one JSON schema to a check.
+
+        Args:
+            schema (dict): JSON schema.
+            resolver (obj): JSON schema reference resolver.
+
+        Returns:
+            callable: Check that returns True for a valid instance.
+
+        Raises:
+            ValueError: The schema contains keywords that are not supported.
+        """
+
+        if not isinstance(schema, dict):
+            raise ValueError("unsupported schema: %s" % schema)
+        if "$ref" in schema:
+            # Keywords next to the reference are ignored in the draft 7.
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", DeprecationWarning)
+                with resolver.resolving(schema["$ref"]) as resolved:
+                    return self._compile(resolved, resolver)
+        checks = []
+        for keyword in schema:
+            if keyword in self.ANNOTATIONS or keyword == "additionalProperties":
+                continue
+            if keyword == "type":
+                checks.append(self._compile_type(schema[keyword]))
+            elif keyword == "enum":
+                checks.append(self._compile_enum(schema[keyword]))
+            elif keyword == "items":
+                checks.append(self._compile_items(schema[keyword], resolver))
+            elif keyword == "properties":
+                additional = schema.get("additionalProperties", True)
+                checks.append(
+                    self._compile_properties(schema[keyword], additional, resolver)
+                )
+            elif keyword == "oneOf":
+                checks.append(self._compile_one_of(schema[keyword], resolver))
+            else:
+                raise ValueError("unsupported keyword: %s" % keyword)
+        if "additionalProperties" in schema and "properties" not in schema:
+            raise ValueError("unsupported keyword: additionalProperties")
+
+        return lambda instance: all(check(instance) for check in checks)
+
+    def _compile_type(self, type_):
+        """Compile the ``type`` keyword."""
+
+        if type_ not in self.TYPES:
+            raise ValueError("unsupported type: %s" % type_)
+        class_ = self.TYPES[type_]
+
+        return lambda instance: isinstance(instance, class_)
+
+    @staticmethod
+    def _compile_enum(enum):
+        """Compile the ``enum`` keyword with string values."""
+
+        if not all(isinstance(value, str) for value in enum):
+            raise ValueError("unsupported enum: %s" % enum)
+        values = frozenset(enum)
+
+        return lambda instance: isinstance(instance, str) and instance in values
+
+    def _compile_items(self, items, resolver):
+        """Compile the ``items`` keyword with one schema for all items."""
+
+        check = self._compile(items, resolver)
+
+        return lambda instance: not isinstance(instance, list) or all(
+            check(item) for item in instance
+        )
+
+    def _compile_properties(self, properties, additional, resolver):
+        """Compile the ``properties`` and ``additionalProperties`` keywords."""
+
+        if not isinstance(additional, bool):
+            raise ValueError("unsupported additionalProperties: %s" % additional)
+        checks = {
+            name: self._compile(schema, resolver) for name, schema in properties.items()
+        }
+        names = frozenset(checks)
+
+        def check(instance):
+            """Check the object properties."""
+
+            if not isinstance(instance, dict):
+                return True
+            if not additional and not names.issuperset(instance):
+                return False
+
+            return all(
+                checks[name](value)
+                for name, value in instance.items()
+                if name in checks
+            )
+
+        return check
+
+    def _compile_one_of(self, schemas, resolver):
+        """Compile the ``oneOf`` keyword."""
+
+        checks = [self._compile(schema, resolver) for schema in schemas]
+
+        return lambda instance: sum(1 for check in checks if check(instance)) == 1
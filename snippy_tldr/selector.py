@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""selector: Select the imported tldr pages from the page index."""
+
+import fnmatch
+
+from collections import OrderedDict
+
+try:
+    from urllib.parse import urlparse
+except ImportError:
+    from urlparse import urlparse
+
+from snippy_tldr.pages import TldrPages
+
+
+class PageSelector(object):
+    """Select tldr pages with the selector and dedup options.
+
+    The selector options limit the imported translations, platforms and
+    pages. Identical pages are removed with the ``dedup`` option. The pages
+    are selected from the page index before any page is read which means
+    that the pages that are not imported are not fetched or parsed at all.
+    """
+
+    # Options that select imported tldr pages.
+    SELECTORS = (
+        "pages",
+        "platforms",
+        "skip_platforms",
+        "translations",
+        "skip_translations",
+        "max_pages",
+    )
+
+    def __init__(self, logger, options):
+        self._logger = logger
+        self._options = options
+        self.filtered = {"pages": 0, "requests": 0, "bytes": 0}
+        self.duplicates = []
+
+    def key(self):
+        """Get selector options that are set.
+
+        Returns:
+            str: Selector options and values or empty string if none is set.
+        """
+
+        selectors = []
+        for option in self.SELECTORS:
+            value = self._options[option]
+            if value:
+                if isinstance(value, tuple):
+                    value = ",".join(value)
+                selectors.append("%s=%s" % (option, value))
+
+        return ";".join(selectors)
+
+    def select(self, option, values):
+        """Select translations or platforms with allow and deny lists.
+
+        Args:
+            option (str): The ``translations`` or ``platforms`` option.
+            values (tuple): Translations or platforms.
+
+        Returns:
+            tuple: Selected translations or platforms.
+        """
+
+        allow = self._options[option]
+        deny = self._options["skip_" + option]
+
+        return tuple(
+            value
+            for value in values
+            if (not allow or value in allow) and value not in deny
+        )
+
+    def is_selected(self, page):
+        """Test if a tldr page name matches the page name globs.
+
+        Args:
+            page (str): Tldr page file name, link or path.
+
+        Returns:
+            bool: True if the page is selected.
+        """
+
+        if not self._options["pages"]:
+            return True
+        name = page.replace("\\", "/").rsplit("/", 1)[-1]
+        if name.endswith(".md"):
+            name = name[:-3]
+
+        return any(fnmatch.fnmatchcase(name, glob) for glob in self._options["pages"])
+
+    def select_pages(self, pages, sizes):
+        """Select tldr pages from the page index.
+
+        The selector options are applied to the page index before any page
+        is read. The pages that are not selected are counted with the
+        requests and bytes that were saved when the pages are not fetched.
+        The size of a page is known only from the GitHub tree listing.
+
+        Args:
+            pages (dict): All tldr pages in translations and platforms.
+            sizes (dict): Known sizes of the tldr pages.
+
+        Returns:
+            dict: Selected tldr pages in translations and platforms.
+        """
+
+        selected = {}
+        count = 0
+        limit = self._options["max_pages"]
+        for translation in pages:
+            for platform in pages[translation]:
+                uris = []
+                for uri in pages[translation][platform]:
+                    if (
+                        (not limit or count < limit)
+                        and self.select("translations", (translation,))
+                        and self.select("platforms", (platform,))
+                        and self.is_selected(uri)
+                    ):
+                        uris.append(uri)
+                        count = count + 1
+                        continue
+                    self.filtered["pages"] = self.filtered["pages"] + 1
+                    if "http" in urlparse(uri).scheme:
+                        self.filtered["requests"] = self.filtered["requests"] + 1
+                        self.filtered["bytes"] = self.filtered["bytes"] + (
+                            sizes.get(uri) or 0
+                        )
+                if uris:
+                    selected.setdefault(translation, {})[platform] = uris
+        self._logger.debug(
+            "selected %d tldr pages with %s :filtered: %s",
+            count,
+            self.key(),
+            self.filtered,
+        )
+
+        return selected
+
+    def dedup_pages(self, pages, get_sha):
+        """Remove identical tldr pages from the page index.
+
+        Identical pages are found with the git blob SHA. Only one of
+        identical pages is kept and it is imported with all platforms of the
+        identical pages. The kept page is the English ``pages`` translation
+        when it exists and then the first page in the order of the tldr
+        platforms. This keeps the result the same regardless of the order of
+        the page listing. The platforms are merged before the page is read
+        which means that the duplicates are not fetched or parsed at all.
+
+        Args:
+            pages (dict): All tldr pages in translations and platforms.
+            get_sha (callable): Function to get the git blob SHA of a page.
+
+        Returns:
+            list: List of unique tldr page URI and platform tuples.
+        """
+
+        def canonical(page):
+            """Sort key to select the kept page from identical pages."""
+
+            position, _, platform, translation = page
+            return (
+                translation != TldrPages.TLDR_TRANSLATION,
+                translation is not None,
+                (
+                    TldrPages.TLDR_PLATFORMS.index(platform)
+                    if platform in TldrPages.TLDR_PLATFORMS
+                    else len(TldrPages.TLDR_PLATFORMS)
+                ),
+                position,
+            )
+
+        identical = OrderedDict()
+        position = 0
+        for translation in pages:
+            for platform in pages[translation]:
+                for uri in pages[translation][platform]:
+                    sha = get_sha(uri) or uri
+                    page = (position, uri, platform, translation)
+                    identical.setdefault(sha, []).append(page)
+                    position = position + 1
+        unique = []
+        duplicates = []
+        for copies in identical.values():
+            kept = min(copies, key=canonical)
+            unique.append((kept[0], kept[1], [page[2] for page in copies]))
+            duplicates.extend(
+                (page[0], page[1], kept[1]) for page in copies if page != kept
+            )
+        self.duplicates.extend((uri, kept) for _, uri, kept in sorted(duplicates))
+        self._logger.debug(
+            "removed %d duplicate tldr pages from %d pages",
+            len(self.duplicates),
+            position,
+        )
+
+        return [
+            (uri, self._merge_platforms(platforms))
+            for _, uri, platforms in sorted(unique)
+        ]
+
+    @staticmethod
+    def _merge_platforms(platforms):
+        """Merge platforms of identical tldr pages.
+
+        Args:
+            platforms (list): Platforms of identical tldr pages.
+
+        Returns:
+            obj: Platform, tuple of sorted platforms or None.
+        """
+
+        platforms = tuple(sorted(set(platform for platform in platforms if platform)))
+        if len(platforms) > 1:
+            return platforms
+
+        return platforms[0] if platforms else None
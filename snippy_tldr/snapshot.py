@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""snapshot: Binary snapshots of parsed tldr pages."""
+
+import json
+import os
+import struct
+
+from snippy_tldr.cache import atomic_write
+from snippy_tldr.record import TldrRecord
+
+
+class Snapshot(object):
+    """Read and write snapshots of parsed tldr pages.
+
+    A snapshot stores parsed snippets and metadata about their source in one
+    file. The file starts with a magic string and the number of records.
+    The metadata and each record follow in frames that have the frame size
+    before a compact JSON payload. A record payload is a list of the values
+    in the ``TldrRecord`` slots. This allows reading the records one by one
+    without parsing the tldr pages again. Snapshots do not use ``pickle`` and
+    reading a snapshot never runs code from the file.
+
+    The snapshot file is kept open until all records are read or until the
+    snapshot is closed. The snapshot can be used as a context manager that
+    closes the file.
+    """
+
+    MAGIC = b"SNIPPY-TLDR-SNAPSHOT-1\n"
+
+    _COUNT = struct.Struct(">Q")
+    _FRAME = struct.Struct(">I")
+
+    def __init__(self, logger, path):
+        self._logger = logger
+        self._path = path
+        self._file = open(path, "rb")  # pylint: disable=consider-using-with
+        try:
+            self._file.read(len(self.MAGIC))
+            self.count = self._COUNT.unpack(self._file.read(self._COUNT.size))[0]
+            metadata = self._read_frame()
+            self.metadata = json.loads(metadata.decode("utf-8")) if metadata else {}
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __iter__(self):
+        """Read records from the snapshot.
+
+        Returns:
+            generator: Compact records.
+        """
+
+        try:
+            for _ in range(self.count):
+                payload = self._read_frame()
+                if payload is None:
+                    self._logger.debug("truncated tldr snapshot: %s", self._path)
+                    break
+                state = json.loads(payload.decode("utf-8"))
+                state[1] = tuple(state[1])
+                if state[7] is not None:
+                    state[7] = tuple(state[7])
+                record = TldrRecord.__new__(TldrRecord)
+                record.__setstate__(state)
+                yield record
+        finally:
+            self.close()
+
+    def close(self):
+        """Close the snapshot file."""
+
+        self._file.close()
+
+    @classmethod
+    def is_snapshot(cls, path):
+        """Test if a file is a snapshot.
+
+        Args:
+            path (str): Path to a file.
+
+        Returns:
+            bool: True if the file is a snapshot.
+        """
+
+        if not os.path.isfile(path):
+            return False
+        try:
+            with open(path, "rb") as infile:
+                return infile.read(len(cls.MAGIC)) == cls.MAGIC
+        except (IOError, OSError):
+            return False
+
+    @classmethod
+    def write(cls, logger, path, metadata, records):
+        """Write a snapshot.
+
+        The snapshot is written to a temporary file that replaces the
+        snapshot when all records are written. The records can be any
+        iterable and they are written one by one.
+
+        Args:
+            logger (obj): Logger.
+            path (str): Path to the snapshot file.
+            metadata (dict): JSON serializable metadata about the source.
+            records (iterable): Compact records.
+
+        Returns:
+            int: Number of written records or None if writing failed.
+        """
+
+        count = 0
+        try:
+            with atomic_write(path) as temp, open(temp, "wb") as outfile:
+                outfile.write(cls.MAGIC)
+                outfile.write(cls._COUNT.pack(0))
+                cls._write_frame(outfile, metadata)
+                for record in records:
+                    cls._write_frame(outfile, list(record.__getstate__()))
+                    count = count + 1
+                outfile.seek(len(cls.MAGIC))
+                outfile.write(cls._COUNT.pack(count))
+        except (IOError, OSError) as error:
+            logger.debug("failed to write tldr snapshot: %s :%s", path, error)
+            return None
+        logger.debug("wrote %d records to tldr snapshot: %s", count, path)
+
+        return count
+
+    @classmethod
+    def _write_frame(cls, outfile, value):
+        """Write one JSON value in a frame.
+
+        Args:
+            outfile (file): Snapshot file.
+            value (obj): JSON serializable value.
+        """
+
+        payload = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        payload = payload.encode("utf-8")
+        outfile.write(cls._FRAME.pack(len(payload)))
+        outfile.write(payload)
+
+    def _read_frame(self):
+        """Read one frame payload.
+
+        Returns:
+            bytes: Frame payload or None if the file ends.
+        """
+
+        header = self._file.read(self._FRAME.size)
+        if len(header) != self._FRAME.size:
+            return None
+        size = self._FRAME.unpack(header)[0]
+        payload = self._file.read(size)
+        if len(payload) != size:
+            return None
+
+        return payload
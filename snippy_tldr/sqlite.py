@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""sqlite: SQLite database export with full-text search for parsed tldr pages."""
+
+import json
+import sqlite3
+
+from snippy.plugins import Const
+
+from snippy_tldr.cache import atomic_write
+
+
+class SqliteExport(object):  # pylint: disable=too-few-public-methods
+    """Write parsed tldr pages to a SQLite database.
+
+    The database has a ``pages`` table for parsed tldr pages and an
+    ``examples`` table for the commands and comments of each page. The
+    ``search`` table is an FTS5 full-text index over the page ``name``,
+    ``brief`` and ``description`` and the example ``command`` and ``comment``.
+    The index has one row for each example and one row for a page without
+    examples. The ``page_id`` and ``example_id`` columns in the index refer
+    to the other tables. The source metadata is stored in the ``metadata``
+    table.
+
+    The database is written to a temporary file that replaces the database
+    when all pages are written. The rows are inserted in batches that are
+    each committed in one transaction.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE metadata (key TEXT PRIMARY KEY, value TEXT)",
+        "CREATE TABLE pages (id INTEGER PRIMARY KEY, name TEXT, brief TEXT, "
+        "description TEXT, groups TEXT, tags TEXT, links TEXT, source TEXT)",
+        "CREATE TABLE examples (id INTEGER PRIMARY KEY, "
+        "page_id INTEGER REFERENCES pages (id), command TEXT, comment TEXT)",
+        "CREATE INDEX examples_page_id ON examples (page_id)",
+    )
+
+    SEARCH = (
+        "CREATE VIRTUAL TABLE search USING fts5(name, brief, description, "
+        "command, comment, page_id UNINDEXED, example_id UNINDEXED)"
+    )
+
+    @classmethod
+    def write(cls, logger, path, metadata, records, batch=1000):
+        """Write a SQLite database.
+
+        Args:
+            logger (obj): Logger.
+            path (str): Path to the database file.
+            metadata (dict): JSON serializable metadata about the source.
+            records (iterable): Compact records.
+            batch (int): Number of pages inserted in one transaction.
+
+        Returns:
+            int: Number of written pages or None if writing failed.
+        """
+
+        count = 0
+        try:
+            with atomic_write(path) as temp:
+                connection = sqlite3.connect(temp)
+                try:
+                    search = cls._create_tables(logger, connection)
+                    connection.executemany(
+                        "INSERT INTO metadata VALUES (?, ?)",
+                        [(key, json.dumps(value)) for key, value in metadata.items()],
+                    )
+                    pending = []
+                    for record in records:
+                        pending.append(record)
+                        if len(pending) >= batch:
+                            count = count + cls._insert(connection, pending, search)
+                            pending = []
+                    count = count + cls._insert(connection, pending, search)
+                    if search:
+                        connection.execute(
+                            "INSERT INTO search(search) VALUES ('optimize')"
+                        )
+                        connection.commit()
+                finally:
+                    connection.close()
+        except (IOError, OSError, sqlite3.Error) as error:
+            logger.debug("failed to write tldr database: %s :%s", path, error)
+            return None
+        logger.debug("wrote %d pages to tldr database: %s", count, path)
+
+        return count
+
+    @classmethod
+    def _create_tables(cls, logger, connection):
+        """Create database tables.
+
+        The database is a new temporary file that replaces the database only
+        after it is completely written. Because of this the rollback journal
+        and disk synchronization are not needed.
+
+        Args:
+            logger (obj): Logger.
+            connection (obj): SQLite connection.
+
+        Returns:
+            bool: True if the full-text index was created.
+        """
+
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        for statement in cls.SCHEMA:
+            connection.execute(statement)
+        try:
+            connection.execute(cls.SEARCH)
+        except sqlite3.OperationalError as error:
+            logger.debug("sqlite full-text index not created: %s", error)
+            return False
+        connection.commit()
+
+        return True
+
+    @staticmethod
+    def _insert(connection, records, search):
+        """Insert a batch of records in one transaction.
+
+        Args:
+            connection (obj): SQLite connection.
+            records (list): Compact records.
+            search (bool): Insert the records to the full-text index.
+
+        Returns:
+            int: Number of inserted pages.
+        """
+
+        cursor = connection.cursor()
+        for record in records:
+            snippet = record.to_dict()
+            cursor.execute(
+                "INSERT INTO pages (name, brief, description, groups, tags, links, "
+                "source) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    snippet["name"],
+                    snippet["brief"],
+                    snippet["description"],
+                    ",".join(snippet["groups"]),
+                    ",".join(snippet["tags"]),
+                    "\n".join(snippet["links"]),
+                    snippet["source"],
+                ),
+            )
+            page_id = cursor.lastrowid
+            examples = []
+            for data in snippet["data"]:
+                command, _, comment = data.partition(Const.SNIPPET_COMMENT)
+                cursor.execute(
+                    "INSERT INTO examples (page_id, command, comment) VALUES (?, ?, ?)",
+                    (page_id, command, comment),
+                )
+                examples.append((command, comment, cursor.lastrowid))
+            if not search:
+                continue
+            cursor.executemany(
+                "INSERT INTO search VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        snippet["name"],
+                        snippet["brief"],
+                        snippet["description"],
+                        command,
+                        comment,
+                        page_id,
+                        example_id,
+                    )
+                    for command, comment, example_id in examples or [("", "", None)]
+                ],
+            )
+        connection.commit()
+
+        return len(records)
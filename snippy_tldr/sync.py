@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""sync: Sync state for incremental imports of tldr pages."""
+
+import json
+import os
+import time
+
+from snippy_tldr.cache import atomic_write
+from snippy_tldr.local import LocalPages
+
+
+class SyncState(object):
+    """Persistent state between plugin runs.
+
+    The state is a JSON file that stores values like the last imported
+    commit SHA for each imported GitHub branch, translation and platform.
+    The file is written only when the state is saved and it was changed.
+    """
+
+    def __init__(self, logger, path):
+        self._logger = logger
+        self._path = path
+        self._state = {}
+        self.changed = False
+        try:
+            with open(path, "r") as infile:
+                self._state = json.load(infile)
+        except (IOError, OSError, ValueError) as error:
+            self._logger.debug("sync state not read: %s :%s", path, error)
+
+    def get(self, section, key, default=None):
+        """Get value from the state.
+
+        Args:
+            section (str): State section like ``github``.
+            key (str): Key in the section.
+            default (obj): Default value if the key is not found.
+
+        Returns:
+            obj: Value from the state.
+        """
+
+        return self._state.get(section, {}).get(key, default)
+
+    def set(self, section, key, value):
+        """Set value to the state.
+
+        Args:
+            section (str): State section like ``github``.
+            key (str): Key in the section.
+            value (obj): JSON serializable value.
+        """
+
+        self._state.setdefault(section, {})[key] = value
+        self.changed = True
+
+    def save(self):
+        """Save the state to the file if it was changed."""
+
+        if not self.changed:
+            return
+        try:
+            with atomic_write(self._path) as temp, open(temp, "w") as outfile:
+                json.dump(self._state, outfile, indent=2, sort_keys=True)
+            self.changed = False
+        except (IOError, OSError) as error:
+            self._logger.debug("failed to save sync state: %s :%s", self._path, error)
+
+
+class LocalManifest(object):  # pylint: disable=too-few-public-methods
+    """Local tldr pages changed since the previous import.
+
+    A manifest with the size, modification time and git blob SHA of each
+    page is stored in the sync state for each local path. A page with the
+    same size and modification time as in the manifest is not opened. A
+    page with changed metadata is hashed and it is imported only if the
+    content has changed. Pages modified less than a second before the
+    previous import started are always hashed because the modification
+    time may not have changed when the page was modified again. Pages
+    missing from the manifest are imported and the pages missing from the
+    local path are deleted.
+    """
+
+    def __init__(self, logger, state, key):
+        self._logger = logger
+        self._state = state
+        self._key = key
+        self.deleted = []
+
+    def changed(self, pages):
+        """Get local tldr pages changed since the previous import.
+
+        Args:
+            pages (dict): All local tldr pages under the path.
+
+        Returns:
+            dict: Changed local tldr pages.
+        """
+
+        previous = self._state.get("local", self._key, {})
+        scanned = previous.get("time", 0) - 1000000000
+        known = previous.get("pages", {})
+        started = int(time.time() * 1000000000)
+        manifest = {}
+        changed = {}
+        for translation in pages:
+            for platform in pages[translation]:
+                paths = []
+                for path in pages[translation][platform]:
+                    entry, modified = self._compare(path, known.get(path), scanned)
+                    if entry:
+                        manifest[path] = entry
+                    if modified:
+                        paths.append(path)
+                if paths:
+                    changed.setdefault(translation, {})[platform] = paths
+        self.deleted.extend(sorted(set(known) - set(manifest)))
+        self._state.set("local", self._key, {"time": started, "pages": manifest})
+        self._logger.debug(
+            "read %d changed local pages from %d pages :deleted pages: %d",
+            sum(len(paths) for data in changed.values() for paths in data.values()),
+            len(manifest),
+            len(self.deleted),
+        )
+
+        return changed
+
+    def _compare(self, path, entry, scanned):
+        """Compare local tldr page to the previous manifest entry.
+
+        Args:
+            path (str): Path of the local tldr page.
+            entry (list): Size, modification time and blob SHA or None.
+            scanned (int): Modification time in nanoseconds until the page
+                is trusted without hashing.
+
+        Returns:
+            tuple: New manifest entry or None and True if the page changed.
+        """
+
+        try:
+            stat = os.stat(path)
+            metadata = [stat.st_size, LocalPages.get_mtime_ns(stat)]
+            if entry and entry[:2] == metadata and metadata[1] < scanned:
+                return entry, False
+            sha = LocalPages.get_blob_sha(path)
+        except (IOError, OSError) as error:
+            self._logger.debug("failed to read: %s :%s", path, error)
+            return None, True
+
+        return metadata + [sha], not entry or entry[2] != sha
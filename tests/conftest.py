@@ -19,12 +19,21 @@
 
 """conftest: Fixtures for pytest."""
 
+import mimetypes
+
 import pytest
 
 
 @pytest.fixture(scope="function", name="isfile_true")
 def mock_isfile_true(mocker):
-    """Mock os.path.isfile."""
+    """Mock os.path.isfile.
+
+    The snippet schema references are read with urllib that initializes the
+    mimetypes module. The module is initialized before the mock because it
+    would otherwise try to read the system mime type files that do not
+    exist.
+    """
 
+    mimetypes.init()
     mocker.patch("snippy_tldr.plugin.os.path.isfile", return_value=True)
     mocker.patch("snippy_tldr.plugin.os.access", return_value=True)
@@ -19,6 +19,9 @@
 
 """helper: Test case helper methods."""
 
+import io
+import tarfile
+
 import responses
 
 
@@ -64,6 +67,7 @@ class GitHubApi(object):
                     http["request"]["url"],
                     body=http["response"]["content"]["text"],
                     status=http["response"]["status"],
+                    headers=http["response"].get("headers"),
                 )
             else:
                 responses.add(
@@ -71,10 +75,35 @@ class GitHubApi(object):
                     http["request"]["url"],
                     json=http["response"]["content"]["json"],
                     status=http["response"]["status"],
+                    headers=http["response"].get("headers"),
                 )
 
         return responses
 
+    @classmethod
+    def archive(cls, pages, root="tldr-master"):
+        """GitHub branch archive.
+
+        Args:
+            pages (dict): Tldr pages in text or byte strings with path as a key.
+            root (str): Root directory inside the archive.
+
+        Returns:
+            bytes: Gzipped tarball with tldr pages.
+        """
+
+        buffer_ = io.BytesIO()
+        with tarfile.open(fileobj=buffer_, mode="w:gz") as archive:
+            for path in pages:
+                data = pages[path]
+                if not isinstance(data, bytes):
+                    data = data.encode("utf-8")
+                info = tarfile.TarInfo("/".join((root, path)))
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+
+        return buffer_.getvalue()
+
     @classmethod
     def validate(cls, expect, actual):
         """Assert expected REST API calls to actual values.
@@ -225,6 +254,89 @@ class GitHubApi(object):
 
         return pages
 
+    @classproperty
+    def recursive(cls):  # pylint: disable=no-self-argument, no-self-use
+        """GitHub API response for a recursive tree under the branch.
+
+        Returns:
+            dict: GitHub API response for a recursive tree under the branch.
+        """
+
+        recursive = {
+            "sha": "67c429acf561194366a25a28fe73fb33ec0739dc",
+            "url": "https://api.github.com/repos/tldr-pages/tldr/git/trees/67c429acf561194366a25a28fe73fb33ec0739dc",
+            "tree": [
+                {
+                    "path": ".editorconfig",
+                    "mode": "100644",
+                    "type": "blob",
+                    "sha": "197cb78962bd0973086f89d4421138e1d82f9080",
+                    "size": 235,
+                },
+                {
+                    "path": "pages",
+                    "mode": "040000",
+                    "type": "tree",
+                    "sha": "64605406ef576220cbb6b59f64c525778e1bc6b8",
+                },
+                {
+                    "path": "pages/common",
+                    "mode": "040000",
+                    "type": "tree",
+                    "sha": "63f4c272b4bc0a80c0f9f805766de29bac0bc055",
+                },
+                {
+                    "path": "pages/common/7za.md",
+                    "mode": "100644",
+                    "type": "blob",
+                    "sha": "0f3c5bb7e1ca4d8b9d7cb7a6d6dc0b34b1a1a2a0",
+                    "size": 734,
+                },
+                {
+                    "path": "pages/linux",
+                    "mode": "040000",
+                    "type": "tree",
+                    "sha": "9ec6d298a44e3ff1b47f1a6d98942826a598c54a",
+                },
+                {
+                    "path": "pages/linux/add-apt-repository.md",
+                    "mode": "100644",
+                    "type": "blob",
+                    "sha": "154a62ebd45b38671f1ec4604eeaa8932a55f85c",
+                    "size": 402,
+                },
+                {
+                    "path": "pages/linux/adduser.md",
+                    "mode": "100644",
+                    "type": "blob",
+                    "sha": "c495e0cd9bd62bf6b7360dd60ab6b25d0232dc05",
+                    "size": 653,
+                },
+                {
+                    "path": "pages.pt-BR",
+                    "mode": "040000",
+                    "type": "tree",
+                    "sha": "6b55cdc79c194f1951f3cd75f8908732d8a6e451",
+                },
+                {
+                    "path": "pages.pt-BR/linux",
+                    "mode": "040000",
+                    "type": "tree",
+                    "sha": "0d3d7f1c0f9b5a9a5c8b2f7e4e4b1d6f0b0c9a8e",
+                },
+                {
+                    "path": "pages.pt-BR/linux/adduser.md",
+                    "mode": "100644",
+                    "type": "blob",
+                    "sha": "5a0f3cd9e0c4f9cc2c7d8b6f2f1e8b6c1a9e0d3f",
+                    "size": 702,
+                },
+            ],
+            "truncated": False,
+        }
+
+        return recursive
+
     @classproperty
     def default(cls):  # pylint: disable=no-self-argument, no-self-use
         """The default GitHub API API calls.
@@ -19,11 +19,20 @@
 
 """test_snippy_tldr: Test tldr man page import plugin."""
 
+import io
+import multiprocessing.pool
+import subprocess
+import time
+import zipfile
+
 import mock
 import pytest
 import responses
 
+from snippy_tldr.cache import PageCache
+from snippy_tldr.parser import TldrParser
 from snippy_tldr.plugin import SnippyTldr
+from snippy_tldr.plugin import snippy_import_hook
 from tests.lib.helper import GitHubApi
 from tests.lib.helper import Snippet
 from tests.lib.helper import TldrPage
@@ -300,6 +309,408 @@ class TestSnippyTldr(object):
         assert len(responses.calls) == 6
         assert GitHubApi.validate(expect, actual)
 
+    @staticmethod
+    @responses.activate
+    def test_github_tldr_platform_006():
+        """Test reading tldr pages from GitHib under one ``platform``.
+
+        Read all English translated tldr pages from linux platform with
+        concurrent workers. The tldr pages are fetched in parallel but the
+        snippets must be returned in the same order as without workers.
+        """
+
+        expect = GitHubApi.default
+        actual = GitHubApi.mock(expect)
+        with mock.patch.dict("os.environ", {"SNIPPY_TLDR_WORKERS": "4"}):
+            contents = SnippyTldr(Logger(), "")
+        assert len(contents) == 2
+        assert next(contents) == Snippet.add_apt_repository
+        assert next(contents) == Snippet.adduser
+        assert len(responses.calls) == 6
+        assert GitHubApi.validate(expect[:4], actual)
+        assert sorted(call.request.url for call in responses.calls[4:]) == sorted(
+            http["request"]["url"] for http in expect[4:]
+        )
+
+    @staticmethod
+    @responses.activate
+    def test_github_tldr_platform_007():
+        """Test reading tldr pages from GitHib under one ``platform``.
+
+        Read all English translated tldr pages from linux platform with the
+        recursive tree listing. The branch tree is read with one GitHub API
+        request instead of reading translation and platform trees separately.
+        """
+
+        expect = [GitHubApi.default[0]] + GitHubApi.default[4:]
+        expect.insert(
+            1,
+            {
+                "request": {
+                    "url": "https://api.github.com/repos/tldr-pages/tldr/git/trees/67c429acf561194366a25a28fe73fb33ec0739dc?recursive=1",
+                    "headers": {},
+                },
+                "response": {"status": 200, "content": {"json": GitHubApi.recursive}},
+            },
+        )
+        actual = GitHubApi.mock(expect)
+        contents = SnippyTldr(Logger(), "", recursive=True)
+        assert len(contents) == 2
+        assert next(contents) == Snippet.add_apt_repository
+        assert next(contents) == Snippet.adduser
+        assert len(responses.calls) == 4
+        assert GitHubApi.validate(expect, actual)
+
+    @staticmethod
+    @responses.activate
+    def test_github_tldr_platform_008():
+        """Test reading tldr pages from GitHib under one ``platform``.
+
+        Read all English translated tldr pages from linux platform when the
+        option values in environment variables cannot be converted. The
+        default values must be used for the invalid options.
+        """
+
+        expect = GitHubApi.default
+        actual = GitHubApi.mock(expect)
+        environ = {"SNIPPY_TLDR_WORKERS": "many", "SNIPPY_TLDR_TIMEOUT": "1s"}
+        with mock.patch.dict("os.environ", environ):
+            contents = SnippyTldr(Logger(), "")
+        assert len(contents) == 2
+        assert next(contents) == Snippet.add_apt_repository
+        assert next(contents) == Snippet.adduser
+        assert GitHubApi.validate(expect, actual)
+
+    @staticmethod
+    @responses.activate
+    def test_github_tldr_select_001():
+        """Test reading tldr pages from GitHib with selectors.
+
+        Read English translated tldr pages from linux platform with a page
+        name glob. The page that is not selected is not fetched and the saved
+        requests and bytes are in the import metrics. Selecting only other
+        platforms does not list the platform tree at all.
+        """
+
+        expect = GitHubApi.default[:5]
+        actual = GitHubApi.mock(expect)
+        contents = SnippyTldr(Logger(), "", pages=("add*", "-*"), max_pages=1)
+        assert len(contents) == 1
+        assert next(contents) == Snippet.add_apt_repository
+        assert contents.metrics["selectors"] == {
+            "pages": 1,
+            "requests": 1,
+            "bytes": 653,
+        }
+        assert len(responses.calls) == 5
+        assert GitHubApi.validate(expect, actual)
+
+        responses.calls.reset()
+        with mock.patch.dict("os.environ", {"SNIPPY_TLDR_PLATFORMS": "osx,common"}):
+            contents = SnippyTldr(Logger(), "")
+        assert not contents
+        assert not responses.calls
+
+    @staticmethod
+    @responses.activate
+    def test_github_tldr_stream_001():
+        """Test reading tldr pages from GitHib in ``stream`` mode.
+
+        Read all English translated tldr pages from linux platform lazily.
+        Only the page index is read when the plugin is created and the pages
+        are fetched when the iterator is consumed.
+        """
+
+        expect = GitHubApi.default
+        actual = GitHubApi.mock(expect)
+        contents = SnippyTldr(Logger(), "", stream=True)
+        assert len(contents) == 2
+        assert len(responses.calls) == 4
+        assert next(contents) == Snippet.add_apt_repository
+        assert next(contents) == Snippet.adduser
+        with pytest.raises(StopIteration):
+            next(contents)
+        assert len(responses.calls) == 6
+        assert GitHubApi.validate(expect, actual)
+
+    @staticmethod
+    @responses.activate
+    def test_github_tldr_archive_001():
+        """Test reading tldr pages from GitHub ``archive``.
+
+        Read all English translated tldr pages from linux platform from the
+        GitHub branch archive. The archive is downloaded with one request and
+        the snippets must be the same as when reading pages one by one.
+        """
+
+        archive = GitHubApi.archive(
+            {
+                "README.md": "# tldr",
+                "pages/common/7za.md": TldrPage.pushd,
+                "pages/linux/adduser.md": TldrPage.adduser,
+                "pages/linux/add-apt-repository.md": TldrPage.add_apt_repository,
+                "pages.pt-BR/linux/adduser.md": TldrPage.adduser,
+            }
+        )
+        url = "https://codeload.github.com/tldr-pages/tldr/tar.gz/master"
+        responses.add(responses.GET, url, body=archive, status=200)
+        infile = "https://github.com/tldr-pages/tldr/tree/master/pages/linux"
+        contents = SnippyTldr(Logger(), infile, archive=True)
+        assert len(contents) == 2
+        assert next(contents) == Snippet.add_apt_repository
+        assert next(contents) == Snippet.adduser
+        assert len(responses.calls) == 1
+        assert responses.calls[0].request.url == url
+
+    @staticmethod
+    @responses.activate
+    def test_github_tldr_archive_002():
+        """Test reading tldr pages from GitHub ``archive``.
+
+        Read all tldr pages from all translations from the GitHub branch
+        archive. The snippets are sorted in the same order as in the GitHub
+        tree listing where the ``pages.pt-BR`` comes before the ``pages``.
+        """
+
+        archive = GitHubApi.archive(
+            {
+                "pages/linux/adduser.md": TldrPage.adduser,
+                "pages/osx/pushd.md": TldrPage.pushd,
+                "pages.pt-BR/linux/adduser.md": TldrPage.adduser,
+                "pages/linux/add-apt-repository.md": TldrPage.add_apt_repository,
+            }
+        )
+        url = "https://codeload.github.com/tldr-pages/tldr/tar.gz/master"
+        responses.add(responses.GET, url, body=archive, status=200)
+        infile = "https://github.com/tldr-pages/tldr/tree/master"
+        contents = SnippyTldr(Logger(), infile, archive=True)
+        assert len(contents) == 4
+        assert [snippet["source"] for snippet in contents] == [
+            "https://raw.githubusercontent.com/tldr-pages/tldr/master/pages.pt-BR/linux/adduser.md",
+            "https://raw.githubusercontent.com/tldr-pages/tldr/master/pages/linux/add-apt-repository.md",
+            "https://raw.githubusercontent.com/tldr-pages/tldr/master/pages/linux/adduser.md",
+            "https://raw.githubusercontent.com/tldr-pages/tldr/master/pages/osx/pushd.md",
+        ]
+        assert len(responses.calls) == 1
+
+    @staticmethod
+    @responses.activate
+    def test_github_tldr_archive_003():
+        """Test reading tldr pages from GitHub ``archive``.
+
+        Read all English translated tldr pages from linux platform when the
+        GitHub API rate limit is exhausted. The ``fallback`` policy reads the
+        tldr pages from the branch archive that is not rate limited.
+        """
+
+        archive = GitHubApi.archive(
+            {
+                "pages/linux/adduser.md": TldrPage.adduser,
+                "pages/linux/add-apt-repository.md": TldrPage.add_apt_repository,
+            }
+        )
+        headers = {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "4102444800"}
+        url = "https://api.github.com/repos/tldr-pages/tldr/branches/master"
+        responses.add(responses.GET, url, status=403, headers=headers)
+        url = "https://codeload.github.com/tldr-pages/tldr/tar.gz/master"
+        responses.add(responses.GET, url, body=archive, status=200)
+        contents = SnippyTldr(Logger(), "", rate_limit="fallback")
+        assert len(contents) == 2
+        assert next(contents) == Snippet.add_apt_repository
+        assert next(contents) == Snippet.adduser
+        assert len(responses.calls) == 2
+        assert contents.metrics["rate_limit"]["exhausted"] == 1
+
+    @staticmethod
+    @responses.activate
+    def test_github_tldr_archive_004():
+        """Test reading tldr pages from GitHub ``archive``.
+
+        Read one tldr page from GitHub when the archive option is set. A URI
+        that points to a single page must read only the page and not the
+        whole branch archive.
+        """
+
+        url = "https://raw.githubusercontent.com/tldr-pages/tldr/master/pages/linux/adduser.md"
+        responses.add(responses.GET, url, body=TldrPage.adduser, status=200)
+        infile = "https://github.com/tldr-pages/tldr/blob/master/pages/linux/adduser.md"
+        contents = SnippyTldr(Logger(), infile, archive=True)
+        assert len(contents) == 1
+        assert next(contents) == Snippet.adduser
+        assert len(responses.calls) == 1
+        assert responses.calls[0].request.url == url
+
+    @staticmethod
+    @responses.activate
+    def test_github_tldr_archive_005():
+        """Test reading tldr pages from GitHub ``archive``.
+
+        Read all English translated tldr pages from linux platform when one
+        of the pages in the archive is not valid UTF-8. The page that cannot
+        be decoded must be counted as failed and the rest of the pages must
+        be read.
+        """
+
+        archive = GitHubApi.archive(
+            {
+                "pages/linux/adduser.md": TldrPage.adduser,
+                "pages/linux/add-apt-repository.md": b"# add-apt-repository\n\xff\xfe\n",
+            }
+        )
+        url = "https://codeload.github.com/tldr-pages/tldr/tar.gz/master"
+        responses.add(responses.GET, url, body=archive, status=200)
+        infile = "https://github.com/tldr-pages/tldr/tree/master/pages/linux"
+        contents = SnippyTldr(Logger(), infile, archive=True)
+        assert len(contents) == 1
+        assert next(contents) == Snippet.adduser
+        assert contents.metrics["parser"]["failed"] == 1
+
+    @staticmethod
+    @responses.activate
+    def test_github_tldr_cache_001(tmpdir):
+        """Test reading tldr pages from GitHub with page ``cache``.
+
+        Read all English translated tldr pages from linux platform twice with
+        the page cache. The second import must read the unchanged tldr pages
+        from the cache and request only the GitHub tree listing.
+        """
+
+        expect = GitHubApi.default
+        trees = expect[3]["response"]["content"]["json"]["tree"]
+        trees[0]["sha"] = PageCache.blob_sha(TldrPage.add_apt_repository.encode())
+        trees[1]["sha"] = PageCache.blob_sha(TldrPage.adduser.encode())
+        actual = GitHubApi.mock(expect)
+        for _ in range(2):
+            contents = SnippyTldr(Logger(), "", cache=str(tmpdir))
+            assert len(contents) == 2
+            assert next(contents) == Snippet.add_apt_repository
+            assert next(contents) == Snippet.adduser
+        assert len(responses.calls) == 10
+        assert GitHubApi.validate(expect + expect[:4], actual)
+
+    @staticmethod
+    @responses.activate
+    def test_github_tldr_cache_002(tmpdir):
+        """Test reading tldr pages from GitHub with HTTP ``cache``.
+
+        Read all English translated tldr pages from linux platform with the
+        cache when all responses have an ``ETag``. The GitHub API responses
+        are stored to the HTTP cache but the tldr pages with a known blob
+        SHA are stored only to the page cache.
+        """
+
+        expect = GitHubApi.default
+        trees = expect[3]["response"]["content"]["json"]["tree"]
+        trees[0]["sha"] = PageCache.blob_sha(TldrPage.add_apt_repository.encode())
+        trees[1]["sha"] = PageCache.blob_sha(TldrPage.adduser.encode())
+        for http in expect:
+            http["response"]["headers"] = {"ETag": '"a1b2"'}
+        GitHubApi.mock(expect)
+        contents = SnippyTldr(Logger(), "", cache=str(tmpdir))
+        assert len(contents) == 2
+        assert len(responses.calls) == 6
+        assert contents.metrics["http_cache"]["misses"] == 4
+        assert len([path for path in tmpdir.join("http").visit() if path.isfile()]) == 4
+        assert (
+            len([path for path in tmpdir.join("pages").visit() if path.isfile()]) == 2
+        )
+
+    @staticmethod
+    @responses.activate
+    def test_github_tldr_sync_001(tmpdir):
+        """Test incremental import from GitHub with sync ``state``.
+
+        Read all English translated tldr pages from linux platform three
+        times with the sync state. The first import reads all pages. The
+        second import reads only the pages changed since the first import
+        and reports the deleted pages. The third import does not read any
+        pages because the branch has not changed.
+        """
+
+        state = str(tmpdir.join("state.json"))
+        expect = GitHubApi.default
+        actual = GitHubApi.mock(expect)
+        contents = SnippyTldr(Logger(), "", state=state)
+        assert len(contents) == 2
+        assert len(responses.calls) == 6
+        assert GitHubApi.validate(expect, actual)
+
+        responses.reset()
+        branch = GitHubApi.branch
+        branch["commit"]["sha"] = "e3b0c44298fc1c149afbf4c8996fb92427ae41e4"
+        compare = {
+            "files": [
+                {"filename": "pages/linux/adduser.md", "status": "modified"},
+                {"filename": "pages/linux/add-apt-repository.md", "status": "removed"},
+                {"filename": "pages/osx/pushd.md", "status": "added"},
+                {"filename": "README.md", "status": "modified"},
+            ]
+        }
+        expect = [
+            {
+                "request": {
+                    "url": "https://api.github.com/repos/tldr-pages/tldr/branches/master",
+                    "headers": {},
+                },
+                "response": {"status": 200, "content": {"json": branch}},
+            },
+            {
+                "request": {
+                    "url": "https://api.github.com/repos/tldr-pages/tldr/compare/d496b0c18f450c4504c0c643ade531e79fdd1484...e3b0c44298fc1c149afbf4c8996fb92427ae41e4",
+                    "headers": {},
+                },
+                "response": {"status": 200, "content": {"json": compare}},
+            },
+            GitHubApi.default[5],
+        ]
+        actual = GitHubApi.mock(expect)
+        contents = SnippyTldr(Logger(), "", state=state)
+        assert len(contents) == 1
+        assert next(contents) == Snippet.adduser
+        assert contents.deleted == (
+            "https://raw.githubusercontent.com/tldr-pages/tldr/master/pages/linux/add-apt-repository.md",
+        )
+        assert len(responses.calls) == 3
+        assert GitHubApi.validate(expect, actual)
+
+        contents = SnippyTldr(Logger(), "", state=state)
+        assert not contents
+        assert not contents.deleted
+        assert len(responses.calls) == 4
+
+    @staticmethod
+    @responses.activate
+    def test_github_tldr_sync_002(tmpdir):
+        """Test incremental import from GitHub with sync ``state``.
+
+        Read all English translated tldr pages from linux platform twice with
+        the sync state. The first import fails to read one of the pages. The
+        sync state must not be updated and the second import must read all
+        the pages again.
+        """
+
+        state = str(tmpdir.join("state.json"))
+        expect = GitHubApi.default
+        expect[5]["response"] = {"status": 500, "content": {"text": "error"}}
+        actual = GitHubApi.mock(expect)
+        contents = SnippyTldr(Logger(), "", state=state, retries=0)
+        assert len(contents) == 1
+        assert next(contents) == Snippet.add_apt_repository
+        assert contents.metrics["parser"]["failed"] == 1
+        assert len(responses.calls) == 6
+        assert GitHubApi.validate(expect, actual)
+
+        responses.reset()
+        expect = GitHubApi.default
+        actual = GitHubApi.mock(expect)
+        contents = SnippyTldr(Logger(), "", state=state, retries=0)
+        assert len(contents) == 2
+        assert next(contents) == Snippet.add_apt_repository
+        assert next(contents) == Snippet.adduser
+        assert contents.metrics["parser"]["failed"] == 0
+        assert len(responses.calls) == 6
+        assert GitHubApi.validate(expect, actual)
+
     @staticmethod
     @pytest.mark.usefixtures("isfile_true")
     def test_local_tldr_page_001():
@@ -330,7 +741,7 @@ class TestSnippyTldr(object):
         ]
 
         file_content = mock.mock_open(read_data=TldrPage.pushd)
-        with mock.patch("snippy_tldr.plugin.open", file_content) as mock_file:
+        with mock.patch("snippy_tldr.local.open", file_content) as mock_file:
             for infile in files:
                 contents = SnippyTldr(Logger(), infile)
                 assert len(contents) == 1
@@ -359,11 +770,11 @@ class TestSnippyTldr(object):
             "./tldr/pages/linux/adduser.md",
             "/linux/adduser.md",
             "linux/adduser.md",
-            # "/root/path/linux/adduser.md" # This does not work.
+            "/root/path/linux/adduser.md",
         ]
 
         file_content = mock.mock_open(read_data=TldrPage.adduser)
-        with mock.patch("snippy_tldr.plugin.open", file_content) as mock_file:
+        with mock.patch("snippy_tldr.local.open", file_content) as mock_file:
             for infile in files:
                 contents = SnippyTldr(Logger(), infile)
                 assert len(contents) == 1
@@ -371,6 +782,524 @@ class TestSnippyTldr(object):
                 mock_file.assert_called_once_with(infile, "r")
                 mock_file.reset_mock()
 
+    @staticmethod
+    @pytest.mark.usefixtures("isfile_true")
+    def test_local_tldr_page_003():
+        """Test skipping pathological tldr ``page`` from local directory.
+
+        Pages larger than the ``max_size`` option or slower to parse than the
+        ``max_time`` option are skipped and reported. The ``regex`` parser
+        reads pages that are too large for one match with the ``lines``
+        parser.
+        """
+
+        infile = "./tldr/pages/linux/adduser.md"
+        file_content = mock.mock_open(read_data=TldrPage.adduser)
+        with mock.patch("snippy_tldr.local.open", file_content):
+            contents = SnippyTldr(Logger(), infile, max_size=100)
+            assert not len(contents)
+            assert contents.skipped == (infile,)
+            assert contents.metrics["parser"]["skipped"] == 1
+            with mock.patch("snippy_tldr.parser.time") as mock_time:
+                mock_time.time.side_effect = [0.0, 2.0]
+                contents = SnippyTldr(Logger(), infile, max_time=1.0)
+            assert not len(contents)
+            assert contents.skipped == (infile,)
+            contents = SnippyTldr(Logger(), infile, max_size=0, max_time=0)
+            assert len(contents) == 1
+            assert not contents.skipped
+            with mock.patch.dict("os.environ", {"SNIPPY_TLDR_MAX_TIME": "0.5"}):
+                contents = SnippyTldr(Logger(), infile)
+            assert len(contents) == 1
+            assert not contents.skipped
+        file_content = mock.mock_open(read_data=TldrPage.adduser + " " * 65536)
+        with mock.patch("snippy_tldr.local.open", file_content), mock.patch.object(
+            TldrParser, "_parse_tldr_regex"
+        ) as mock_regex:
+            contents = SnippyTldr(Logger(), infile, parser="regex", max_size=0)
+            assert len(contents) == 1
+            assert not mock_regex.called
+
+    @staticmethod
+    @pytest.mark.usefixtures("isfile_true")
+    def test_local_tldr_page_004():
+        """Test validating tldr ``page`` from local directory.
+
+        Parsed tldr pages are validated against the Snippy JSON schema. The
+        invalid pages are not returned unless the validation is disabled.
+        """
+
+        infile = "./tldr/pages/linux/adduser.md"
+        invalid = dict(Snippet.adduser, category="unknown")
+        file_content = mock.mock_open(read_data=TldrPage.adduser)
+        with mock.patch("snippy_tldr.local.open", file_content), mock.patch.object(
+            TldrParser, "parse_page", return_value=invalid
+        ):
+            contents = SnippyTldr(Logger(), infile)
+            assert not len(contents)
+            assert contents.metrics["parser"]["invalid"] == 1
+            contents = SnippyTldr(Logger(), infile, validate=False)
+            assert len(contents) == 1
+            assert contents.metrics["parser"]["invalid"] == 0
+
+    @staticmethod
+    @pytest.mark.usefixtures("isfile_true")
+    def test_local_tldr_page_005():
+        """Test parsing adversarial tldr ``page`` from local directory.
+
+        A page that repeats a header, a line with only whitespaces and a
+        quote must be parsed in linear time by both parsers. Overlapping
+        repetitions in the regular expressions made the ``regex`` parser
+        backtrack quadratically with this page.
+        """
+
+        infile = "./tldr/pages/linux/adduser.md"
+        file_content = mock.mock_open(read_data="# a\n \n> x\n" * 5000)
+        with mock.patch("snippy_tldr.local.open", file_content):
+            for parser in ("regex", "lines"):
+                start = time.time()
+                contents = SnippyTldr(Logger(), infile, parser=parser, max_size=0)
+                assert time.time() - start < 2.0
+                assert len(contents) == 1
+                assert next(contents)["name"] == "a"
+
+    @staticmethod
+    def test_local_tldr_branch_001(tmpdir):
+        """Test reading local tldr repository root.
+
+        Read all translations and platforms from a local tldr repository in
+        one traversal. Files and directories that are not tldr translations,
+        platforms or pages are ignored.
+        """
+
+        root = tmpdir.mkdir("repository")
+        root.join("README.md").write("# tldr")
+        root.mkdir("scripts").join("build.md").write(TldrPage.pushd)
+        pages = root.mkdir("pages")
+        pages.mkdir("linux").join("adduser.md").write(TldrPage.adduser)
+        pages.mkdir("common").join("pushd.md").write(TldrPage.pushd)
+        pages.join("linux", "notes.txt").write("notes")
+        pages.mkdir("unknown").join("pushd.md").write(TldrPage.pushd)
+        german = root.mkdir("pages.de").mkdir("linux")
+        german.join("add-apt-repository.md").write(TldrPage.add_apt_repository)
+        contents = SnippyTldr(Logger(), str(root))
+        assert len(contents) == 3
+        assert [(snippet["name"], snippet["groups"]) for snippet in contents] == [
+            ("pushd", ["common"]),
+            ("adduser", ["linux"]),
+            ("add-apt-repository", ["linux"]),
+        ]
+        assert len(SnippyTldr(Logger(), str(pages))) == 2
+        assert len(SnippyTldr(Logger(), str(pages.join("linux")))) == 1
+
+    @staticmethod
+    def test_local_tldr_git_001(tmpdir):
+        """Test reading tldr pages from a local git repository.
+
+        Read all tldr pages from a branch in a local git repository. The pages
+        are read from the git objects and changes in the working tree are not
+        read. The snippets have the same GitHub raw links, groups and tags as
+        the pages read from the GitHub branch.
+        """
+
+        def git(*args):
+            """Run git command in the test repository."""
+
+            command = ["git", "-C", str(root), "-c", "user.name=tldr"]
+            subprocess.check_call(command + ["-c", "user.email=tldr"] + list(args))
+
+        root = tmpdir.mkdir("tldr")
+        platform = root.mkdir("pages").mkdir("linux")
+        platform.join("adduser.md").write(TldrPage.adduser)
+        platform.join("pushd.md").write(TldrPage.pushd)
+        root.mkdir("pages.de").mkdir("unknown").join("pushd.md").write(TldrPage.pushd)
+        root.join("README.md").write("# tldr")
+        git("init", "-q")
+        git("add", "-A")
+        git("commit", "-q", "-m", "Add pages")
+        git("branch", "-M", "master")
+        platform.join("adduser.md").write(TldrPage.pushd)
+        contents = SnippyTldr(Logger(), str(root), ref="master", workers=2)
+        assert len(contents) == 2
+        assert next(contents) == Snippet.adduser
+        assert next(contents) == Snippet.pushd
+        assert not SnippyTldr(Logger(), str(root), ref="unknown")
+
+    @staticmethod
+    def test_local_tldr_zip_001(tmpdir):
+        """Test reading tldr pages from a local zip bundle.
+
+        Read all translations and platforms from the offline tldr zip bundle
+        without extracting it. Members that are not tldr pages are ignored.
+        The pages are read in the order of translation, platform and page
+        names regardless of the member order in the zip file.
+        """
+
+        bundle = str(tmpdir.join("tldr.zip"))
+        with zipfile.ZipFile(bundle, "w") as archive:
+            archive.writestr("index.json", "{}")
+            archive.writestr("LICENSE.md", "# License")
+            archive.writestr(
+                "pages.de/linux/add-apt-repository.md", TldrPage.add_apt_repository
+            )
+            archive.writestr("pages/linux/", "")
+            archive.writestr("pages/linux/adduser.md", TldrPage.adduser)
+            archive.writestr("pages/common/pushd.md", TldrPage.pushd)
+            archive.writestr("pages/unknown/pushd.md", TldrPage.pushd)
+        contents = snippy_import_hook(Logger(), bundle)
+        assert len(contents) == 3
+        assert [(snippet["name"], snippet["groups"]) for snippet in contents] == [
+            ("pushd", ["common"]),
+            ("adduser", ["linux"]),
+            ("add-apt-repository", ["linux"]),
+        ]
+        assert len(SnippyTldr(Logger(), bundle, workers=2, processes=2)) == 3
+
+    @staticmethod
+    def test_local_tldr_state_001(tmpdir):
+        """Test incremental import from local tldr pages with sync ``state``.
+
+        Import local tldr pages three times with the sync state. The first
+        import reads all pages. The second import does not open unchanged
+        pages. The third import reads only the modified page and reports the
+        deleted page. A page that was only touched is not imported again.
+        """
+
+        state = str(tmpdir.join("state.json"))
+        platform = tmpdir.mkdir("tldr").mkdir("pages").mkdir("linux")
+        platform.join("add-apt-repository.md").write(TldrPage.add_apt_repository)
+        platform.join("adduser.md").write(TldrPage.adduser)
+        platform.join("pushd.md").write(TldrPage.pushd)
+        for page in platform.listdir():
+            page.setmtime(1500000000)
+        contents = SnippyTldr(Logger(), str(platform), state=state)
+        assert len(contents) == 3
+        assert not contents.deleted
+
+        with mock.patch("snippy_tldr.local.open", create=True) as mock_open:
+            contents = SnippyTldr(Logger(), str(platform), state=state)
+            assert len(contents) == 0
+            assert not contents.deleted
+            mock_open.assert_not_called()
+
+        platform.join("adduser.md").write(TldrPage.adduser + "\n")
+        platform.join("pushd.md").setmtime(1600000000)
+        platform.join("add-apt-repository.md").remove()
+        contents = SnippyTldr(Logger(), str(platform), state=state)
+        assert len(contents) == 1
+        assert next(contents)["name"] == "adduser"
+        assert contents.deleted == (str(platform.join("add-apt-repository.md")),)
+
+    @staticmethod
+    def test_local_tldr_watch_001(tmpdir):
+        """Test watching local tldr pages.
+
+        Watch local tldr pages and import the changes. Only the added and
+        modified pages are imported and the deleted pages are reported.
+        Pages that are not changed are not imported again.
+        """
+
+        platform = tmpdir.mkdir("pages").mkdir("linux")
+        platform.join("add-apt-repository.md").write(TldrPage.add_apt_repository)
+        platform.join("pushd.md").write(TldrPage.pushd)
+        platform.join("unchanged.md").write(TldrPage.pushd)
+        for page in platform.listdir():
+            page.setmtime(1500000000)
+        contents = SnippyTldr(Logger(), str(platform), interval=0.01, debounce=0)
+        assert len(contents) == 3
+        changes = contents.watch()
+        platform.join("adduser.md").write(TldrPage.adduser)
+        platform.join("pushd.md").setmtime(1600000000)
+        platform.join("add-apt-repository.md").remove()
+        snippets, deleted = next(changes)
+        assert [(snippet["name"], snippet["groups"]) for snippet in snippets] == [
+            ("adduser", ["linux"]),
+            ("pushd", ["linux"]),
+        ]
+        assert deleted == (str(platform.join("add-apt-repository.md")),)
+
+    @staticmethod
+    def test_local_tldr_watch_002(tmpdir):
+        """Test watching local tldr pages.
+
+        Watch local tldr pages when a changed page cannot be read. The page
+        that failed must not stop the watch and it must be read again in the
+        next poll even if the size and modification time did not change.
+        """
+
+        platform = tmpdir.mkdir("pages").mkdir("linux")
+        platform.join("pushd.md").write(TldrPage.pushd)
+        contents = SnippyTldr(Logger(), str(platform), interval=0.01, debounce=0)
+        assert len(contents) == 1
+        changes = contents.watch()
+        page = platform.join("adduser.md")
+        page.write_binary(b"\xff" * len(TldrPage.adduser.encode("utf-8")))
+        page.setmtime(1500000000)
+        platform.join("pushd.md").setmtime(1600000000)
+        snippets, deleted = next(changes)
+        assert [snippet["name"] for snippet in snippets] == ["pushd"]
+        assert not deleted
+
+        page.write_binary(TldrPage.adduser.encode("utf-8"))
+        page.setmtime(1500000000)
+        snippets, deleted = next(changes)
+        assert [snippet["name"] for snippet in snippets] == ["adduser"]
+        assert not deleted
+
+    @staticmethod
+    @pytest.mark.parametrize("processes", [1, 2])
+    def test_local_tldr_dedup_001(tmpdir, processes):
+        """Test reading identical local tldr pages with ``dedup``.
+
+        Read a local tldr repository where the same page exists in several
+        platforms and translations. The identical pages are imported once
+        with the groups and tags merged from all platforms.
+        """
+
+        root = tmpdir.mkdir("repository")
+        pages = root.mkdir("pages")
+        pages.mkdir("common").join("pushd.md").write(TldrPage.pushd)
+        pages.mkdir("linux").join("pushd.md").write(TldrPage.pushd)
+        pages.join("linux", "adduser.md").write(TldrPage.adduser)
+        pages.mkdir("osx").join("pushd.md").write(TldrPage.pushd)
+        root.mkdir("pages.de").mkdir("linux").join("pushd.md").write(TldrPage.pushd)
+        contents = SnippyTldr(Logger(), str(root), dedup=True, processes=processes)
+        snippets = list(contents)
+        assert len(contents) == 2
+        assert [(snippet["name"], snippet["groups"]) for snippet in snippets] == [
+            ("pushd", ["common", "linux", "osx"]),
+            ("adduser", ["linux"]),
+        ]
+        assert snippets[0]["tags"] == ["common", "linux", "osx"]
+        kept = str(pages.join("common", "pushd.md"))
+        assert contents.duplicates == (
+            (str(pages.join("linux", "pushd.md")), kept),
+            (str(pages.join("osx", "pushd.md")), kept),
+            (str(root.join("pages.de", "linux", "pushd.md")), kept),
+        )
+        assert contents.metrics["dedup"] == {"duplicates": 3}
+        assert len(SnippyTldr(Logger(), str(root))) == 5
+
+    @staticmethod
+    @pytest.mark.parametrize("processes", [1, 2])
+    def test_local_tldr_dedup_003(tmpdir, processes):
+        """Test reading local tldr pages once with ``dedup``.
+
+        Read a local tldr repository with ``dedup``. Each page is read once
+        to hash it and the same text is parsed without reading the page
+        again. The duplicate pages are not parsed.
+        """
+
+        root = tmpdir.mkdir("repository")
+        pages = root.mkdir("pages")
+        pages.mkdir("common").join("pushd.md").write(TldrPage.pushd)
+        pages.mkdir("linux").join("pushd.md").write(TldrPage.pushd)
+        pages.join("linux", "adduser.md").write(TldrPage.adduser)
+        with mock.patch(
+            "snippy_tldr.local.open", create=True, wraps=io.open
+        ) as mock_open:
+            contents = SnippyTldr(Logger(), str(root), dedup=True, processes=processes)
+            snippets = list(contents)
+        assert [snippet["name"] for snippet in snippets] == ["pushd", "adduser"]
+        assert sorted(call[0][0] for call in mock_open.call_args_list) == sorted(
+            [
+                str(pages.join("common", "pushd.md")),
+                str(pages.join("linux", "adduser.md")),
+                str(pages.join("linux", "pushd.md")),
+            ]
+        )
+
+    @staticmethod
+    def test_local_tldr_dedup_002(tmpdir):
+        """Test reading identical tldr pages with ``dedup`` across translations.
+
+        Read identical pages from a local git repository where the page
+        listing has the translations before the English pages like in the
+        GitHub tree listing. The English page from the first tldr platform
+        must be kept regardless of the order of the page listing.
+        """
+
+        def git(*args):
+            """Run git command in the test repository."""
+
+            command = ["git", "-C", str(root), "-c", "user.name=tldr"]
+            subprocess.check_call(command + ["-c", "user.email=tldr"] + list(args))
+
+        root = tmpdir.mkdir("tldr")
+        root.mkdir("pages.de").mkdir("common").join("pushd.md").write(TldrPage.pushd)
+        pages = root.mkdir("pages")
+        pages.mkdir("osx").join("pushd.md").write(TldrPage.pushd)
+        pages.mkdir("linux").join("pushd.md").write(TldrPage.pushd)
+        git("init", "-q")
+        git("add", "-A")
+        git("commit", "-q", "-m", "Add pages")
+        git("branch", "-M", "master")
+        contents = SnippyTldr(Logger(), str(root), ref="master", dedup=True)
+        snippets = list(contents)
+        assert len(snippets) == 1
+        raw = "https://raw.githubusercontent.com/tldr-pages/tldr/master/"
+        assert snippets[0]["source"] == raw + "pages/linux/pushd.md"
+        assert snippets[0]["groups"] == ["common", "linux", "osx"]
+        assert contents.duplicates == (
+            (raw + "pages.de/common/pushd.md", raw + "pages/linux/pushd.md"),
+            (raw + "pages/osx/pushd.md", raw + "pages/linux/pushd.md"),
+        )
+
+    @staticmethod
+    def test_local_tldr_select_001(tmpdir):
+        """Test reading local tldr repository with selectors.
+
+        Read pages from a local tldr repository with page name globs and
+        allow and deny lists of translations and platforms. The pages that
+        are not selected are not read.
+        """
+
+        root = tmpdir.mkdir("repository")
+        pages = root.mkdir("pages")
+        pages.mkdir("common").join("pushd.md").write(TldrPage.pushd)
+        pages.mkdir("linux").join("pushd.md").write(TldrPage.pushd)
+        pages.join("linux", "adduser.md").write(TldrPage.adduser)
+        pages.join("linux", "add-apt-repository.md").write(TldrPage.add_apt_repository)
+        pages.mkdir("osx").join("pushd.md").write(TldrPage.pushd)
+        root.mkdir("pages.de").mkdir("linux").join("adduser.md").write(TldrPage.adduser)
+        uri = str(root)
+        with mock.patch("snippy_tldr.local.open", create=True) as mock_open:
+            contents = SnippyTldr(
+                Logger(),
+                uri,
+                pages=("add*",),
+                translations=("pages", "pages.de"),
+                skip_translations=("pages.de",),
+                skip_platforms=("osx",),
+                stream=True,
+            )
+            assert len(contents) == 2
+            mock_open.assert_not_called()
+        assert [snippet["name"] for snippet in contents] == [
+            "add-apt-repository",
+            "adduser",
+        ]
+        contents = SnippyTldr(Logger(), uri, platforms="linux", max_pages=3)
+        assert [snippet["name"] for snippet in contents] == [
+            "add-apt-repository",
+            "adduser",
+            "pushd",
+        ]
+        assert contents.metrics["selectors"] == {"pages": 3, "requests": 0, "bytes": 0}
+
+    @staticmethod
+    def test_local_tldr_select_002(tmpdir):
+        """Test reading local tldr pages with selectors and sync ``state``.
+
+        Import local tldr pages with a page name selector and the sync state
+        and then import all the pages. The pages that were not selected in
+        the first import must be imported in the second import and they are
+        not reported as deleted.
+        """
+
+        state = str(tmpdir.join("state.json"))
+        platform = tmpdir.mkdir("tldr").mkdir("pages").mkdir("linux")
+        platform.join("add-apt-repository.md").write(TldrPage.add_apt_repository)
+        platform.join("adduser.md").write(TldrPage.adduser)
+        platform.join("pushd.md").write(TldrPage.pushd)
+        uri = str(platform)
+        contents = SnippyTldr(Logger(), uri, state=state, pages=("adduser",))
+        assert [snippet["name"] for snippet in contents] == ["adduser"]
+        contents = SnippyTldr(Logger(), uri, state=state)
+        assert [snippet["name"] for snippet in contents] == [
+            "add-apt-repository",
+            "adduser",
+            "pushd",
+        ]
+        contents = SnippyTldr(Logger(), uri, state=state, pages=("adduser",))
+        assert not contents
+        assert not contents.deleted
+
+    @staticmethod
+    def test_local_tldr_platform_001(tmpdir):
+        """Test reading local tldr ``platform`` with worker processes.
+
+        Read and parse local tldr pages in worker processes. The snippets are
+        returned in the same order as when the pages are parsed serially. The
+        pages skipped in the worker processes are reported.
+        """
+
+        platform = tmpdir.mkdir("pages").mkdir("linux")
+        platform.join("add-apt-repository.md").write(TldrPage.add_apt_repository)
+        platform.join("adduser.md").write(TldrPage.adduser)
+        platform.join("pushd.md").write(TldrPage.pushd)
+        uri = str(platform)
+        serial = list(SnippyTldr(Logger(), uri))
+        contents = SnippyTldr(Logger(), uri, processes=2, batch=1)
+        assert len(contents) == 3
+        assert list(contents) == serial
+        assert sorted(snippet["name"] for snippet in serial) == [
+            "add-apt-repository",
+            "adduser",
+            "pushd",
+        ]
+        contents = SnippyTldr(Logger(), uri, processes=2, batch=1, max_size=1)
+        assert not list(contents)
+        assert contents.metrics["parser"]["skipped"] == 3
+
+    @staticmethod
+    def test_local_tldr_platform_002(tmpdir):
+        """Test reading local tldr ``platform`` with bounded worker processes.
+
+        Read local tldr pages in worker processes in the stream mode. Only
+        two batches per worker process are submitted ahead of the consumed
+        batch. The rest of the batches are submitted when the records are
+        consumed.
+        """
+
+        platform = tmpdir.mkdir("pages").mkdir("linux")
+        for index in range(10):
+            platform.join("pushd-%d.md" % index).write(TldrPage.pushd)
+        uri = str(platform)
+        apply_async = multiprocessing.pool.Pool.apply_async
+        with mock.patch.object(
+            multiprocessing.pool.Pool,
+            "apply_async",
+            autospec=True,
+            side_effect=apply_async,
+        ) as mock_apply_async:
+            contents = SnippyTldr(Logger(), uri, processes=2, batch=1, stream=True)
+            assert next(contents)["name"] == "pushd"
+            assert mock_apply_async.call_count == 5
+            assert len(list(contents)) == 9
+            assert mock_apply_async.call_count == 10
+
+    @staticmethod
+    def test_local_tldr_cache_001(tmpdir):
+        """Test reading local tldr pages with parse ``cache``.
+
+        Read local tldr pages twice with the parse cache. The second import
+        must not parse the unchanged pages. The cache is invalidated when
+        the parser changes. The cache is not used in worker processes.
+        """
+
+        platform = tmpdir.mkdir("tldr").mkdir("pages").mkdir("linux")
+        platform.join("adduser.md").write(TldrPage.adduser)
+        platform.join("pushd.md").write(TldrPage.pushd)
+        uri = str(platform)
+        cache = str(tmpdir.join("cache"))
+        expect = list(SnippyTldr(Logger(), uri))
+        contents = SnippyTldr(Logger(), uri, cache=cache)
+        assert list(contents) == expect
+        assert contents.metrics["parse_cache"] == {"hits": 0, "misses": 2}
+        with mock.patch("snippy_tldr.parser.Parser.format_data") as mock_parse:
+            contents = SnippyTldr(Logger(), uri, cache=cache)
+            assert list(contents) == expect
+            assert contents.metrics["parse_cache"] == {"hits": 2, "misses": 0}
+            mock_parse.assert_not_called()
+        contents = SnippyTldr(Logger(), uri, cache=cache, parser="regex")
+        assert list(contents) == expect
+        assert contents.metrics["parse_cache"] == {"hits": 0, "misses": 2}
+        assert len(tmpdir.join("cache", "parsed").listdir()) == 1
+        contents = SnippyTldr(Logger(), uri, cache=cache, processes=2)
+        assert list(contents) == expect
+        assert contents.metrics["parse_cache"] == {"hits": 0, "misses": 0}
+
     @staticmethod
     @pytest.mark.skip(reason="no way of currently testing this")
     def test_999():
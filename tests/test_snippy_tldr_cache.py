@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""test_snippy_tldr_cache: Test persistent caches for tldr pages."""
+
+import os
+
+import pytest
+
+from snippy_tldr.cache import PageCache
+from snippy_tldr.cache import ParseCache
+from snippy_tldr.cache import atomic_write
+from tests.lib.helper import Snippet
+from tests.lib.helper import TldrPage
+
+
+class TestSnippyTldrCache(object):
+    """Test persistent caches for tldr pages."""
+
+    @staticmethod
+    def test_page_cache_001(tmpdir):
+        """Test page cache.
+
+        Store and read tldr pages from the cache. The pages must be found
+        from the cache when the cache is opened again.
+        """
+
+        data = b"# alpine"
+        key = PageCache.blob_sha(data)
+        assert key == "605815c41772bd0bc7855990645f6c93f7aa410e"
+        cache = PageCache(Logger(), str(tmpdir), 1024)
+        assert cache.get(key) is None
+        cache.put(key, data)
+        assert cache.get(key) == data
+        assert cache.hits == 1
+        assert cache.misses == 1
+
+        cache = PageCache(Logger(), str(tmpdir), 1024)
+        assert cache.get(key) == data
+        assert os.path.isfile(os.path.join(str(tmpdir), key[:2], key[2:]))
+
+    @staticmethod
+    def test_page_cache_002(tmpdir):
+        """Test page cache size limit.
+
+        Store more tldr pages than fits into the cache. The least recently
+        used page must be evicted from the cache.
+        """
+
+        pages = [b"page-%d" % i * 10 for i in range(3)]
+        keys = [PageCache.blob_sha(page) for page in pages]
+        cache = PageCache(Logger(), str(tmpdir), 2 * len(pages[0]))
+        cache.put(keys[0], pages[0])
+        cache.put(keys[1], pages[1])
+        assert cache.get(keys[0]) == pages[0]
+        cache.put(keys[2], pages[2])
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) == pages[0]
+        assert cache.get(keys[2]) == pages[2]
+        assert not os.path.isfile(os.path.join(str(tmpdir), keys[1][:2], keys[1][2:]))
+
+    @staticmethod
+    def test_parse_cache_001(tmpdir):
+        """Test parse cache.
+
+        Store and read parsed tldr pages from the cache. The snippets must be
+        found when the cache is opened again with the same parser version.
+        The key depends on the page, platform and source and the cache from
+        a different parser version and the cache in the earlier JSON file
+        format are removed.
+        """
+
+        key = ParseCache.key(TldrPage.adduser, "linux", "")
+        assert key != ParseCache.key(TldrPage.adduser, "osx", "")
+        assert key != ParseCache.key(TldrPage.adduser, "linux", "link")
+        cache = ParseCache(Logger(), str(tmpdir), "v1")
+        assert cache.get(key) is None
+        cache.put(key, Snippet.adduser)
+        cache.save()
+        cache = ParseCache(Logger(), str(tmpdir), "v1")
+        assert cache.get(key) == Snippet.adduser
+        assert cache.hits == 1
+        tmpdir.join("v1.json").write("{}")
+        cache = ParseCache(Logger(), str(tmpdir), "v2")
+        assert cache.get(key) is None
+        assert tmpdir.listdir() == [tmpdir.join("v2.sqlite")]
+
+    @staticmethod
+    def test_parse_cache_002(tmpdir):
+        """Test parse cache eviction.
+
+        Store more parsed tldr pages than the cache limit. The least recently
+        used snippets must be evicted when the cache is saved and snippets
+        read in the current run must be kept.
+        """
+
+        keys = [ParseCache.key(TldrPage.adduser, "linux", str(i)) for i in range(4)]
+        cache = ParseCache(Logger(), str(tmpdir), "v1", max_entries=2)
+        for key in keys[:3]:
+            cache.put(key, Snippet.adduser)
+        cache.save()
+        cache = ParseCache(Logger(), str(tmpdir), "v1", max_entries=2)
+        assert cache.get(keys[0]) is None
+        assert cache.get(keys[1]) == Snippet.adduser
+        cache.put(keys[3], Snippet.adduser)
+        cache.save()
+        cache = ParseCache(Logger(), str(tmpdir), "v1", max_entries=2)
+        assert cache.get(keys[1]) == Snippet.adduser
+        assert cache.get(keys[2]) is None
+        assert cache.get(keys[3]) == Snippet.adduser
+
+    @staticmethod
+    def test_atomic_write_001(tmpdir):
+        """Test atomic file write.
+
+        A written file must replace the previous file only when the write
+        succeeds. The temporary file must be removed when the write fails.
+        """
+
+        path = str(tmpdir.join("state", "state.json"))
+        with atomic_write(path) as temp, open(temp, "w") as outfile:
+            outfile.write("first")
+        with pytest.raises(IOError):
+            with atomic_write(path) as temp, open(temp, "w") as outfile:
+                outfile.write("second")
+                raise IOError("failed")
+        with open(path) as infile:
+            assert infile.read() == "first"
+        assert os.listdir(os.path.dirname(path)) == ["state.json"]
+
+
+class Logger(object):  # pylint: disable=too-few-public-methods
+    """Logger mock."""
+
+    def debug(self, *args, **kwargs):
+        """Dummy debug method."""
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""test_snippy_tldr_client: Test HTTP client for GitHub requests."""
+
+import mock
+import pytest
+import responses
+
+from snippy_tldr.cache import HttpCache
+from snippy_tldr.client import HttpClient
+from snippy_tldr.client import RateLimiter
+from snippy_tldr.client import RateLimitError
+from snippy_tldr.client import RetryPolicy
+
+
+class TestSnippyTldrClient(object):
+    """Test HTTP client for GitHub requests."""
+
+    URL = "https://api.github.com/repos/tldr-pages/tldr/branches/master"
+
+    @staticmethod
+    @responses.activate
+    def test_client_retry_001():
+        """Test retrying failed request.
+
+        Retry a request that failed with a temporary server error. The delay
+        before the retry is read from the ``Retry-After`` header.
+        """
+
+        url = TestSnippyTldrClient.URL
+        responses.add(responses.GET, url, status=503, headers={"Retry-After": "2"})
+        responses.add(responses.GET, url, json={"name": "master"}, status=200)
+        with mock.patch("snippy_tldr.client.time.sleep") as mock_sleep:
+            resp = HttpClient(Logger()).get(url)
+        assert resp.status_code == 200
+        assert resp.json() == {"name": "master"}
+        assert len(responses.calls) == 2
+        mock_sleep.assert_called_once_with(2.0)
+
+    @staticmethod
+    @responses.activate
+    def test_client_retry_002():
+        """Test retrying rate limited request.
+
+        Retry a request that failed because the GitHub API rate limit was
+        exhausted. The delay before the retry is the time left until the
+        rate limit is reset.
+        """
+
+        url = TestSnippyTldrClient.URL
+        headers = {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "1005"}
+        responses.add(responses.GET, url, status=403, headers=headers)
+        responses.add(responses.GET, url, json={"name": "master"}, status=200)
+        with mock.patch("snippy_tldr.client.time.sleep") as mock_sleep, mock.patch(
+            "snippy_tldr.client.time.time", return_value=1000
+        ):
+            resp = HttpClient(Logger()).get(url)
+        assert resp.status_code == 200
+        assert len(responses.calls) == 2
+        mock_sleep.assert_called_once_with(5.0)
+
+    @staticmethod
+    @responses.activate
+    def test_client_retry_003():
+        """Test retrying failed request.
+
+        Retry a failing request with exponential backoff until the retries
+        are exhausted. A request that failed with a permanent error like
+        404 or with a too long rate limit reset is not retried.
+        """
+
+        url = TestSnippyTldrClient.URL
+        responses.add(responses.GET, url, status=502)
+        with mock.patch("snippy_tldr.client.time.sleep") as mock_sleep:
+            retry = RetryPolicy(retries=3, backoff=0.5)
+            resp = HttpClient(Logger(), retry=retry).get(url)
+        assert resp.status_code == 502
+        assert len(responses.calls) == 4
+        assert mock_sleep.call_args_list == [
+            mock.call(0.5),
+            mock.call(1.0),
+            mock.call(2.0),
+        ]
+
+        responses.reset()
+        responses.add(responses.GET, url, status=404)
+        headers = {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "4600"}
+        responses.add(responses.GET, url, status=403, headers=headers)
+        with mock.patch("snippy_tldr.client.time.sleep") as mock_sleep, mock.patch(
+            "snippy_tldr.client.time.time", return_value=1000
+        ):
+            client = HttpClient(Logger())
+            assert client.get(url).status_code == 404
+            assert client.get(url).status_code == 403
+        assert len(responses.calls) == 2
+        mock_sleep.assert_not_called()
+
+    @staticmethod
+    @responses.activate
+    def test_client_cache_001(tmpdir):
+        """Test conditional requests with HTTP cache.
+
+        Request the same URL twice. The second request is a conditional
+        request with the ``ETag`` from the first response. The cached body
+        is returned when the server responds with 304.
+        """
+
+        url = TestSnippyTldrClient.URL
+        headers = {"ETag": '"a1b2"', "Last-Modified": "Tue, 31 Mar 2020 10:00:00 GMT"}
+        responses.add(
+            responses.GET, url, json={"name": "master"}, status=200, headers=headers
+        )
+        responses.add(responses.GET, url, status=304)
+        cache = HttpCache(Logger(), str(tmpdir))
+        client = HttpClient(Logger(), cache=cache)
+        assert client.get(url).json() == {"name": "master"}
+        resp = HttpClient(Logger(), cache=cache).get(url)
+        assert resp.status_code == 200
+        assert resp.json() == {"name": "master"}
+        assert len(responses.calls) == 2
+        assert "If-None-Match" not in responses.calls[0].request.headers
+        assert responses.calls[1].request.headers["If-None-Match"] == '"a1b2"'
+        assert (
+            responses.calls[1].request.headers["If-Modified-Since"]
+            == "Tue, 31 Mar 2020 10:00:00 GMT"
+        )
+        assert (cache.hits, cache.revalidations, cache.misses) == (0, 1, 1)
+
+    @staticmethod
+    @responses.activate
+    def test_client_cache_002(tmpdir):
+        """Test fresh responses with HTTP cache.
+
+        Request the same URL twice. The first response can be cached for
+        60 seconds which means that the second request is not sent. A
+        response without validators or maximum age is not cached.
+        """
+
+        url = TestSnippyTldrClient.URL
+        headers = {"Cache-Control": "private, max-age=60, s-maxage=60"}
+        responses.add(responses.GET, url, body="text", status=200, headers=headers)
+        responses.add(responses.GET, url + "/no-cache", body="text", status=200)
+        cache = HttpCache(Logger(), str(tmpdir))
+        client = HttpClient(Logger(), cache=cache)
+        for _ in range(2):
+            assert client.get(url).text == "text"
+            assert client.get(url + "/no-cache").text == "text"
+        assert len(responses.calls) == 3
+        assert (cache.hits, cache.revalidations, cache.misses) == (1, 0, 3)
+
+    @staticmethod
+    @responses.activate
+    def test_client_rate_limit_001():
+        """Test pacing GitHub API requests.
+
+        Send requests after the burst is used. The requests are paced so
+        that the remaining requests are spread over the time left until the
+        rate limit is reset.
+        """
+
+        url = TestSnippyTldrClient.URL
+        for remaining in ("10", "9", "8"):
+            headers = {"X-RateLimit-Remaining": remaining, "X-RateLimit-Reset": "1010"}
+            responses.add(responses.GET, url, status=200, headers=headers)
+        with mock.patch("snippy_tldr.client.time.sleep") as mock_sleep, mock.patch(
+            "snippy_tldr.client.time.time", return_value=1000
+        ):
+            limiter = RateLimiter(Logger(), burst=1)
+            client = HttpClient(Logger(), limiter=limiter)
+            for _ in range(3):
+                assert client.get(url).status_code == 200
+        assert len(responses.calls) == 3
+        mock_sleep.assert_called_once_with(1 / 0.9)
+        assert limiter.metrics["requests"] == 2
+        assert limiter.metrics["paced"] == 1
+
+    @staticmethod
+    @responses.activate
+    def test_client_rate_limit_002():
+        """Test exhausted GitHub API rate limit.
+
+        Send a request after the rate limit is exhausted. The ``wait`` policy
+        waits until the rate limit is reset. The ``fallback`` policy raises
+        an exception without sending the request.
+        """
+
+        url = TestSnippyTldrClient.URL
+        headers = {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "1005"}
+        responses.add(responses.GET, url, status=200, headers=headers)
+        with mock.patch("snippy_tldr.client.time.sleep") as mock_sleep, mock.patch(
+            "snippy_tldr.client.time.time", return_value=1000
+        ):
+            limiter = RateLimiter(Logger(), policy="wait")
+            client = HttpClient(Logger(), limiter=limiter)
+            client.get(url)
+            client.get(url)
+            mock_sleep.assert_called_once_with(5)
+            assert limiter.metrics["waited"] == 1
+
+            limiter = RateLimiter(Logger(), policy="fallback")
+            client = HttpClient(Logger(), limiter=limiter)
+            client.get(url)
+            with pytest.raises(RateLimitError):
+                client.get(url)
+            assert limiter.metrics["exhausted"] == 1
+        assert len(responses.calls) == 3
+
+
+class Logger(object):  # pylint: disable=too-few-public-methods
+    """Logger mock."""
+
+    def debug(self, *args, **kwargs):
+        """Dummy debug method."""
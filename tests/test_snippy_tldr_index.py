@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""test_snippy_tldr_index: Test in-memory index for parsed tldr examples."""
+
+from snippy_tldr.index import ExampleIndex
+from snippy_tldr.plugin import SnippyTldr
+from snippy_tldr.record import TldrRecord
+from tests.lib.helper import Snippet
+from tests.lib.helper import TldrPage
+
+
+class TestSnippyTldrIndex(object):
+    """Test in-memory index for parsed tldr examples."""
+
+    @staticmethod
+    def test_example_index_001():
+        """Test querying example index.
+
+        Find examples with command tokens, flags and page names. The tldr
+        placeholders are not indexed and the examples must match all terms.
+        """
+
+        index = ExampleIndex()
+        index.add(TldrRecord(Snippet.adduser))
+        index.add(TldrRecord(Snippet.pushd))
+        index.add(TldrRecord(Snippet.add_apt_repository))
+        assert len(index) == 13
+        assert index.query("--shell") == [("adduser", Snippet.adduser["data"][3])]
+        assert index.query("pushd", "+4") == [("pushd", Snippet.pushd["data"][2])]
+        assert index.query("name:pushd") == [
+            ("pushd", data) for data in Snippet.pushd["data"]
+        ]
+        assert len(index.query("adduser")) == 6
+        assert not index.query("username")
+        assert not index.query("adduser", "--remove")
+        assert not index.query()
+
+    @staticmethod
+    def test_example_index_002(tmpdir):
+        """Test querying examples from the plugin.
+
+        Build the example index while the local tldr pages are parsed. The
+        queries do not return anything if the index is not enabled.
+        """
+
+        platform = tmpdir.mkdir("tldr").mkdir("pages").mkdir("linux")
+        platform.join("add-apt-repository.md").write(TldrPage.add_apt_repository)
+        platform.join("adduser.md").write(TldrPage.adduser)
+        platform.join("pushd.md").write(TldrPage.pushd)
+        contents = SnippyTldr(Logger(), str(platform), index=True)
+        assert [name for name, _ in contents.query("--update")] == [
+            "add-apt-repository"
+        ]
+        contents = SnippyTldr(Logger(), str(platform), index=True, stream=True)
+        assert not contents.query("--update")
+        assert len(list(contents)) == 3
+        assert len(contents.query("--update")) == 1
+        assert not SnippyTldr(Logger(), str(platform)).query("--update")
+
+
+class Logger(object):  # pylint: disable=too-few-public-methods
+    """Logger mock."""
+
+    def debug(self, *args, **kwargs):
+        """Dummy debug method."""
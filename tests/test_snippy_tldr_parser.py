@@ -20,7 +20,10 @@
 
 """test_snippy_tldr_parser: Test tldr man page import plugin parser."""
 
+import pytest
+
 from snippy_tldr.plugin import SnippyTldr
+from tests.lib.helper import TldrPage
 
 
 class TestSnippyTldrParser(object):  # pylint: disable=too-few-public-methods
@@ -87,6 +90,105 @@ class TestSnippyTldrParser(object):  # pylint: disable=too-few-public-methods
         )._parse_tldr_page("", "osx", "\n".join(page))
         assert content == snippet
 
+    @staticmethod
+    @pytest.mark.parametrize(
+        "page",
+        [
+            TldrPage.add_apt_repository,
+            TldrPage.adduser,
+            TldrPage.pushd,
+            "\n".join(
+                (
+                    "# tar",
+                    "",
+                    "> Archiving utility! Often combined with a compression method.",
+                    "> More information: <https://www.gnu.org/software/tar>.",
+                    "",
+                    "- Extract an archive:",
+                    "",
+                    "`tar xf {{source.tar}}`",
+                    "",
+                    "- Indented command with backticks inside:",
+                    "",
+                    "  `tar cf `date`.tar {{file}}`",
+                    "",
+                )
+            ),
+            "\n".join(
+                (
+                    "# no-brief sentence",
+                    "",
+                    "> Description without punctuation",
+                    "",
+                    "- Example without a command:",
+                    "",
+                    "- Example with trailing spaces :  ",
+                    "",
+                    "`command`",
+                )
+            ),
+            "# header only",
+            "",
+            "# tar\n \n> Archiver.\n\n- Extract an archive:\n\n`tar xf {{a}}`\n",
+            "# tar\n\n\n> Archiver.\n\n- Extract an archive:\n\n`tar xf {{a}}`\n",
+            "# tar\n\t\n \n> Archiver.\n\n- Extract an archive:\n\n`tar xf {{a}}`\n",
+            "# tar\n\n> Archiver.\n",
+            "# tar\n\n> Archiver.",
+            "# tar\n\n> Archiver.\n\n",
+            "# tar\n\n> Archiver.\n \n- Extract an archive:\n\n`tar xf {{a}}`\n",
+            "# tar\n> Archiver.\n\n- Extract an archive:\n\n`tar xf {{a}}`\n",
+            "- Extract an archive:\n\n`tar xf {{a}}`\n",
+            "",
+            "#" * 64,
+            "# page\n\n" + "> x\n" * 16,
+            "# page\n\n> d\n\n" + "- - " * 16,
+            "# page\n\n> d\n\n- c\n" + "\n `x" * 16,
+            "# page\n\n> " + " " * 64 + "\n",
+            "# a\n \n> x\n" * 16,
+        ],
+    )
+    def test_tldr_page_parser_002(page):
+        """Test parsing snippet with different parsers.
+
+        Test case verifies that the single pass line parser and the regular
+        expression parser produce the same snippet from a tldr page. The
+        pages include malformed pages and the adversarial pages from the
+        parser benchmark.
+        """
+
+        plugin = SnippyTldr(Logger(), "../tldr/pages/linux/tar.md", parser="lines")
+        lines = plugin._parse_tldr_page(  # pylint: disable=protected-access
+            "https://github.com/tldr-pages/tldr/pages/linux/tar.md", "linux", page
+        )
+        plugin = SnippyTldr(Logger(), "../tldr/pages/linux/tar.md", parser="regex")
+        regex = plugin._parse_tldr_page(  # pylint: disable=protected-access
+            "https://github.com/tldr-pages/tldr/pages/linux/tar.md", "linux", page
+        )
+        assert lines == regex
+
+    @staticmethod
+    @pytest.mark.parametrize("parser", ["lines", "regex"])
+    @pytest.mark.parametrize(
+        "empty", ["\n", " \n", "\t\n", "\n\n", " \n\n", "\n\t\n \n"]
+    )
+    def test_tldr_page_parser_003(parser, empty):
+        """Test parsing snippet with empty lines after the header.
+
+        Test case verifies that empty lines with or without whitespaces are
+        accepted between the header and the description with both parsers.
+        """
+
+        examples = "- Extract an archive:\n\n`tar xf {{a}}`\n"
+        page = "# tar\n" + empty + "> Archiver.\n\n" + examples
+        plugin = SnippyTldr(Logger(), "../tldr/pages/linux/tar.md", parser=parser)
+        snippet = plugin._parse_tldr_page(  # pylint: disable=protected-access
+            "", "linux", page
+        )
+        assert snippet["data"] == ["tar xf {{a}}  #  Extract an archive."]
+        assert snippet["brief"] == "Archiver"
+        assert snippet["description"] == "Archiver."
+        assert snippet["name"] == "tar"
+
 
 class Logger(object):  # pylint: disable=too-few-public-methods
     """Logger mock."""
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""test_snippy_tldr_record: Test compact snippet records."""
+
+import pickle
+
+from snippy_tldr.record import TldrRecord
+from tests.lib.helper import Snippet
+
+
+class TestSnippyTldrRecord(object):  # pylint: disable=too-few-public-methods
+    """Test compact snippet records."""
+
+    @staticmethod
+    def test_tldr_record_001():
+        """Test converting snippet to compact record.
+
+        Convert snippets to records and back to Snippy JSON dictionaries.
+        The repeating ``groups`` and ``tags`` values are shared between the
+        records.
+        """
+
+        local = Snippet.pushd
+        local["links"] = []
+        local["source"] = ""
+        records = [TldrRecord(Snippet.adduser), TldrRecord(Snippet.pushd)]
+        records.append(TldrRecord(local))
+        assert records[0].to_dict() == Snippet.adduser
+        assert records[1].to_dict() == Snippet.pushd
+        assert records[2].to_dict() == local
+        assert records[0].groups is records[1].groups
+        assert records[0].tags is records[1].groups
+        assert records[0].links is None
+        assert not hasattr(records[0], "__dict__")
+
+    @staticmethod
+    def test_tldr_record_002():
+        """Test pickling compact record.
+
+        Records are sent from worker processes with pickle. The ``groups``
+        and ``tags`` values are shared again after the record is unpickled.
+        """
+
+        record = TldrRecord(Snippet.adduser)
+        copy = pickle.loads(pickle.dumps(record, pickle.HIGHEST_PROTOCOL))
+        assert copy.to_dict() == Snippet.adduser
+        assert copy.groups is record.groups
+        assert copy.tags is record.tags
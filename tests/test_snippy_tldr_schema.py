@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+
+"""test_snippy_tldr_schema: Test precompiled JSON schema validation."""
+
+import copy
+
+import pytest
+from snippy.plugins import Schema
+
+from snippy_tldr.schema import SnippetValidator
+from tests.lib.helper import Snippet
+
+
+class TestSnippyTldrSchema(object):  # pylint: disable=too-few-public-methods
+    """Test precompiled JSON schema validation."""
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        "attribute,value",
+        [
+            (None, None),
+            ("category", "unknown"),
+            ("category", 1),
+            ("data", "string"),
+            ("data", [1]),
+            ("data", ("tuple",)),
+            ("groups", [None]),
+            ("links", {}),
+            ("name", None),
+            ("unknown", "attribute"),
+        ],
+    )
+    def test_snippet_validator_001(attribute, value):
+        """Test validating snippets.
+
+        Validate snippets with the compiled schema. The result must be the
+        same as with the Snippy JSON schema validation.
+        """
+
+        snippet = copy.deepcopy(Snippet.adduser)
+        if attribute:
+            snippet[attribute] = value
+        validator = SnippetValidator(Logger())
+        assert validator.compiled
+        assert validator.validate([snippet]) == [Schema().validate(snippet)]
+        assert validator.validate([snippet, Snippet.pushd]) == [
+            Schema().validate(snippet),
+            True,
+        ]
+
+
+class Logger(object):  # pylint: disable=too-few-public-methods
+    """Logger mock."""
+
+    def debug(self, *args, **kwargs):
+        """Dummy debug method."""
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""test_snippy_tldr_snapshot: Test snapshots of parsed tldr pages."""
+
+import io
+import struct
+
+import mock
+import pytest
+
+from snippy_tldr.plugin import SnippyTldr
+from snippy_tldr.plugin import snippy_import_hook
+from snippy_tldr.record import TldrRecord
+from snippy_tldr.snapshot import Snapshot
+from tests.lib.helper import Snippet
+from tests.lib.helper import TldrPage
+
+
+class TestSnippyTldrSnapshot(object):
+    """Test snapshots of parsed tldr pages."""
+
+    @staticmethod
+    def test_snapshot_001(tmpdir):
+        """Test writing and reading snapshot.
+
+        Write records to a snapshot and read them back. The ``groups`` and
+        ``tags`` values are shared with other records. A truncated snapshot
+        returns the records that were completely written.
+        """
+
+        path = str(tmpdir.join("tldr.snapshot"))
+        records = [TldrRecord(Snippet.adduser), TldrRecord(Snippet.pushd)]
+        metadata = {"branch": "master", "commit": "a" * 40}
+        assert Snapshot.write(Logger(), path, metadata, iter(records)) == 2
+        assert Snapshot.is_snapshot(path)
+        assert not Snapshot.is_snapshot(str(tmpdir))
+        snapshot = Snapshot(Logger(), path)
+        assert snapshot.count == 2
+        assert snapshot.metadata == metadata
+        copies = list(snapshot)
+        assert [copy.to_dict() for copy in copies] == [Snippet.adduser, Snippet.pushd]
+        assert copies[0].groups is records[0].groups
+        assert copies[0].data == records[0].data
+
+        with open(path, "rb") as infile:
+            data = infile.read()
+        with open(path, "wb") as outfile:
+            outfile.write(data[:-10])
+        assert [copy.name for copy in Snapshot(Logger(), path)] == ["adduser"]
+
+    @staticmethod
+    def test_snapshot_002(tmpdir):
+        """Test exporting and importing snapshot with the plugin.
+
+        Export parsed tldr pages to a snapshot and import the snapshot with
+        the import hook. The snapshot is imported without parsing the pages
+        and the source metadata is available from the imported snapshot.
+        """
+
+        platform = tmpdir.mkdir("tldr").mkdir("pages").mkdir("linux")
+        platform.join("adduser.md").write(TldrPage.adduser)
+        platform.join("pushd.md").write(TldrPage.pushd)
+        contents = SnippyTldr(Logger(), str(platform))
+        path = str(tmpdir.join("tldr.snapshot"))
+        assert contents.export_snapshot(path) == 2
+        snippets = list(contents)
+        platform.join("adduser.md").remove()
+
+        contents = snippy_import_hook(Logger(), path)
+        assert len(contents) == 2
+        assert list(contents) == snippets
+        assert contents.source["uri"] == str(platform) + "/"
+        assert contents.source["translations"] == ["pages"]
+        contents = SnippyTldr(Logger(), path, stream=True)
+        assert len(contents) == 2
+        assert list(contents) == snippets
+
+    @staticmethod
+    def test_snapshot_003(tmpdir):
+        """Test closing snapshot file.
+
+        The snapshot file must be closed when the snapshot header cannot be
+        read and when the snapshot is used as a context manager.
+        """
+
+        path = str(tmpdir.join("tldr.snapshot"))
+        records = [TldrRecord(Snippet.adduser)]
+        assert Snapshot.write(Logger(), path, {}, iter(records)) == 1
+        files = []
+
+        def open_(path, mode):
+            """Open and remember a file."""
+
+            files.append(io.open(path, mode))  # pylint: disable=consider-using-with
+            return files[-1]
+
+        with mock.patch("snippy_tldr.snapshot.open", open_, create=True):
+            with Snapshot(Logger(), path) as snapshot:
+                assert snapshot.count == 1
+            assert files[-1].closed
+            with open(path, "wb") as outfile:
+                outfile.write(Snapshot.MAGIC + b"\0\0")
+            with pytest.raises(struct.error):
+                Snapshot(Logger(), path)
+            assert files[-1].closed
+
+
+class Logger(object):  # pylint: disable=too-few-public-methods
+    """Logger mock."""
+
+    def debug(self, *args, **kwargs):
+        """Dummy debug method."""
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+#
+#  Snippy-tldr - A plugin to import tldr man pages for Snippy.
+#  Copyright 2019-2020 Heikki J. Laaksonen  <laaksonen.heikki.j@gmail.com>
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  SPDX-License-Identifier: Apache-2.0
+
+"""test_snippy_tldr_sqlite: Test SQLite database export for tldr pages."""
+
+import sqlite3
+
+from snippy_tldr.plugin import SnippyTldr
+from snippy_tldr.record import TldrRecord
+from snippy_tldr.sqlite import SqliteExport
+from tests.lib.helper import Snippet
+from tests.lib.helper import TldrPage
+
+
+class TestSnippyTldrSqlite(object):
+    """Test SQLite database export for tldr pages."""
+
+    @staticmethod
+    def test_sqlite_export_001(tmpdir):
+        """Test writing SQLite database.
+
+        Write records to a SQLite database in batches. The examples are split
+        to commands and comments and a page without examples is still found
+        from the full-text index.
+        """
+
+        path = str(tmpdir.join("tldr.sqlite"))
+        empty = Snippet.pushd
+        empty["name"] = "empty"
+        empty["data"] = []
+        records = [TldrRecord(Snippet.adduser), TldrRecord(Snippet.pushd)]
+        records.append(TldrRecord(empty))
+        metadata = {"branch": "master"}
+        assert SqliteExport.write(Logger(), path, metadata, iter(records), 2) == 3
+        connection = sqlite3.connect(path)
+        assert connection.execute("SELECT value FROM metadata").fetchall() == [
+            ('"master"',)
+        ]
+        assert connection.execute("SELECT COUNT(*) FROM pages").fetchone() == (3,)
+        assert connection.execute(
+            "SELECT command, comment FROM examples WHERE page_id = 2 ORDER BY id"
+        ).fetchall()[0] == (
+            "pushd < {{directory}}",
+            "Switch to directory and push it on the stack.",
+        )
+        assert connection.execute(
+            "SELECT pages.name, examples.command FROM search "
+            "JOIN pages ON pages.id = search.page_id "
+            "JOIN examples ON examples.id = search.example_id "
+            "WHERE search MATCH 'comment:shell'"
+        ).fetchall() == [("adduser", "adduser --shell {{path/to/shell}} {{username}}")]
+        assert connection.execute(
+            "SELECT page_id, example_id FROM search WHERE search MATCH 'name:empty'"
+        ).fetchall() == [(3, None)]
+        connection.close()
+
+    @staticmethod
+    def test_sqlite_export_002(tmpdir):
+        """Test exporting SQLite database with the plugin.
+
+        Export parsed local tldr pages and the source metadata to a SQLite
+        database.
+        """
+
+        platform = tmpdir.mkdir("tldr").mkdir("pages").mkdir("linux")
+        platform.join("adduser.md").write(TldrPage.adduser)
+        platform.join("pushd.md").write(TldrPage.pushd)
+        path = str(tmpdir.join("tldr.sqlite"))
+        contents = SnippyTldr(Logger(), str(platform))
+        assert contents.export_sqlite(path) == 2
+        connection = sqlite3.connect(path)
+        assert connection.execute("SELECT name FROM pages").fetchall() == [
+            ("adduser",),
+            ("pushd",),
+        ]
+        assert connection.execute(
+            "SELECT value FROM metadata WHERE key = 'translations'"
+        ).fetchone() == ('["pages"]',)
+        connection.close()
+
+
+class Logger(object):  # pylint: disable=too-few-public-methods
+    """Logger mock."""
+
+    def debug(self, *args, **kwargs):
+        """Dummy debug method."""